@@ -0,0 +1,86 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from instrumentation import profiled_to, recorded
+from orm_pipeline import run_analysis, AnalysisCancelled, AnalysisGraph, DEFAULT_NOISE_MASK
+from spectrum_cache import SpectrumCache
+
+
+class AnalysisWorker(QThread):
+    """
+    Runs the numeric ORM pipeline off the GUI thread.
+    Results are only posted back through signals; rendering stays on the GUI thread.
+    """
+    progress = pyqtSignal(str, int)      # stage name, percent
+    resultReady = pyqtSignal(object)     # AnalysisResult
+    failed = pyqtSignal(str)             # error message
+    cancelled = pyqtSignal()
+
+    def __init__(self, signals, correctors, bpm_h, bpm_v, engine_mode, spectra, parent=None,
+                 recorder=None, profile_path=None, noise_mask=DEFAULT_NOISE_MASK, graph=None, workers=1,
+                 lookup=None):
+        super().__init__(parent)
+        self._args = (signals, list(correctors), list(bpm_h), list(bpm_v))
+        self._engine_mode = engine_mode
+        self._spectra = spectra
+        self._noise_mask = noise_mask
+        # AnalysisGraph of earlier runs on the same data: only changed stages rerun
+        self._graph = graph
+        # threads for independent stages, planes and blocks (results do not depend on it)
+        self._workers = workers
+        # optional RunRecorder for stage timings, and .prof path for a cProfile capture
+        self.recorder = recorder
+        self.profile_path = profile_path
+        if profile_path is not None:
+            # a profiled run starts from nothing cached, or an up-to-date graph would
+            # recompute no stage and the profile would be empty; it runs serially,
+            # since cProfile only sees this thread, not the pool threads
+            self._graph = AnalysisGraph()
+            self._spectra = SpectrumCache(signals)
+            self._workers = 1
+        # optional callable run here before the analysis (it may hash the data file):
+        # (store key, data digest, stored AnalysisResult or None)
+        self._lookup = lookup
+        self.storeKey = self.dataDigest = None
+        self.fromStore = False
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Ask the worker to stop at the next stage boundary."""
+        self._cancel_event.set()
+
+    def isCancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        try:
+            if self._lookup is not None:
+                with recorded(self.recorder, "Result store lookup"):
+                    self.storeKey, self.dataDigest, stored = self._lookup()
+                if stored is not None:
+                    self.fromStore = True
+                    self.resultReady.emit(stored)
+                    return
+            with profiled_to(self.profile_path):
+                result = run_analysis(
+                    *self._args,
+                    engine_mode=self._engine_mode,
+                    spectra=self._spectra,
+                    progress=self.progress.emit,
+                    is_cancelled=self._cancel_event.is_set,
+                    recorder=self.recorder,
+                    noise_mask=self._noise_mask,
+                    graph=self._graph,
+                    workers=self._workers,
+                )
+        except AnalysisCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as ex:
+            self.failed.emit(str(ex))
+            return
+        if self._cancel_event.is_set():
+            self.cancelled.emit()
+        else:
+            self.resultReady.emit(result)
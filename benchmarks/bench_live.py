@@ -0,0 +1,137 @@
+"""
+Throughput benchmark of live acquisition on a synthetic stream.
+
+    python benchmarks/bench_live.py --bpms 100 300 --rates 1000 4000 --window 4096
+
+For every (nBPM, sample rate) point CSV text is streamed through the live
+path: chunk decoding, the ring buffer, and one refresh per LIVE_REFRESH_MS
+(window snapshot, sliding-DFT update, channel classification, analysis).
+"window" is the part of a refresh before the analysis.
+Each refresh is timed twice: with the BPM tones read from the sliding DFT
+(SlidingSpectra, as live mode does) and with a full transform of every
+window (SpectrumCache). The report gives the share of one core the stream
+takes and the sample rate one core would sustain.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import numpy as np
+
+from bench_orm import environment
+from synthetic import make_measurement
+from live_stream import LIVE_REFRESH_MS, CsvChunkDecoder, RingBuffer
+from measurement_io import classify_channels, match_columns
+from orm_pipeline import ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP, AnalysisGraph, run_analysis
+from signal_store import SignalStore
+from sliding_dft import SlidingDFT, SlidingSpectra
+from spectrum_cache import SpectrumCache
+
+ENGINES = [ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP]
+
+
+def csv_chunks(df, first, step):
+    """CSV text (no header) of df rows [first:], `step` rows per chunk."""
+    values = df.to_numpy()
+    for start in range(first, len(values) - step + 1, step):
+        buf = io.BytesIO()
+        np.savetxt(buf, values[start:start + step], fmt="%.7g", delimiter=",")
+        yield buf.getvalue()
+
+
+def bench_point(n_corr, n_bpm, rate, window, ticks, engine, seed):
+    per_tick = max(1, int(rate * LIVE_REFRESH_MS / 1000))
+    meas = make_measurement(n_corr, n_bpm, window + ticks * per_tick, seed=seed)
+    header = list(meas.df.columns)
+    corr_cols, bpm_cols = match_columns(header, meas.correctors, meas.bpm_h + meas.bpm_v)
+    columns = list(dict.fromkeys(corr_cols + [col for _, col in bpm_cols]))
+    position = {name: i for i, name in enumerate(header)}
+    tracked = [col for _, col in bpm_cols]
+    rows = [columns.index(col) for col in tracked]
+
+    decoder = CsvChunkDecoder([position[c] for c in columns])
+    buffer = RingBuffer(len(columns), window)
+    tracker = SlidingDFT(len(tracked), window, [])
+    graphs = {"sliding": AnalysisGraph(), "full": AnalysisGraph()}
+    buffer.extend(meas.df[columns].to_numpy()[:window])
+    seen = 0
+
+    times = {"decode": [], "window": [], "refresh_sliding": [], "refresh_full": []}
+    text_bytes = 0
+    for chunk in csv_chunks(meas.df, window, per_tick):
+        text_bytes += len(chunk)
+        t = time.perf_counter()
+        buffer.extend(decoder.feed(chunk))
+        times["decode"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        block, n_total = buffer.snapshot()
+        new = min(n_total - seen, block.shape[1])
+        tracker.update(block[rows, block.shape[1] - new:])
+        seen = n_total
+        bpm_h, bpm_v, _, _ = classify_channels(columns, block, corr_cols, bpm_cols)
+        signals = SignalStore.from_rows(columns, block, corr_cols, bpm_h, bpm_v)
+        times["window"].append(time.perf_counter() - t)
+        for kind in ("sliding", "full"):
+            spectra = SlidingSpectra(signals, tracker, tracked) if kind == "sliding" else SpectrumCache(signals)
+            t = time.perf_counter()
+            run_analysis(signals, corr_cols, bpm_h, bpm_v, engine, spectra=spectra, graph=graphs[kind])
+            times["refresh_" + kind].append(times["window"][-1] + time.perf_counter() - t)
+
+    period = LIVE_REFRESH_MS / 1000
+    median = {name: float(np.median(values[1:] or values)) for name, values in times.items()}
+    point = {"n_corr": n_corr, "n_bpm": n_bpm, "rate": rate, "window": window, "engine": engine,
+             "samples_per_refresh": per_tick, "timings": median,
+             "decode_values_per_s": per_tick * len(columns) / median["decode"],
+             "decode_bytes_per_s": text_bytes / len(times["decode"]) / median["decode"]}
+    for kind in ("sliding", "full"):
+        load = (median["decode"] + median["refresh_" + kind]) / period
+        point["core_load_" + kind] = load
+        # decoding scales with the rate, a refresh hardly does (sliding) or not at all (full)
+        point["max_rate_" + kind] = rate * (period - median["refresh_" + kind]) / max(median["decode"], 1e-12)
+    return point
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark live acquisition on a synthetic stream.")
+    parser.add_argument("--corr", type=int, default=16, help="correctors in the stream")
+    parser.add_argument("--bpms", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--rates", type=float, nargs="+", default=[1000.0, 4000.0], help="samples/s per device")
+    parser.add_argument("--window", type=int, default=4096, help="rolling window (samples per device)")
+    parser.add_argument("--ticks", type=int, default=6, help="refreshes timed per point")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="JSON output (default benchmarks/results/live-<time>.json)")
+    args = parser.parse_args(argv)
+
+    doc = {"environment": environment(), "refresh_ms": LIVE_REFRESH_MS, "points": []}
+    for n_bpm in args.bpms:
+        for rate in args.rates:
+            for engine in args.engines:
+                p = bench_point(args.corr, n_bpm, rate, args.window, args.ticks, engine, args.seed)
+                doc["points"].append(p)
+                t = p["timings"]
+                print(f"nBPM={n_bpm:<4} {rate:7.0f} S/s {engine:>6}: decode {t['decode'] * 1e3:6.1f} ms "
+                      f"({p['decode_values_per_s'] / 1e6:.1f} M values/s); window {t['window'] * 1e3:5.1f} ms, "
+                      f"refresh sliding {t['refresh_sliding'] * 1e3:6.1f} ms "
+                      f"vs full {t['refresh_full'] * 1e3:6.1f} ms; "
+                      f"core load {p['core_load_sliding']:.0%} vs {p['core_load_full']:.0%}; "
+                      f"max rate {p['max_rate_sliding']:,.0f} vs {p['max_rate_full']:,.0f} S/s", flush=True)
+
+    out = args.out or os.path.join(HERE, "results", "live-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(doc, f, indent=1)
+    print(f"results: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Scaling benchmark of the ORM pipeline on synthetic data.
+
+    python benchmarks/bench_orm.py --grid default --out benchmarks/results/run.json
+
+For every (nCorr, nBPM, N) point of the grid and every engine it times CSV
+ingestion (the openCSVFile path), each analysis stage, table population and
+heatmap rendering, and checks the response matrices against the ground
+truth: a median error above --max-error fails the run. Results are written as one JSON document so runs of different
+versions can be compared (see --compare).
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import numpy as np
+
+from synthetic import make_measurement, write_measurement, response_error
+from measurement_io import load_measurement, read_device_list
+from spectrum_cache import SpectrumCache
+from orm_pipeline import (
+    ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP, AnalysisResult, compute_spectra,
+    compute_corrector_errors, compute_bpm_errors, build_response_matrix, build_orm_error_matrix,
+)
+
+GRIDS = {
+    # (n_corr, n_bpm, n_samples)
+    "small": list(itertools.product([4, 16], [20, 80], [2048, 16384])),
+    "default": list(itertools.product([8, 32], [50, 200], [4096, 65536])),
+    "large": list(itertools.product([16, 64], [200, 500], [65536, 1 << 20])),
+}
+ENGINES = [ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP]
+
+
+def timed(fn, repeat, setup=None):
+    """
+    (best wall seconds over `repeat` calls, last return value). With setup,
+    each call is fn(setup()) and only fn is timed.
+    """
+    best, value = float("inf"), None
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        t = time.perf_counter()
+        value = fn(*args)
+        best = min(best, time.perf_counter() - t)
+    return best, value
+
+
+###############################################################################
+# One grid point
+###############################################################################
+def bench_analysis(signals, correctors, bpm_h, bpm_v, engine, repeat, workers=1):
+    """Stage timings of one engine on a loaded SignalStore, plus the final result."""
+    timings = {}
+    bpms = bpm_h + bpm_v
+    names = correctors + (bpms if engine == ORM_ENGINE_FFT else [])
+    result = AnalysisResult(correctors, bpm_h, bpm_v, engine)
+
+    # Every repeat starts from a fresh cache holding exactly what the earlier
+    # stages would have left in it, so cached work is never timed as free.
+    def after_spectra():
+        spectra = SpectrumCache(signals)
+        compute_spectra(spectra, names, workers=workers)
+        return spectra
+
+    def after_errors():
+        spectra = after_spectra()
+        compute_corrector_errors(spectra, correctors, engine)
+        compute_bpm_errors(spectra, correctors, bpms, engine)
+        return spectra
+
+    timings["spectra"], _ = timed(lambda s: compute_spectra(s, names, workers=workers), repeat,
+                                  lambda: SpectrumCache(signals))
+    timings["corrector_errors"], result.corrector_errors = timed(
+        lambda s: compute_corrector_errors(s, correctors, engine), repeat, after_spectra)
+    timings["bpm_errors"], result.bpm_errors = timed(
+        lambda s: compute_bpm_errors(s, correctors, bpms, engine), repeat, after_spectra)
+    timings["response_matrix"], _ = timed(lambda s: build_response_matrix(s, result, workers), repeat, after_errors)
+    timings["error_matrix"], _ = timed(lambda: build_orm_error_matrix(result, workers), repeat)
+    return timings, result
+
+
+def bench_gui(result, repeat):
+    """Table population (model reset + formatting one screen of cells) and heatmap draw."""
+    from PyQt5.QtCore import Qt
+    from table_models import ArrayTableModel
+    from mpl_canvas import HeatmapCanvas
+
+    model = ArrayTableModel(".4f")
+    canvas = HeatmapCanvas(None, width=6, height=3)
+    values, rows, cols = result.R_measured_H, result.bpm_h, result.correctors
+
+    def populate():
+        model.setArray(values, rows, cols)
+        for r in range(min(model.rowCount(), 40)):
+            for c in range(min(model.columnCount(), 20)):
+                model.data(model.index(r, c), Qt.DisplayRole)
+
+    def render():
+        canvas.set_matrix(values, rows, cols, "Horizontal Orbit Response")
+        canvas.draw()
+
+    t_table, _ = timed(populate, repeat)
+    t_heatmap, _ = timed(render, repeat)
+    return {"table_population": t_table, "heatmap_render": t_heatmap}
+
+
+def bench_point(n_corr, n_bpm, n_samples, noise, engines, repeat, gui, work_dir, seed, workers=1,
+                off_bin=False, max_error=None):
+    meas = make_measurement(n_corr, n_bpm, n_samples, noise, off_bin=off_bin, zero_bpms=1, seed=seed)
+    paths = write_measurement(meas, work_dir, f"c{n_corr}_b{n_bpm}_n{n_samples}")
+    corr_list, bpm_list = read_device_list(paths["correctors"]), read_device_list(paths["bpms"])
+
+    t_parse, loaded = timed(lambda: load_measurement(paths["csv"], corr_list, bpm_list), repeat)
+    point = {
+        "n_corr": n_corr, "n_bpm": n_bpm, "n_samples": n_samples, "noise": noise, "off_bin": off_bin,
+        "csv_bytes": os.path.getsize(paths["csv"]),
+        "parse_csv": t_parse,
+        "engines": {},
+    }
+    for engine in engines:
+        timings, result = bench_analysis(
+            loaded.signals, loaded.correctors, loaded.bpm_h, loaded.bpm_v, engine, repeat, workers)
+        err_h = response_error(result.R_measured_H, meas.R_true_H)
+        err_v = response_error(result.R_measured_V, meas.R_true_V)
+        entry = {
+            "timings": timings,
+            "total_analysis": sum(timings.values()),
+            "max_rel_error": max(err_h[0], err_v[0]),
+            "median_rel_error": max(err_h[1], err_v[1]),
+        }
+        if max_error is not None:
+            entry["accurate"] = bool(entry["median_rel_error"] <= max_error)
+        if gui:
+            entry["timings"].update(bench_gui(result, repeat))
+        point["engines"][engine] = entry
+    os.remove(paths["csv"])
+    return point
+
+
+###############################################################################
+# Reporting
+###############################################################################
+def environment():
+    env = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        env["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        env["git_commit"] = None
+    return env
+
+
+def _key(point):
+    return point["n_corr"], point["n_bpm"], point["n_samples"]
+
+
+def compare(old_path, new_doc, threshold):
+    """Print per-stage ratios new/old; returns the number of slowdowns beyond threshold."""
+    with open(old_path) as f:
+        old_points = {_key(p): p for p in json.load(f)["points"]}
+    regressions = 0
+    for point in new_doc["points"]:
+        old = old_points.get(_key(point))
+        if old is None:
+            continue
+        for engine, entry in point["engines"].items():
+            old_entry = old["engines"].get(engine)
+            if old_entry is None:
+                continue
+            for stage, t in entry["timings"].items():
+                t_old = old_entry["timings"].get(stage)
+                if not t_old:
+                    continue
+                ratio = t / t_old
+                flag = ""
+                if ratio > threshold:
+                    regressions += 1
+                    flag = "  <-- slower"
+                print(f"{_key(point)} {engine:>6} {stage:<18} {t_old * 1e3:9.2f} -> {t * 1e3:9.2f} ms "
+                      f"x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def inaccurate(doc):
+    """(point key, engine) of every entry whose median error exceeded --max-error."""
+    return [(_key(point), engine) for point in doc["points"]
+            for engine, entry in point["engines"].items() if not entry.get("accurate", True)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ORM pipeline on synthetic data.")
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="default")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3, help="timings are the best of this many runs")
+    parser.add_argument("--no-gui", action="store_true", help="skip table and heatmap timings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--off-bin", action="store_true", help="put the corrector tones between FFT bins")
+    parser.add_argument("--max-error", type=float, default=0.01,
+                        help="median relative error of R above which a point fails")
+    parser.add_argument("--workers", type=int, default=1, help="analysis threads (default 1, serial)")
+    parser.add_argument("--out", default=None, help="JSON output (default benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as regression")
+    args = parser.parse_args(argv)
+
+    gui = not args.no_gui
+    if gui:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([])  # noqa: F841 (canvases need it)
+
+    doc = {"environment": environment(), "grid": args.grid, "repeat": args.repeat, "workers": args.workers,
+           "off_bin": args.off_bin, "max_error": args.max_error, "points": []}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_corr, n_bpm, n_samples in GRIDS[args.grid]:
+            point = bench_point(n_corr, n_bpm, n_samples, args.noise, args.engines,
+                                args.repeat, gui, work_dir, args.seed, max(1, args.workers),
+                                args.off_bin, args.max_error)
+            doc["points"].append(point)
+            summary = ", ".join(f"{e} {p['total_analysis'] * 1e3:.1f} ms (err {p['median_rel_error']:.1e}"
+                                f"{'' if p['accurate'] else ' FAILED'})"
+                                for e, p in point["engines"].items())
+            print(f"nCorr={n_corr:<3} nBPM={n_bpm:<4} N={n_samples:<8} parse {point['parse_csv'] * 1e3:8.1f} ms; "
+                  f"{summary}", flush=True)
+
+    out = args.out or os.path.join(HERE, "results", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(doc, f, indent=1)
+    print(f"results: {out}")
+
+    regressions = compare(args.compare, doc, args.threshold) if args.compare else 0
+    failures = inaccurate(doc)
+    for key, engine in failures:
+        print(f"{key} {engine:>6} median error above {args.max_error:g}  <-- inaccurate")
+    return 1 if failures or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Synthetic ORM measurements with a known response matrix.
+
+    python benchmarks/synthetic.py out_dir --n-corr 16 --n-bpm 100 --n-samples 8192 --noise 0.01
+
+Writes <name>.csv in the Name(R) layout of a real acquisition, the matching
+corrector/BPM device lists, and <name>.truth.npz with the ground truth.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class SyntheticMeasurement:
+    """Samples plus the ground truth they were generated from."""
+    def __init__(self, df, correctors, bpm_h, bpm_v, R_true_H, R_true_V, corr_freqs, corr_amps):
+        self.df = df
+        self.correctors = correctors    # device names (without "(R)")
+        self.bpm_h = bpm_h
+        self.bpm_v = bpm_v
+        self.R_true_H = R_true_H        # (n_bpm_h x n_corr)
+        self.R_true_V = R_true_V        # (n_bpm_v x n_corr)
+        self.corr_freqs = corr_freqs    # cycles/sample
+        self.corr_amps = corr_amps
+
+
+def corrector_frequencies(n_corr, n_samples, off_bin=False, rng=None):
+    """
+    Distinct excitation frequencies (cycles/sample) spread over 1%..40% of
+    Nyquist-limited bins; exact FFT bins unless off_bin.
+    """
+    lo, hi = max(2, int(0.01 * n_samples)), int(0.4 * n_samples)
+    if hi - lo < n_corr:
+        raise ValueError(f"{n_samples} samples cannot hold {n_corr} distinct corrector tones.")
+    bins = np.linspace(lo, hi, n_corr).round()
+    if off_bin:
+        rng = rng or np.random.default_rng()
+        bins = bins + rng.uniform(0.1, 0.9, n_corr)
+    return bins / n_samples
+
+
+def make_measurement(n_corr=8, n_bpm=40, n_samples=4096, noise=0.01, off_bin=False,
+                     zero_bpms=0, seed=0):
+    """
+    Corrector j oscillates at its own tone; every BPM reads sum_j R_ij * C_j
+    plus white noise of standard deviation `noise`. Half the BPMs are
+    horizontal (BPH), half vertical (BPV). `zero_bpms` dead channels read 0.
+    """
+    rng = np.random.default_rng(seed)
+    freqs = corrector_frequencies(n_corr, n_samples, off_bin, rng)
+    amps = rng.uniform(0.5, 2.0, n_corr)
+    n = np.arange(n_samples, dtype=float)
+    C = amps[:, None] * np.sin(2.0 * np.pi * np.outer(freqs, n) + rng.uniform(0, 2 * np.pi, (n_corr, 1)))
+
+    n_h = n_bpm - n_bpm // 2
+    R = rng.uniform(0.2, 2.0, (n_bpm, n_corr)) * rng.choice([-1.0, 1.0], (n_bpm, n_corr))
+    B = R @ C + noise * rng.standard_normal((n_bpm, n_samples))
+
+    correctors = [f"HC{j:03d}" for j in range(n_corr)]
+    bpm_h = [f"BPH{i:03d}" for i in range(n_h)]
+    bpm_v = [f"BPV{i:03d}" for i in range(n_bpm - n_h)]
+    dead = [f"BPH{i:03d}" for i in range(n_h, n_h + zero_bpms)]
+
+    columns = {f"{c}(R)": C[j] for j, c in enumerate(correctors)}
+    columns.update({f"{b}(R)": B[i] for i, b in enumerate(bpm_h + bpm_v)})
+    columns.update({f"{b}(R)": np.zeros(n_samples) for b in dead})
+    df = pd.DataFrame(columns)
+    df.insert(0, "Time", n)
+    return SyntheticMeasurement(df, correctors, bpm_h + dead, bpm_v, R[:n_h], R[n_h:], freqs, amps)
+
+
+def write_measurement(meas, out_dir, name="synthetic"):
+    """Write CSV, device lists and ground truth; returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "csv": os.path.join(out_dir, name + ".csv"),
+        "correctors": os.path.join(out_dir, name + ".correctors.txt"),
+        "bpms": os.path.join(out_dir, name + ".bpms.txt"),
+        "truth": os.path.join(out_dir, name + ".truth.npz"),
+    }
+    meas.df.to_csv(paths["csv"], index=False, float_format="%.17g")
+    with open(paths["correctors"], "w") as f:
+        f.write("\n".join(meas.correctors) + "\n")
+    with open(paths["bpms"], "w") as f:
+        f.write("\n".join(meas.bpm_h + meas.bpm_v) + "\n")
+    np.savez(paths["truth"], R_true_H=meas.R_true_H, R_true_V=meas.R_true_V,
+             corr_freqs=meas.corr_freqs, corr_amps=meas.corr_amps,
+             correctors=np.array(meas.correctors, dtype=str),
+             bpm_h=np.array(meas.bpm_h, dtype=str), bpm_v=np.array(meas.bpm_v, dtype=str))
+    return paths
+
+
+def response_error(R_measured, R_true):
+    """
+    (max, median) relative error of measured |R| against the truth. The
+    pipeline measures magnitudes, so signs are ignored; rows of dead BPMs
+    (absent from the truth) must already be removed.
+    """
+    R_true = np.abs(np.asarray(R_true, dtype=float))
+    if R_true.size == 0:
+        return 0.0, 0.0
+    rel = np.abs(np.asarray(R_measured, dtype=float) - R_true) / R_true
+    return float(rel.max()), float(np.median(rel))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic ORM measurement with known truth.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--name", default="synthetic")
+    parser.add_argument("--n-corr", type=int, default=8)
+    parser.add_argument("--n-bpm", type=int, default=40)
+    parser.add_argument("--n-samples", type=int, default=4096)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--off-bin", action="store_true", help="put corrector tones between FFT bins")
+    parser.add_argument("--zero-bpms", type=int, default=0, help="extra all-zero BPM channels")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    meas = make_measurement(args.n_corr, args.n_bpm, args.n_samples, args.noise,
+                            args.off_bin, args.zero_bpms, args.seed)
+    for kind, path in write_measurement(meas, args.out_dir, args.name).items():
+        print(f"{kind:>10}: {path}")
+
+
+if __name__ == "__main__":
+    main()
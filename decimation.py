@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+
+###############################################################################
+# Min/max decimation for long time-domain traces
+###############################################################################
+def minmax_decimate(data, start, stop, n_bins):
+    """
+    Indices and values of data[start:stop] reduced to the min and max of each
+    of n_bins equal bins, in sample order, so peaks and glitches survive.
+    Short segments are returned unchanged. The first and last samples are kept.
+    """
+    n_total = len(data)
+    start = max(0, int(math.floor(start)))
+    stop = min(n_total, int(math.ceil(stop)) + 1)
+    if stop <= start:
+        return np.zeros(0, dtype=np.int64), data[:0]
+    n = stop - start
+    if n <= 2 * n_bins:
+        idx = np.arange(start, stop)
+        return idx, data[start:stop]
+
+    bin_size = int(math.ceil(n / n_bins))
+    n_full = (n // bin_size) * bin_size
+    blocks = data[start:start + n_full].reshape(-1, bin_size)
+    i_min = np.argmin(blocks, axis=1)
+    i_max = np.argmax(blocks, axis=1)
+    base = np.arange(blocks.shape[0]) * bin_size + start
+    pairs = np.stack([base + np.minimum(i_min, i_max), base + np.maximum(i_min, i_max)], axis=1)
+    parts = [[start], pairs.ravel()]
+    if n_full < n:
+        tail = data[start + n_full:stop]
+        parts.append(np.sort([start + n_full + np.argmin(tail), start + n_full + np.argmax(tail)]))
+    parts.append([stop - 1])
+    idx = np.unique(np.concatenate(parts).astype(np.int64))
+    return idx, data[idx]
+
+
+class DecimatedTimePlot:
+    """
+    Time-domain traces on one Axes that only ever hand ~2x the axes pixel width
+    of points per trace to matplotlib. The full arrays are kept; zooming or
+    panning (xlim_changed, e.g. from NavigationToolbar2QT) re-decimates the new
+    view. One view width of margin is decimated on either side so small pans
+    need no work.
+    """
+    def __init__(self, axes, redraw=None):
+        self.axes = axes
+        self._redraw = redraw
+        self._traces = []           # (full data, Line2D)
+        self._covered = None        # (x0, x1, view width) of the current decimation
+        self._updating = False
+        axes.callbacks.connect("xlim_changed", self._onXlimChanged)
+
+    def add_trace(self, data, label=None):
+        data = np.asarray(data)
+        idx, vals = minmax_decimate(data, 0, len(data), self._pixelWidth())
+        (line,) = self.axes.plot(idx, vals, label=label)
+        self._traces.append((data, line))
+        self._covered = None
+        return line
+
+    def n_points(self):
+        return max((len(data) for data, _ in self._traces), default=0)
+
+    def _pixelWidth(self):
+        return max(int(self.axes.bbox.width), 100)
+
+    def refresh(self, force=False):
+        """Re-decimate every trace for the current x-range."""
+        if not self._traces:
+            return
+        x0, x1 = sorted(self.axes.get_xlim())
+        width = max(x1 - x0, 1.0)
+        if not force and self._covered is not None:
+            c0, c1, c_width = self._covered
+            if c0 <= x0 and x1 <= c1 and 0.5 <= width / c_width <= 2.0:
+                return
+        lo, hi = x0 - width, x1 + width
+        n_bins = 3 * self._pixelWidth()
+        self._updating = True
+        try:
+            for data, line in self._traces:
+                idx, vals = minmax_decimate(data, lo, hi, n_bins)
+                line.set_data(idx, vals)
+        finally:
+            self._updating = False
+        self._covered = (lo, hi, width)
+        if self._redraw is not None:
+            self._redraw()
+
+    def _onXlimChanged(self, _axes):
+        if not self._updating:
+            self.refresh()
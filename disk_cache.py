@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+###############################################################################
+# Size-limited on-disk cache with LRU eviction
+###############################################################################
+CACHE_ROOT = os.environ.get(
+    "ORM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "orm_application")
+)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Content hash of a file (BLAKE2b, 128 bit)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_version(path):
+    """(absolute path, size, mtime_ns) of a file: changes whenever it is rewritten."""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+def make_key(*parts):
+    """Stable hex key from any JSON-serializable parts."""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """
+    A directory of entries, each made of one or more files named '<key><suffix>',
+    tracked in index.json with their size and last access time. When the total
+    size exceeds size_limit, least recently used entries are deleted.
+    Index updates are serialized, so an instance can be shared by threads.
+    """
+    INDEX_NAME = "index.json"
+    # a hit rewrites the index only when its last access is older than this (seconds)
+    ACCESS_RESOLUTION = 60.0
+
+    def __init__(self, directory, size_limit):
+        self.directory = directory
+        self.size_limit = size_limit
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    # ----- index -----------------------------------------------------------
+    def _indexPath(self):
+        return os.path.join(self.directory, self.INDEX_NAME)
+
+    def _readIndex(self):
+        try:
+            with open(self._indexPath(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _writeIndex(self, index):
+        tmp = self._indexPath() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, self._indexPath())
+
+    def path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    # ----- entries ---------------------------------------------------------
+    def entries(self):
+        """{key: metadata} of every entry, most recently used first."""
+        index = self._readIndex()
+        return dict(sorted(index.items(), key=lambda kv: kv[1].get("last_access", 0), reverse=True))
+
+    def get(self, key):
+        """Metadata of an entry (and mark it used), or None if missing/incomplete."""
+        with self._lock:
+            index = self._readIndex()
+            meta = index.get(key)
+            if meta is None:
+                return None
+            if not all(os.path.exists(self.path(key, s)) for s in meta.get("suffixes", [])):
+                self._dropFiles(key, meta)
+                del index[key]
+                self._writeIndex(index)
+                return None
+            now = time.time()
+            if now - meta.get("last_access", 0) >= self.ACCESS_RESOLUTION:
+                meta["last_access"] = now
+                self._writeIndex(index)
+            return meta
+
+    def add(self, key, suffixes, **meta):
+        """Register files already written for key, then evict down to the size limit."""
+        with self._lock:
+            index = self._readIndex()
+            size = sum(os.path.getsize(self.path(key, s)) for s in suffixes)
+            meta.update(suffixes=list(suffixes), bytes=size, last_access=time.time())
+            index[key] = meta
+            self._evict(index, keep=key)
+            self._writeIndex(index)
+
+    def remove(self, key):
+        with self._lock:
+            index = self._readIndex()
+            meta = index.pop(key, None)
+            if meta is not None:
+                self._dropFiles(key, meta)
+                self._writeIndex(index)
+
+    def clear(self):
+        """Delete every entry."""
+        with self._lock:
+            index = self._readIndex()
+            for key, meta in index.items():
+                self._dropFiles(key, meta)
+            self._writeIndex({})
+
+    def total_bytes(self):
+        return sum(meta.get("bytes", 0) for meta in self._readIndex().values())
+
+    def _dropFiles(self, key, meta):
+        for suffix in meta.get("suffixes", []):
+            try:
+                os.remove(self.path(key, suffix))
+            except OSError:
+                pass
+
+    def _evict(self, index, keep=None):
+        total = sum(meta.get("bytes", 0) for meta in index.values())
+        for key in sorted(index, key=lambda k: index[k].get("last_access", 0)):
+            if total <= self.size_limit:
+                break
+            if key == keep:
+                continue
+            total -= index[key].get("bytes", 0)
+            self._dropFiles(key, index.pop(key))
@@ -0,0 +1,170 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from disk_cache import CACHE_ROOT
+
+###############################################################################
+# Per-stage wall time, CPU time, peak memory and shapes
+###############################################################################
+RUN_LOG_PATH = os.environ.get("ORM_RUN_LOG", os.path.join(CACHE_ROOT, "runs.jsonl"))
+
+# Recorders tracing memory now; tracemalloc runs while any does (if they started it)
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_tracing_started = False
+
+
+class RunRecorder:
+    """
+    Timings of the stages of one run (a CSV load or an analysis).
+
+    Per stage: wall time, process CPU time (all threads, so BLAS/FFT helper
+    threads count), the array shapes processed and, with trace_memory=True,
+    the peak traced memory (tracemalloc, which also sees numpy buffers) above
+    the level at stage start. Tracing slows allocations down, so it is off by
+    default; runs that overlap share one tracemalloc session, which stops
+    when the last of them finishes.
+    """
+    def __init__(self, kind, trace_memory=False, **context):
+        self.kind = kind
+        self.context = context
+        self.stages = []
+        self.started = time.time()
+        self.trace_memory = trace_memory
+        self._tracing = False
+
+    def start(self):
+        global _tracing_runs, _tracing_started
+        if self.trace_memory and not self._tracing:
+            with _tracing_lock:
+                if _tracing_runs == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _tracing_started = True
+                _tracing_runs += 1
+            self._tracing = True
+        return self
+
+    def finish(self):
+        """Stop this run's memory tracing (idempotent)."""
+        global _tracing_runs, _tracing_started
+        if self._tracing:
+            self._tracing = False
+            with _tracing_lock:
+                _tracing_runs -= 1
+                if _tracing_runs == 0 and _tracing_started:
+                    tracemalloc.stop()
+                    _tracing_started = False
+
+    @contextmanager
+    def stage(self, name, **shapes):
+        tracing = self._tracing and tracemalloc.is_tracing()
+        if tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield shapes  # callers may add shapes known only inside the stage
+        finally:
+            entry = {
+                "stage": name,
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "peak_bytes": self._peak(base) if tracing else None,
+                "shapes": {k: list(v) if isinstance(v, tuple) else v for k, v in shapes.items()},
+            }
+            self.stages.append(entry)
+
+    @staticmethod
+    def _peak(base):
+        if not tracemalloc.is_tracing():
+            return None  # stopped during the stage from outside the recorders
+        return max(0, tracemalloc.get_traced_memory()[1] - base)
+
+    def total_wall(self):
+        return sum(s["wall_s"] for s in self.stages)
+
+    def total_cpu(self):
+        return sum(s["cpu_s"] for s in self.stages)
+
+    def peak_bytes(self):
+        return max((s["peak_bytes"] or 0 for s in self.stages), default=0)
+
+    def to_record(self):
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "kind": self.kind,
+            "context": self.context,
+            "total_wall_s": self.total_wall(),
+            "total_cpu_s": self.total_cpu(),
+            "peak_bytes": self.peak_bytes(),
+            "stages": self.stages,
+        }
+
+    def append_to_log(self, path=None):
+        """Append this run as one JSON line (the log directory is created if needed)."""
+        path = path or RUN_LOG_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_record(), default=str) + "\n")
+
+    def summary(self):
+        """One line for the status row, e.g. 'analysis 0.21 s (Spectra 0.12 s), 48.0 MB'."""
+        slowest = max(self.stages, key=lambda s: s["wall_s"], default=None)
+        text = f"{self.kind} {self.total_wall():.2f} s"
+        if slowest is not None and len(self.stages) > 1:
+            text += f" ({slowest['stage']} {slowest['wall_s']:.2f} s)"
+        if self.peak_bytes():
+            text += f", {self.peak_bytes() / 1024**2:.1f} MB"
+        return text
+
+    def details(self):
+        """Multi-line per-stage table (status-row tooltip)."""
+        lines = [f"{self.kind}: {self.total_wall():.3f} s wall, {self.total_cpu():.3f} s CPU"]
+        for s in self.stages:
+            peak = "" if s["peak_bytes"] is None else f", peak {s['peak_bytes'] / 1024**2:.1f} MB"
+            shapes = ", ".join(f"{k}={v}" for k, v in s["shapes"].items())
+            lines.append(f"  {s['stage']}: {s['wall_s'] * 1e3:.1f} ms wall, {s['cpu_s'] * 1e3:.1f} ms CPU{peak}"
+                         + (f" [{shapes}]" if shapes else ""))
+        return "\n".join(lines)
+
+
+def recorded(recorder, name, **shapes):
+    """recorder.stage(name, ...), or a no-op context when there is no recorder."""
+    return recorder.stage(name, **shapes) if recorder is not None else nullcontext(shapes)
+
+
+###############################################################################
+# cProfile capture
+###############################################################################
+@contextmanager
+def profiled_to(path):
+    """
+    cProfile the enclosed block and write the stats to path (pstats/snakeviz
+    format). No-op when path is None. Only the current thread is profiled:
+    work handed to other threads (e.g. map_blocks with workers > 1) is missing,
+    so profiled analyses run with workers=1.
+    """
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+
+
+def profile_report(path, limit=25):
+    """Top functions of a saved profile by cumulative time, as text."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,50 @@
+import sys
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+
+from startup import profiled
+
+###############################################################################
+# Canvas created on first use
+###############################################################################
+class CanvasPane(QWidget):
+    """
+    Placeholder for a Matplotlib canvas and its navigation toolbar. Neither
+    (nor matplotlib itself) is created until the pane is first shown or
+    canvas() is called, so unopened tabs cost nothing at startup.
+    """
+    def __init__(self, owner, name, width=5, height=4, heatmap=False, profiler=None):
+        super().__init__()
+        self._owner = owner
+        self.name = name
+        self._size = (width, height)
+        self._heatmap = heatmap
+        self._profiler = profiler
+        self._canvas = None
+        self.toolbar = None
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+    def isCreated(self):
+        return self._canvas is not None
+
+    def canvas(self):
+        """The MplCanvas/HeatmapCanvas of this pane, created on first call."""
+        if self._canvas is None:
+            if "mpl_canvas" not in sys.modules:
+                with profiled(self._profiler, "import matplotlib Qt backend"):
+                    import mpl_canvas  # noqa: F401
+            with profiled(self._profiler, f"create figure: {self.name}"):
+                from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
+                from mpl_canvas import MplCanvas, HeatmapCanvas
+                cls = HeatmapCanvas if self._heatmap else MplCanvas
+                width, height = self._size
+                self._canvas = cls(self._owner, width=width, height=height)
+                self.toolbar = NavigationToolbar2QT(self._canvas, self._owner)
+                self._layout.addWidget(self.toolbar)
+                self._layout.addWidget(self._canvas)
+        return self._canvas
+
+    def showEvent(self, event):
+        self.canvas()
+        super().showEvent(event)
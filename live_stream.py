@@ -0,0 +1,277 @@
+import io
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+###############################################################################
+# Live acquisition settings
+###############################################################################
+LIVE_WINDOW = 4096          # samples per device kept and analyzed
+LIVE_REFRESH_MS = 500       # ORM refresh period
+LIVE_MIN_SAMPLES = 64       # no analysis before this many samples arrived
+LIVE_DEFAULT_PORT = 5555
+READ_CHUNK = 1 << 20        # bytes per read from a source
+
+
+###############################################################################
+# Per-device ring buffer
+###############################################################################
+class RingBuffer:
+    """
+    The last `capacity` samples of n_channels devices, one row per device.
+    The reader thread appends blocks, the GUI thread copies out the window;
+    both go through one lock.
+    """
+    def __init__(self, n_channels, capacity, dtype=np.float64):
+        self.capacity = int(capacity)
+        self._data = np.zeros((n_channels, self.capacity), dtype=dtype)
+        self._pos = 0               # next column to write
+        self.n_total = 0            # samples received since the start
+        self._lock = threading.Lock()
+
+    def extend(self, samples):
+        """Append an (n_new x n_channels) block of samples."""
+        samples = np.asarray(samples, dtype=self._data.dtype)
+        n_new = len(samples)
+        if n_new == 0:
+            return
+        cap = self.capacity
+        kept = samples[-cap:]
+        m = len(kept)
+        with self._lock:
+            first = min(m, cap - self._pos)
+            self._data[:, self._pos:self._pos + first] = kept[:first].T
+            self._data[:, :m - first] = kept[first:].T
+            self._pos = (self._pos + m) % cap
+            self.n_total += n_new
+
+    def n_filled(self):
+        return min(self.n_total, self.capacity)
+
+    def window(self, n=None):
+        """Copy of the latest n samples (all held ones by default), oldest first, (n_channels x n)."""
+        return self.snapshot(n)[0]
+
+    def snapshot(self, n=None):
+        """(window(n), n_total) read together, so the caller knows which samples are new."""
+        with self._lock:
+            n = self.n_filled() if n is None else min(n, self.n_filled())
+            start = self._pos - n
+            if start >= 0:
+                return self._data[:, start:self._pos].copy(), self.n_total
+            return np.concatenate([self._data[:, start:], self._data[:, :self._pos]], axis=1), self.n_total
+
+
+###############################################################################
+# CSV text decoding
+###############################################################################
+class CsvChunkDecoder:
+    """
+    Turns arbitrary byte chunks of CSV text into (n x len(usecols)) float
+    blocks. A trailing partial line is held back until its newline arrives.
+    All complete lines of a chunk are parsed by one np.loadtxt call on the
+    raw bytes; only a chunk with an unparsable line is parsed line by line,
+    dropping that line.
+    """
+    def __init__(self, usecols, dtype=np.float64):
+        self.usecols = list(usecols)
+        self.dtype = dtype
+        self._tail = b""
+
+    def feed(self, data):
+        data = self._tail + data
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self._tail = data
+            return np.zeros((0, len(self.usecols)), dtype=self.dtype)
+        self._tail = data[cut + 1:]
+        body = data[:cut + 1]
+        try:
+            return self._parse(body)
+        except ValueError:
+            rows = []
+            for line in filter(bytes.strip, body.splitlines()):
+                try:
+                    rows.append(self._parse(line))
+                except ValueError:
+                    pass
+            if not rows:
+                return np.zeros((0, len(self.usecols)), dtype=self.dtype)
+            return np.concatenate(rows)
+
+    def _parse(self, text):
+        return np.loadtxt(io.BytesIO(text), delimiter=",", usecols=self.usecols, dtype=self.dtype, ndmin=2,
+                          encoding="utf-8")
+
+
+###############################################################################
+# Sample sources
+###############################################################################
+class LineSource:
+    """
+    A byte stream of CSV text: one header line with the column names, then one
+    line of samples per time step. Subclasses provide _connect and _recv.
+    """
+    description = "live source"
+
+    def __init__(self):
+        self._pending = b""
+
+    def _connect(self, stop):
+        """Block until the stream is available or stop is set."""
+        raise NotImplementedError
+
+    def _recv(self, timeout):
+        """Up to READ_CHUNK new bytes; b'' if nothing arrived within timeout."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def open(self, stop):
+        """Connect and return the header's column names (None if stopped first)."""
+        if not self._connect(stop):
+            return None
+        data = b""
+        while b"\n" not in data:
+            if stop.is_set():
+                return None
+            data += self._recv(0.1)
+        header, self._pending = data.split(b"\n", 1)
+        return [c.strip().strip('"') for c in header.decode("utf-8", errors="replace").split(",")]
+
+    def read(self, timeout=0.1):
+        if self._pending:
+            data, self._pending = self._pending, b""
+            return data
+        return self._recv(timeout)
+
+
+class FileTailSource(LineSource):
+    """A CSV file that is still being written; new lines are picked up as they appear."""
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.description = f"tail {path}"
+        self._file = None
+
+    def _connect(self, stop):
+        while not os.path.exists(self.path):
+            if stop.wait(0.2):
+                return False
+        self._file = open(self.path, "rb")
+        return True
+
+    def _recv(self, timeout):
+        data = self._file.read(READ_CHUNK)
+        if not data:
+            time.sleep(timeout)
+        return data
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SocketSource(LineSource):
+    """
+    Listens on a local TCP port; a simulator or acquisition process connects
+    and streams CSV text (header line first).
+    """
+    def __init__(self, port=LIVE_DEFAULT_PORT, host="127.0.0.1"):
+        super().__init__()
+        self.address = (host, port)
+        self.description = f"socket {host}:{port}"
+        self._server = None
+        self._conn = None
+
+    def _connect(self, stop):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(self.address)
+        self._server.listen(1)
+        self._server.settimeout(0.2)
+        while not stop.is_set():
+            try:
+                self._conn, _ = self._server.accept()
+                return True
+            except socket.timeout:
+                continue
+        return False
+
+    def _recv(self, timeout):
+        self._conn.settimeout(timeout)
+        try:
+            data = self._conn.recv(READ_CHUNK)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise ConnectionError("Live source disconnected.")
+        return data
+
+    def close(self):
+        for s in (self._conn, self._server):
+            if s is not None:
+                s.close()
+        self._conn = self._server = None
+
+
+###############################################################################
+# Reader thread
+###############################################################################
+class LiveReader(QThread):
+    """
+    Pulls samples from a LineSource into a RingBuffer off the GUI thread.
+    select(header) picks the analyzed columns (the ring-buffer rows) once the
+    header is known. The GUI reads the buffer on its own refresh timer.
+    """
+    connected = pyqtSignal(list)    # analyzed columns, in ring-buffer row order
+    failed = pyqtSignal(str)
+
+    def __init__(self, source, select, capacity=LIVE_WINDOW, dtype=np.float64, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self._select = select
+        self._capacity = capacity
+        self._dtype = dtype
+        self._stop = threading.Event()
+        self.columns = []
+        self.buffer = None
+        self.started_at = None
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        try:
+            header = self.source.open(self._stop)
+            if header is None:
+                return
+            columns = self._select(header)
+            position = {name: i for i, name in enumerate(header)}
+            decoder = CsvChunkDecoder([position[c] for c in columns], self._dtype)
+            self.buffer = RingBuffer(len(columns), self._capacity, self._dtype)
+            self.columns = columns
+            self.started_at = time.monotonic()
+            self.connected.emit(list(columns))
+            while not self._stop.is_set():
+                data = self.source.read(0.05)
+                if data:
+                    self.buffer.extend(decoder.feed(data))
+        except Exception as ex:
+            if not self._stop.is_set():
+                self.failed.emit(str(ex))
+        finally:
+            self.source.close()
+
+    def sampleRate(self):
+        """Average samples per second per device since the header arrived."""
+        if self.buffer is None or self.started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.buffer.n_total / elapsed if elapsed > 0 else 0.0
@@ -1,12 +1,38 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from response_analyzer_app import ResponseAnalyzerApp
+
+from startup import StartupProfiler, preload_modules
+
+PROFILE_FLAG = "--profile-startup"
+
 
 def main():
-    app = QApplication(sys.argv)
-    win = ResponseAnalyzerApp()
-    win.show()
-    sys.exit(app.exec_())
+    profile = PROFILE_FLAG in sys.argv
+    argv = [a for a in sys.argv if a != PROFILE_FLAG]
+    profiler = StartupProfiler()
+
+    with profiler.phase("import PyQt5"):
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QApplication
+    with profiler.phase("create QApplication"):
+        app = QApplication(argv)
+    with profiler.phase("import response_analyzer_app"):
+        from response_analyzer_app import ResponseAnalyzerApp
+    with profiler.phase("build main window"):
+        win = ResponseAnalyzerApp(profiler=profiler if profile else None)
+    with profiler.phase("show main window"):
+        win.show()
+
+    def onEventLoopStarted():
+        profiler.mark("window visible (event loop running)")
+        # pandas/matplotlib load in the background while the user looks around
+        done = (lambda: profiler.report("Startup profile")) if profile else None
+        preload_modules(profiler=profiler if profile else None, on_done=done)
+
+    QTimer.singleShot(0, onEventLoopStarted)
+    code = app.exec_()
+    if profile:
+        profiler.report("Session profile (including figures created on first tab open)")
+    sys.exit(code)
 
 if __name__ == "__main__":
     main()
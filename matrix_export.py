@@ -0,0 +1,107 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+from orm_pipeline import CORRECTOR_PARAM_COLUMNS
+
+###############################################################################
+# Optional binary back-ends
+###############################################################################
+try:
+    import h5py
+except ImportError:  # HDF5 export is simply not offered
+    h5py = None
+
+HAS_PARQUET = any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+HAS_HDF5 = h5py is not None
+
+CSV_FILTER = "CSV Files (*.csv)"
+NPZ_FILTER = "NumPy Archive (*.npz)"
+PARQUET_FILTER = "Parquet Files (*.parquet)"
+HDF5_FILTER = "HDF5 Files (*.h5 *.hdf5)"
+
+
+def export_filters():
+    """QFileDialog filter string with every format usable in this environment."""
+    filters = [CSV_FILTER, NPZ_FILTER]
+    if HAS_PARQUET:
+        filters.append(PARQUET_FILTER)
+    if HAS_HDF5:
+        filters.append(HDF5_FILTER)
+    return ";;".join(filters)
+
+
+def extension_for_filter(selected_filter):
+    """Default extension of a filter picked in the save dialog."""
+    return {
+        CSV_FILTER: ".csv", NPZ_FILTER: ".npz", PARQUET_FILTER: ".parquet", HDF5_FILTER: ".h5",
+    }.get(selected_filter, ".csv")
+
+
+###############################################################################
+# Writers
+###############################################################################
+def _labelled_frame(values, row_labels, col_labels, index_name=""):
+    df = pd.DataFrame(np.asarray(values), index=list(row_labels), columns=list(col_labels))
+    df.index.name = index_name
+    return df
+
+
+def export_table(path, values, row_labels, col_labels, index_name=""):
+    """
+    Write a labelled 2-D array at full precision. The format follows the
+    extension: .csv, .npz, .parquet or .h5/.hdf5.
+    """
+    values = np.asarray(values)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npz":
+        np.savez_compressed(
+            path, values=values,
+            row_labels=np.array(list(row_labels), dtype=str),
+            col_labels=np.array(list(col_labels), dtype=str),
+        )
+    elif ext == ".parquet":
+        if not HAS_PARQUET:
+            raise RuntimeError("Parquet export needs pyarrow or fastparquet.")
+        df = _labelled_frame(values, row_labels, col_labels, index_name or "row")
+        df.to_parquet(path)
+    elif ext in (".h5", ".hdf5"):
+        if not HAS_HDF5:
+            raise RuntimeError("HDF5 export needs h5py.")
+        with h5py.File(path, "w") as f:
+            f.create_dataset("values", data=values)
+            f.create_dataset("row_labels", data=np.array(list(row_labels), dtype=object),
+                             dtype=h5py.string_dtype())
+            f.create_dataset("col_labels", data=np.array(list(col_labels), dtype=object),
+                             dtype=h5py.string_dtype())
+    else:
+        # %.17g round-trips every float64 exactly
+        _labelled_frame(values, row_labels, col_labels, index_name).to_csv(path, float_format="%.17g")
+
+
+def result_arrays(result):
+    """Every array of an AnalysisResult, with device labels, as a flat dict."""
+    correctors = list(result.correctors)
+    bpm_h = list(result.bpm_h)
+    bpm_v = list(result.bpm_v)
+    return {
+        "R_measured_H": result.R_measured_H,
+        "R_measured_V": result.R_measured_V,
+        "ERR_measured_H": result.ERR_measured_H,
+        "ERR_measured_V": result.ERR_measured_V,
+        "corrector_params": result.corrector_params,
+        "corrector_param_columns": np.array(CORRECTOR_PARAM_COLUMNS, dtype=str),
+        "corrector_errors": np.array([result.corrector_errors.get(c, 0.0) for c in correctors]),
+        "bpm_errors_H": np.array([result.bpm_errors.get(b, 0.0) for b in bpm_h]),
+        "bpm_errors_V": np.array([result.bpm_errors.get(b, 0.0) for b in bpm_v]),
+        "correctors": np.array(correctors, dtype=str),
+        "bpm_h": np.array(bpm_h, dtype=str),
+        "bpm_v": np.array(bpm_v, dtype=str),
+    }
+
+
+def export_result_bundle(path, result):
+    """All matrices, noise vectors and labels of an analysis in one .npz file."""
+    np.savez_compressed(path, **result_arrays(result))
@@ -0,0 +1,153 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import recorded
+from signal_store import SignalStore
+
+###############################################################################
+# Column naming / classification
+###############################################################################
+def channel_column(device_name):
+    """CSV column holding the readback of a device."""
+    return f"{device_name}(R)"
+
+
+def bpm_plane(device_name):
+    """'H' or 'V' for a BPM device name (unknown names count as horizontal)."""
+    name = device_name.upper()
+    if "BPH" in name:
+        return "H"
+    if "BPV" in name:
+        return "V"
+    return "H"
+
+
+def csv_engine():
+    """Fastest pandas CSV parser available here."""
+    return "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+###############################################################################
+# Measurement
+###############################################################################
+class Measurement:
+    """A loaded acquisition restricted to the analyzed devices."""
+    def __init__(self, signals, correctors, bpm_h, bpm_v, excluded_bpm, has_nan, digest=None):
+        self.signals = signals          # SignalStore
+        self.correctors = correctors
+        self.bpm_h = bpm_h
+        self.bpm_v = bpm_v
+        self.excluded_bpm = excluded_bpm
+        self.has_nan = has_nan
+        self.digest = digest            # content hash of the file (when a cache computed it)
+
+
+def read_device_list(path):
+    """Device names of a list file: one per line, blank lines ignored."""
+    with open(path, "r") as f:
+        return [ln.strip() for ln in f if ln.strip()]
+
+
+def read_orbit_history(path, bpm_columns):
+    """
+    Recorded orbits as an (n_orbits x n_bpm) array in the order of bpm_columns
+    ('Name(R)' columns). A .npy file holds that array (or one orbit) already in
+    this order; a CSV is read like a measurement, one orbit per row, with the
+    columns named either 'Name(R)' or 'Name'.
+    """
+    if path.lower().endswith(".npy"):
+        orbits = np.atleast_2d(np.load(path)).astype(float, copy=False)
+        if orbits.shape[1] != len(bpm_columns):
+            raise ValueError(f"Expected {len(bpm_columns)} BPM values per orbit, found {orbits.shape[1]}.")
+        return orbits
+    header = set(read_header(path))
+    usecols = []
+    for col in bpm_columns:
+        device = col[:-len("(R)")] if col.endswith("(R)") else col
+        if col in header:
+            usecols.append(col)
+        elif device in header:
+            usecols.append(device)
+        else:
+            raise ValueError(f"BPM {device} has no column in {path}.")
+    df = pd.read_csv(path, usecols=usecols, dtype={col: np.float64 for col in usecols}, engine=csv_engine())
+    return np.ascontiguousarray(df[usecols].to_numpy())
+
+
+def read_header(path):
+    """Column names of a CSV file without parsing its data."""
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def match_columns(columns, corrector_names, bpm_names):
+    """
+    (corrector columns, BPM columns) of the device lists present in the file,
+    in device-list order.
+    """
+    present = set(columns)
+    corr_cols = [channel_column(c) for c in corrector_names if channel_column(c) in present]
+    bpm_cols = [(b, channel_column(b)) for b in bpm_names if channel_column(b) in present]
+    return corr_cols, bpm_cols
+
+
+def classify_channels(columns, block, corr_cols, bpm_cols):
+    """
+    Split BPM columns into planes, dropping all-zero ones, and flag NaNs.
+    block is channel-major (n_columns x N) with rows named by columns; both
+    checks are a single vectorized pass over the analyzed rows.
+    """
+    row_of = {col: i for i, col in enumerate(columns)}
+    cols = list(dict.fromkeys(corr_cols + [col for _, col in bpm_cols]))
+    analyzed = block[[row_of[col] for col in cols]]
+    has_nan = bool(np.isnan(analyzed).any())
+    any_nonzero = dict(zip(cols, (analyzed != 0).any(axis=1)))
+
+    bpm_h, bpm_v, excluded = [], [], []
+    for dev, col in bpm_cols:
+        if not any_nonzero[col]:
+            excluded.append(col)
+        elif bpm_plane(dev) == "V":
+            bpm_v.append(col)
+        else:
+            bpm_h.append(col)
+    return bpm_h, bpm_v, excluded, has_nan
+
+
+def load_measurement(path, corrector_names, bpm_names, dtype=np.float64, engine=None, cache=None,
+                     recorder=None):
+    """
+    Read only the (R) columns of the listed devices, typed up front,
+    with the fastest parser available, into a SignalStore of dtype.
+    Returns a Measurement.
+
+    With a MeasurementCache the parsed columns are cached at dtype and later
+    opens of the same content map them instead of parsing text; the file's
+    content hash is then kept on the Measurement. A RunRecorder, if given,
+    receives the time, memory and shapes of each step.
+    """
+    engine = engine or csv_engine()
+    corr_cols, bpm_cols = match_columns(read_header(path), corrector_names, bpm_names)
+    usecols = list(dict.fromkeys(corr_cols + [col for _, col in bpm_cols]))
+    if not usecols:
+        raise ValueError("None of the loaded corrector/BPM devices has an (R) column in this file.")
+
+    if cache is not None:
+        with recorded(recorder, "Cache lookup / parse columns", columns=len(usecols), engine=engine) as shapes:
+            columns, block, digest = cache.load(path, usecols, dtype, engine)
+            shapes.update(block=block.shape)
+    else:
+        digest = None
+        with recorded(recorder, "Parse columns", columns=len(usecols), engine=engine) as shapes:
+            df = pd.read_csv(path, usecols=usecols, dtype={col: dtype for col in usecols}, engine=engine)
+            # channel-major view of the parsed frame; the store copies what it keeps
+            columns, block = usecols, df[usecols].to_numpy().T
+            shapes.update(block=block.shape)
+    with recorded(recorder, "Classify channels", block=(len(usecols), block.shape[1])):
+        bpm_h, bpm_v, excluded, has_nan = classify_channels(columns, block, corr_cols, bpm_cols)
+    with recorded(recorder, "Build signal store", dtype=np.dtype(dtype).name) as shapes:
+        signals = SignalStore.from_rows(columns, block, corr_cols, bpm_h, bpm_v, dtype)
+        shapes.update(correctors=(len(corr_cols), len(signals)), bpm_h=(len(bpm_h), len(signals)),
+                      bpm_v=(len(bpm_v), len(signals)))
+    return Measurement(signals, corr_cols, bpm_h, bpm_v, excluded, has_nan, digest)
@@ -1,4 +1,5 @@
 import matplotlib
+import numpy as np
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
 
@@ -10,3 +11,59 @@ class MplCanvas(FigureCanvasQTAgg):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = self.fig.add_subplot(111)
         super().__init__(self.fig)
+
+
+class HeatmapCanvas(MplCanvas):
+    """
+    An MplCanvas showing one matrix. The image and its colorbar are created once;
+    later matrices only update data, color limits and tick labels in place, so
+    figure size and redraw time stay constant across reloads.
+    """
+    def __init__(self, parent=None, width=5, height=4, dpi=100, cmap='jet'):
+        super().__init__(parent, width=width, height=height, dpi=dpi)
+        self.cmap = cmap
+        self.image = None
+        self.colorbar = None
+        self._labels = None
+
+    def set_matrix(self, values, row_labels, col_labels, title=""):
+        """Show a new matrix (call draw_idle() afterwards)."""
+        values = np.asarray(values, dtype=float)
+        n_rows, n_cols = values.shape if values.ndim == 2 else (0, 0)
+
+        if values.size == 0:
+            if self.image is not None:
+                self.image.set_visible(False)
+                self.colorbar.ax.set_visible(False)
+            self.axes.set_xticks([])
+            self.axes.set_yticks([])
+            self.axes.set_title("")
+            self._labels = None
+            return
+
+        if self.image is None:
+            self.image = self.axes.imshow(values, aspect='auto', cmap=self.cmap)
+            self.colorbar = self.fig.colorbar(self.image, ax=self.axes, orientation='vertical')
+        else:
+            self.image.set_data(values)
+            self.image.set_extent((-0.5, n_cols - 0.5, n_rows - 0.5, -0.5))
+            self.image.set_visible(True)
+            self.colorbar.ax.set_visible(True)
+        self.axes.set_xlim(-0.5, n_cols - 0.5)
+        self.axes.set_ylim(n_rows - 0.5, -0.5)
+
+        finite = values[np.isfinite(values)]
+        if finite.size:
+            self.image.set_clim(finite.min(), finite.max())
+        else:
+            self.image.set_clim(0.0, 1.0)
+
+        labels = (list(row_labels), list(col_labels))
+        if labels != self._labels:
+            self.axes.set_xticks(range(n_cols))
+            self.axes.set_yticks(range(n_rows))
+            self.axes.set_xticklabels(labels[1], rotation=90)
+            self.axes.set_yticklabels(labels[0])
+            self._labels = labels
+            self.fig.tight_layout()
+        self.axes.set_title(title)
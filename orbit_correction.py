@@ -0,0 +1,238 @@
+import hashlib
+
+import numpy as np
+
+###############################################################################
+# Truncated and randomized SVD
+###############################################################################
+# Schedule of (oversampling, power iterations) a randomized SVD tries before
+# falling back to the full SVD; each attempt must pass the residual check.
+# Attempts that would take the total work past that of the exact SVD are skipped.
+RANDOMIZED_SCHEDULE = ((10, 2), (20, 4), (40, 8), (80, 16))
+# Work of the exact SVD of an (m x n) matrix, in (m x n x min(m, n)) matrix-product units
+EXACT_SVD_COST = 4.0
+# randomized=None picks the randomized SVD for matrices at least this large in
+# both dimensions whose first attempt costs at most this fraction of the exact SVD
+RANDOMIZED_MIN_SIZE = 200
+RANDOMIZED_MAX_COST = 0.25
+# Largest relative residual |A v_i - s_i u_i| / s_i accepted for a kept triplet.
+RANDOMIZED_TOLERANCE = 1e-10
+# Singular values below this fraction of the largest are not inverted, so
+# the residual check ignores them.
+RCOND = 1e-12
+
+
+def randomized_svd(A, rank, oversample=10, n_iter=2, seed=0):
+    """
+    Leading `rank` singular triplets of A (Halko, Martinsson & Tropp): project
+    onto a random (rank + oversample)-dimensional range estimate, sharpened by
+    n_iter power iterations, and take the exact SVD of the small projection.
+    Costs O(m*n*k) instead of O(m*n*min(m, n)).
+    """
+    m, n = A.shape
+    k = min(rank + oversample, m, n)
+    rng = np.random.default_rng(seed)
+    Q, _ = np.linalg.qr(A @ rng.standard_normal((n, k)))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(A.T @ Q)
+        Q, _ = np.linalg.qr(A @ Q)
+    Ub, s, Vt = np.linalg.svd(Q.T @ A, full_matrices=False)
+    return (Q @ Ub)[:, :rank], s[:rank], Vt[:rank]
+
+
+def randomized_cost(shape, rank, oversample, n_iter):
+    """
+    Work of one checked randomized attempt as a fraction of the exact SVD:
+    2 * n_iter + 3 products of A (or A.T) with an (n x k) block, against
+    EXACT_SVD_COST products of full size.
+    """
+    m, n = shape
+    k = min(rank + oversample, m, n)
+    return (2 * n_iter + 3) * k / (EXACT_SVD_COST * min(m, n))
+
+
+def prefer_randomized(shape, rank):
+    """Whether randomized=None uses a randomized SVD for these leading `rank` values."""
+    if rank is None or rank <= 0 or min(shape) < RANDOMIZED_MIN_SIZE or rank >= min(shape):
+        return False
+    return randomized_cost(shape, rank, *RANDOMIZED_SCHEDULE[0]) <= RANDOMIZED_MAX_COST
+
+
+def svd_residual(A, U, s, Vt, rcond=RCOND):
+    """
+    Largest relative residual |A v_i - s_i u_i| / s_i over the triplets with
+    s_i > rcond * s_max (0 when there are none).
+    """
+    if s.size == 0 or s[0] == 0:
+        return 0.0
+    checked = s > rcond * s[0]
+    residual = np.linalg.norm(A @ Vt[checked].T - U[:, checked] * s[checked], axis=0)
+    return float(np.max(residual / s[checked], initial=0.0))
+
+
+def truncated_svd(A, rank=None, randomized=None, tolerance=RANDOMIZED_TOLERANCE):
+    """
+    (U, s, Vt, method) of the leading `rank` singular values of A (all when
+    rank is None or <= 0). randomized=None uses a randomized SVD when it is
+    clearly cheaper (see prefer_randomized), True always tries one, False
+    never does. A randomized SVD tries RANDOMIZED_SCHEDULE, within the work of
+    one exact SVD, until every kept triplet passes the residual check, and
+    falls back to the exact SVD otherwise (e.g. when the spectrum decays too
+    slowly for the power iterations).
+    """
+    full = min(A.shape)
+    rank = full if rank is None or rank <= 0 else min(int(rank), full)
+    if randomized is None:
+        randomized = prefer_randomized(A.shape, rank)
+    if randomized and rank < full:
+        spent = 0.0
+        for oversample, n_iter in RANDOMIZED_SCHEDULE:
+            spent += randomized_cost(A.shape, rank, oversample, n_iter)
+            if spent > 1.0:
+                break  # the exact SVD is now the cheaper way to finish
+            U, s, Vt = randomized_svd(A, rank, oversample, n_iter)
+            if svd_residual(A, U, s, Vt) <= tolerance:
+                return U, s, Vt, "randomized"
+            if rank + oversample >= full:
+                break
+    U, s, Vt = np.linalg.svd(A, full_matrices=False)
+    return U[:, :rank], s[:rank], Vt[:rank], "full"
+
+
+def inverse_singular_values(s, rank=None, tikhonov=0.0, rcond=RCOND):
+    """
+    Filter factors of the regularized pseudo-inverse: 1/s_i for the first
+    `rank` values (or Tikhonov s_i / (s_i^2 + alpha^2) when tikhonov = alpha
+    > 0), zero for the rest and for values below rcond * s_max.
+    """
+    s = np.asarray(s, dtype=float)
+    out = np.zeros_like(s)
+    if s.size == 0:
+        return out
+    keep = s > rcond * s[0]
+    if rank is not None and rank > 0:
+        keep[int(rank):] = False
+    if tikhonov > 0:
+        out[keep] = s[keep] / (s[keep]**2 + tikhonov**2)
+    else:
+        out[keep] = 1.0 / s[keep]
+    return out
+
+
+###############################################################################
+# Cached solver for one plane
+###############################################################################
+def matrix_fingerprint(R):
+    """Hash of a matrix's shape and values, to tell whether it changed."""
+    R = np.ascontiguousarray(R, dtype=float)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(R.shape).encode())
+    h.update(R.tobytes())
+    return h.hexdigest()
+
+
+class OrbitCorrector:
+    """
+    Least-squares orbit correction of one plane from its response matrix R
+    (n_bpm x n_corr): kicks = -R+ x, so that x + R @ kicks is minimal.
+
+    The SVD of R is computed once per matrix (recomputed only when R changes,
+    or when more singular values are asked for than a randomized SVD kept).
+    With a rank set on a large matrix a checked randomized SVD of the kept
+    singular values is tried first (randomized=None, see prefer_randomized);
+    randomized=True/False forces or forbids it (see truncated_svd).
+    Changing the rank or the Tikhonov parameter only rebuilds R+ from the
+    cached factors. R+ is held as a C-contiguous (n_corr x n_bpm) array, so a
+    single orbit costs one matrix-vector product and a history of orbits one
+    matrix product.
+    """
+    def __init__(self, rank=None, tikhonov=0.0, randomized=None):
+        self.rank = rank
+        self.tikhonov = float(tikhonov)
+        self.randomized = randomized
+        self._R = None
+        self._fingerprint = None
+        self._svd = None            # (U, s, Vt, method)
+        self._pinv = None
+
+    def set_matrix(self, R):
+        """Use a (new) response matrix; returns True if it had to be factorized again."""
+        fingerprint = matrix_fingerprint(R)
+        if fingerprint == self._fingerprint:
+            return False
+        self._R = np.array(R, dtype=float)
+        self._fingerprint = fingerprint
+        self._svd = None
+        self._pinv = None
+        self._factorize()
+        return True
+
+    def set_regularization(self, rank=None, tikhonov=0.0):
+        """Singular values kept (None/0 = all) and Tikhonov alpha (0 = plain truncation)."""
+        if (rank, float(tikhonov)) == (self.rank, self.tikhonov):
+            return
+        grow = self._svd is not None and self._svd[3] == "randomized" and (
+            not rank or rank > self._svd[1].size)
+        self.rank, self.tikhonov = rank, float(tikhonov)
+        self._pinv = None
+        if grow:
+            self._svd = None
+            self._factorize()
+
+    def has_matrix(self):
+        return self._R is not None
+
+    def _factorize(self):
+        if self._svd is None and self._R is not None:
+            randomized = self.randomized
+            if randomized is None:
+                randomized = prefer_randomized(self._R.shape, self.rank)
+            # an exact SVD is kept whole, so any later rank reuses it
+            self._svd = truncated_svd(self._R, self.rank if randomized else None, randomized)
+
+    def singular_values(self):
+        """Singular values of the cached factorization (all, or the leading ones if randomized)."""
+        self._factorize()
+        return np.zeros(0) if self._svd is None else self._svd[1].copy()
+
+    def method(self):
+        return None if self._svd is None else self._svd[3]
+
+    def pseudo_inverse(self):
+        """Regularized R+ (n_corr x n_bpm), built from the cached factors on first use."""
+        if self._pinv is None:
+            if self._R is None:
+                raise ValueError("No response matrix set.")
+            self._factorize()
+            U, s, Vt, _ = self._svd
+            inv_s = inverse_singular_values(s, self.rank, self.tikhonov)
+            kept = inv_s != 0
+            self._pinv = np.ascontiguousarray((Vt[kept].T * inv_s[kept]) @ U[:, kept].T)
+        return self._pinv
+
+    def kept_rank(self):
+        """Number of singular values the pseudo-inverse uses."""
+        self._factorize()
+        if self._svd is None:
+            return 0
+        return int(np.count_nonzero(inverse_singular_values(self._svd[1], self.rank, self.tikhonov)))
+
+    def kicks(self, orbits):
+        """
+        Corrector kicks for an orbit (n_bpm,) -> (n_corr,), or for a history of
+        orbits (n_orbits x n_bpm) -> (n_orbits x n_corr) in one matrix product.
+        """
+        pinv = self.pseudo_inverse()
+        orbits = np.asarray(orbits, dtype=float)
+        if orbits.ndim == 1:
+            return -(pinv @ orbits)
+        return -(orbits @ pinv.T)
+
+    def corrected(self, orbits, kicks=None):
+        """Orbits predicted after applying the kicks: x + R @ kicks (same shapes as kicks())."""
+        orbits = np.asarray(orbits, dtype=float)
+        if kicks is None:
+            kicks = self.kicks(orbits)
+        if orbits.ndim == 1:
+            return orbits + self._R @ kicks
+        return orbits + kicks @ self._R.T
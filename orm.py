@@ -0,0 +1,210 @@
+"""
+Headless ORM analysis.
+
+    python -m orm batch --correctors c.txt --bpms b.txt runs/*.csv -j 8
+
+Each CSV is matched against the device lists exactly like File → Open CSV,
+analyzed with the same pipeline as the GUI and written as one result bundle
+(.npz, see matrix_export.export_result_bundle) per file.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from orm_pipeline import (
+    ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP, DEFAULT_NOISE_MASK, NoiseMask, run_analysis
+)
+from measurement_io import load_measurement, read_device_list
+from matrix_export import export_result_bundle
+
+BUNDLE_SUFFIX = "_orm.npz"
+
+
+###############################################################################
+# One file
+###############################################################################
+def bundle_path(csv_path, out_dir=None):
+    """Where the result bundle of a CSV goes: next to it, or in out_dir."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(out_dir or os.path.dirname(os.path.abspath(csv_path)), stem + BUNDLE_SUFFIX)
+
+
+def _collisions(paths):
+    seen = {}
+    for path in paths:
+        key = os.path.normcase(os.path.abspath(path))
+        seen[key] = seen.get(key, 0) + 1
+    return {key for key, count in seen.items() if count > 1}
+
+
+def bundle_paths(csv_paths, out_dir=None):
+    """
+    bundle_path() of every CSV, made unique so no bundle overwrites another.
+    When two inputs would share a bundle in out_dir (e.g. d1/run.csv and
+    d2/run.csv), every bundle mirrors the directory of its CSV below the
+    inputs' common parent (out_dir/d1/run_orm.npz, out_dir/d2/run_orm.npz).
+    Bundles that still collide (run.csv and run.txt in one directory) get a
+    short hash of their CSV path appended to the name.
+    """
+    paths = [bundle_path(p, out_dir) for p in csv_paths]
+    if out_dir and _collisions(paths):
+        dirs = [os.path.dirname(os.path.abspath(p)) for p in csv_paths]
+        try:
+            root = os.path.commonpath(dirs)
+            paths = [bundle_path(p, os.path.join(out_dir, os.path.relpath(d, root)))
+                     for p, d in zip(csv_paths, dirs)]
+        except ValueError:  # inputs on different drives
+            pass
+    clashing = _collisions(paths)
+    for i, path in enumerate(paths):
+        if os.path.normcase(os.path.abspath(path)) in clashing:
+            tag = hashlib.blake2b(os.path.abspath(csv_paths[i]).encode(), digest_size=4).hexdigest()
+            paths[i] = path[:-len(BUNDLE_SUFFIX)] + "_" + tag + BUNDLE_SUFFIX
+    return [os.path.normpath(p) for p in paths]
+
+
+def process_file(csv_path, corrector_names, bpm_names, engine_mode=ORM_ENGINE_FFT,
+                 out_dir=None, dtype=np.float64, use_cache=False, noise_mask=DEFAULT_NOISE_MASK, threads=1,
+                 bundle=None):
+    """
+    Load, analyze and export one CSV to `bundle` (default bundle_path()).
+    Returns a summary dict; errors are reported in it rather than raised, so
+    one bad file does not stop a batch.
+    """
+    t0 = time.perf_counter()
+    summary = {"csv": csv_path, "bundle": None, "error": None, "warning": None}
+    try:
+        cache = None
+        if use_cache:
+            from measurement_cache import MeasurementCache
+            cache = MeasurementCache()
+        meas = load_measurement(csv_path, corrector_names, bpm_names, dtype, cache=cache)
+        if meas.has_nan:
+            summary["warning"] = "CSV contains missing data (NaN)."
+        result = run_analysis(meas.signals, meas.correctors, meas.bpm_h, meas.bpm_v, engine_mode,
+                              noise_mask=noise_mask, workers=threads)
+        path = bundle or bundle_path(csv_path, out_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        export_result_bundle(path, result)
+        summary.update(
+            bundle=path, n_correctors=len(meas.correctors), n_bpm_h=len(meas.bpm_h),
+            n_bpm_v=len(meas.bpm_v), n_excluded=len(meas.excluded_bpm), n_samples=len(meas.signals),
+        )
+    except Exception as ex:
+        summary["error"] = f"{type(ex).__name__}: {ex}"
+    summary["seconds"] = time.perf_counter() - t0
+    return summary
+
+
+###############################################################################
+# Batch
+###############################################################################
+def expand_inputs(patterns):
+    """
+    Input paths in the given order; glob patterns are expanded (for shells
+    that do not) and a file named twice (e.g. a.csv and ./a.csv) is kept once.
+    """
+    paths = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            paths.setdefault(os.path.normcase(os.path.abspath(path)), path)
+    return list(paths.values())
+
+
+def run_batch(csv_paths, corrector_names, bpm_names, jobs=1, report=None, **options):
+    """
+    Process every CSV, fanning out over `jobs` worker processes (in-process
+    when jobs == 1). Each gets its own bundle (see bundle_paths).
+    report(summary) is called as each file finishes. Returns the summaries
+    in input order.
+    """
+    summaries = {}
+    bundles = bundle_paths(csv_paths, options.get("out_dir"))
+    if jobs <= 1 or len(csv_paths) <= 1:
+        for path, bundle in zip(csv_paths, bundles):
+            summaries[path] = process_file(path, corrector_names, bpm_names, bundle=bundle, **options)
+            if report is not None:
+                report(summaries[path])
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(process_file, path, corrector_names, bpm_names, bundle=bundle, **options)
+                       for path, bundle in zip(csv_paths, bundles)]
+            for future in as_completed(futures):
+                summary = future.result()
+                summaries[summary["csv"]] = summary
+                if report is not None:
+                    report(summary)
+    return [summaries[path] for path in csv_paths]
+
+
+def _print_summary(summary):
+    if summary["error"]:
+        print(f"FAILED {summary['csv']}: {summary['error']}", file=sys.stderr, flush=True)
+        return
+    if summary["warning"]:
+        print(f"warning {summary['csv']}: {summary['warning']}", file=sys.stderr, flush=True)
+    print(f"ok {summary['csv']} -> {summary['bundle']} "
+          f"({summary['n_correctors']} correctors, {summary['n_bpm_h']}+{summary['n_bpm_v']} BPMs, "
+          f"{summary['n_samples']} samples, {summary['seconds']:.2f} s)", flush=True)
+
+
+###############################################################################
+# Command line
+###############################################################################
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m orm", description="Headless ORM analysis.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="Analyze CSV files and write one result bundle per file.")
+    batch.add_argument("csv", nargs="+", help="CSV files or glob patterns")
+    batch.add_argument("--correctors", required=True, help="corrector device list (one name per line)")
+    batch.add_argument("--bpms", required=True, help="BPM device list (one name per line)")
+    batch.add_argument("-j", "--jobs", type=int, default=1, help="worker processes (default 1)")
+    batch.add_argument("--engine", choices=[ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP],
+                       default=ORM_ENGINE_FFT, help="ORM engine (default fft)")
+    batch.add_argument("--guard-bins", type=int, default=DEFAULT_NOISE_MASK.guard_bins,
+                       help="bins masked on each side of a corrector tone for the noise RMS (default 0)")
+    batch.add_argument("--harmonics", type=int, default=DEFAULT_NOISE_MASK.harmonics,
+                       help="tone harmonics masked for the noise RMS, 1 = fundamental only (default 1)")
+    batch.add_argument("-t", "--threads", type=int, default=1,
+                       help="threads per file for spectra, planes and corrector blocks (default 1; "
+                            "results are identical for any count)")
+    batch.add_argument("-o", "--out-dir", help="directory for the bundles (default: next to each CSV)")
+    batch.add_argument("--float32", action="store_true", help="load samples as float32")
+    batch.add_argument("--cache", action="store_true", help="use the measurement cache")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    csv_paths = expand_inputs(args.csv)
+    if not csv_paths:
+        print("No input files.", file=sys.stderr)
+        return 2
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    summaries = run_batch(
+        csv_paths, read_device_list(args.correctors), read_device_list(args.bpms),
+        jobs=max(1, args.jobs), report=_print_summary,
+        engine_mode=args.engine, out_dir=args.out_dir,
+        dtype=np.float32 if args.float32 else np.float64, use_cache=args.cache,
+        noise_mask=NoiseMask(max(0, args.guard_bins), max(1, args.harmonics)),
+        threads=max(1, args.threads),
+    )
+    failed = sum(1 for s in summaries if s["error"])
+    print(f"{len(summaries) - failed}/{len(summaries)} files analyzed in "
+          f"{time.perf_counter() - t0:.1f} s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
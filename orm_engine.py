@@ -0,0 +1,287 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+###############################################################################
+# Thread-pool execution
+###############################################################################
+# numpy releases the GIL inside FFTs, ufunc loops and BLAS calls, so
+# independent pieces of work (planes, batches of channels, blocks of
+# corrector columns) run in parallel on plain threads. Work is only split
+# where the split cannot change a single bit of the result: the blocks are
+# the same whatever the number of workers, and matrix products (whose
+# rounding depends on their shape) are never split.
+# Corrector tones per block of the lock-in basis
+COLUMN_BLOCK = 8
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def default_workers():
+    """Worker threads used by the GUI unless configured: one per core, at most 16."""
+    return max(1, min(os.cpu_count() or 1, 16))
+
+
+def thread_pool(workers, kind="blocks"):
+    """
+    Shared pool of `workers` threads. Stage tasks wait on block tasks, so
+    each kind has its own pool and a full pool can never wait on itself.
+    """
+    with _pools_lock:
+        pool = _pools.get((kind, workers))
+        if pool is None:
+            pool = _pools[(kind, workers)] = ThreadPoolExecutor(workers, thread_name_prefix=f"orm-{kind}")
+    return pool
+
+
+def map_blocks(fn, items, workers=1, kind="blocks"):
+    """
+    [fn(item) for item in items], run on a thread pool when workers > 1.
+    Every task has finished before the first error (in item order) is raised.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    futures = [thread_pool(workers, kind).submit(fn, item) for item in items]
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+def column_blocks(n_columns, size=COLUMN_BLOCK):
+    return [slice(start, min(start + size, n_columns)) for start in range(0, n_columns, size)]
+
+
+###############################################################################
+# Vectorized numeric kernels for the ORM pipeline
+###############################################################################
+def batch_spectrum(block):
+    """
+    Real FFT of every row of a (n_channels x N) block.
+    Returns (fft, magnitude, dominant_bin) with the DC bin skipped for the peak.
+    """
+    fft_block = np.fft.rfft(block, axis=1)
+    mag_block = np.abs(fft_block)
+    if mag_block.shape[1] > 1:
+        dominant = np.argmax(mag_block[:, 1:], axis=1) + 1
+    else:
+        dominant = np.zeros(mag_block.shape[0], dtype=int)
+    return fft_block, mag_block, dominant
+
+
+def nearest_bins(freq_axis, freqs):
+    """Index of the bin of an ascending frequency axis closest to each frequency."""
+    freqs = np.asarray(freqs, dtype=float)
+    if freqs.size == 0 or len(freq_axis) < 2:
+        return np.zeros(freqs.shape, dtype=int)
+    idx = np.clip(np.searchsorted(freq_axis, freqs), 1, len(freq_axis) - 1)
+    left = freq_axis[idx - 1]
+    right = freq_axis[idx]
+    # ties go to the lower bin, as np.argmin would
+    idx -= ((freqs - left) <= (right - freqs)).astype(int)
+    return idx
+
+
+def response_from_amplitudes(bpm_amp, corr_amps):
+    """
+    R_ij = B_ij / C_j for a (n_bpm x n_corr) BPM amplitude matrix.
+    Returns (R, bpm_amplitudes, corr_amplitudes), all (n_bpm x n_corr).
+    """
+    bpm_amp = np.asarray(bpm_amp, dtype=float)
+    corr_amps = np.asarray(corr_amps, dtype=float)
+    corr_amp = np.broadcast_to(corr_amps, bpm_amp.shape).copy()
+    R = np.zeros(bpm_amp.shape, dtype=float)
+    np.divide(bpm_amp, corr_amp, out=R, where=corr_amp != 0)
+    return R, bpm_amp, corr_amp
+
+
+def gather_response(bpm_magnitude, corr_bins, corr_amps):
+    """Pull every R_ij = |B_i(f_j)| / |C_j(f_j)| with one fancy-indexed gather."""
+    corr_bins = np.asarray(corr_bins, dtype=int)
+    return response_from_amplitudes(bpm_magnitude[:, corr_bins], corr_amps)
+
+
+def response_matrix(bpm_block, corr_bins, corr_amps):
+    """One rfft over the stacked BPM block of a plane, then a single gather."""
+    _, bpm_magnitude, _ = batch_spectrum(bpm_block)
+    return gather_response(bpm_magnitude, corr_bins, corr_amps)
+
+
+def orm_error_matrix(bpm_amp, corr_amp, bpm_err, corr_err):
+    """
+    Propagate BPM and corrector noise into every R_ij = B_ij / C_ij:
+        dR^2 = eb_i^2 / C^2 + (B^2 / C^4) * ec_j^2
+    bpm_err is aligned to the rows, corr_err to the columns. Entries with C == 0 are 0.
+    """
+    bpm_amp = np.asarray(bpm_amp, dtype=float)
+    corr_amp = np.asarray(corr_amp, dtype=float)
+    eb = np.asarray(bpm_err, dtype=float).reshape(-1, 1)
+    ec = np.asarray(corr_err, dtype=float).reshape(1, -1)
+    err = np.zeros(bpm_amp.shape, dtype=float)
+    valid = corr_amp != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dR2 = (eb**2) / (corr_amp**2) + ((bpm_amp**2) / (corr_amp**4)) * (ec**2)
+    np.sqrt(dR2, out=err, where=valid)
+    return err
+
+
+###############################################################################
+# Noise floor: residual power outside the tone bins
+###############################################################################
+def tone_bin_masks(n_bins, tone_bins, guard_bins=0, harmonics=1):
+    """
+    Bins that belong to K tones: each tone's bin k and, for h = 2..harmonics,
+    the bin h*k, each widened by +-guard_bins. The DC bin and bins past the
+    last one are never included.
+
+    Returns (bins, masks): the sorted union of those bins (U,) and a (K x U)
+    boolean mask of which of them belong to each tone, so the full-width
+    masks never have to exist.
+    """
+    tone_bins = np.asarray(tone_bins, dtype=int).reshape(-1)
+    centers = tone_bins[:, None] * np.arange(1, max(int(harmonics), 1) + 1)      # (K x H)
+    offsets = np.arange(-int(guard_bins), int(guard_bins) + 1)
+    candidates = (centers[:, :, None] + offsets).reshape(tone_bins.size, centers.shape[1] * offsets.size)
+    valid = (candidates >= 1) & (candidates < n_bins)
+    bins = np.unique(candidates[valid])
+    masks = np.zeros((tone_bins.size, bins.size), dtype=bool)
+    rows = np.broadcast_to(np.arange(tone_bins.size)[:, None], candidates.shape)
+    masks[rows[valid], np.searchsorted(bins, candidates[valid])] = True
+    return bins, masks
+
+
+def masked_residual_rms(power, magnitude_columns, mask, n_samples):
+    """
+    RMS noise of every channel once the masked bins are removed:
+        sqrt((P_i - sum_k mask_ik |X_ik|^2) / N),   clipped at 0
+    power is the total two-sided power per channel; magnitude_columns holds
+    |X| at the bins the mask columns refer to, (n_channels x n_cols). mask is
+    (n_cols,) for one mask shared by all channels or (n_channels x n_cols).
+    """
+    removed = np.einsum("ij,ij->i", magnitude_columns**2, np.broadcast_to(mask, magnitude_columns.shape))
+    remainder = np.maximum(np.asarray(power, dtype=float) - removed, 0.0)
+    return np.sqrt(remainder / n_samples)
+
+
+###############################################################################
+# Lock-in / targeted-DFT demodulation
+###############################################################################
+# Samples per basis chunk, so the N x K basis never has to exist in full
+DEMOD_CHUNK = 65536
+
+
+def tone_basis(n_samples, freqs, start=0, workers=1):
+    """
+    Real and imaginary parts of the N x K basis exp(-2j*pi*f_k*n),
+    for samples start..start+n_samples-1 and frequencies in cycles/sample.
+    With workers > 1 blocks of COLUMN_BLOCK tones are filled in parallel;
+    every entry is computed exactly as in the serial path.
+    """
+    n = np.arange(start, start + n_samples, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    if workers <= 1 or freqs.size <= COLUMN_BLOCK:
+        phase = 2.0 * np.pi * np.outer(n, freqs)
+        return np.cos(phase), -np.sin(phase)
+    cos_b = np.empty((n_samples, freqs.size), dtype=float)
+    sin_b = np.empty((n_samples, freqs.size), dtype=float)
+
+    def fill(columns):
+        phase = 2.0 * np.pi * np.outer(n, freqs[columns])
+        cos_b[:, columns] = np.cos(phase)
+        sin_b[:, columns] = -np.sin(phase)
+
+    map_blocks(fill, column_blocks(freqs.size), workers)
+    return cos_b, sin_b
+
+
+def demodulate(block, freqs, chunk=DEMOD_CHUNK, workers=1):
+    """
+    Complex amplitude of every row of a (n_channels x N) block at K given
+    frequencies, i.e. the DFT evaluated only at those tones: O(N*K) per channel
+    with two real BLAS matrix products per chunk instead of a full FFT.
+    workers > 1 builds the basis of each chunk in parallel blocks of tones.
+    """
+    block = np.asarray(block, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    n_ch, N = block.shape
+    re = np.zeros((n_ch, freqs.size), dtype=float)
+    im = np.zeros((n_ch, freqs.size), dtype=float)
+    for start in range(0, N, chunk):
+        stop = min(start + chunk, N)
+        cos_b, sin_b = tone_basis(stop - start, freqs, start, workers)
+        re += block[:, start:stop] @ cos_b
+        im += block[:, start:stop] @ sin_b
+    return re + 1j * im
+
+
+def residual_power(energy, tone_amplitudes, n_samples, freqs):
+    """
+    Two-sided spectral power left after removing each distinct tone once
+    (Parseval: sum |X_k|^2 = N * sum x^2). tone_amplitudes is (n_channels x K).
+    """
+    _, first = np.unique(np.asarray(freqs, dtype=float), return_index=True)
+    removed = np.sum(np.abs(tone_amplitudes[:, first])**2, axis=1)
+    return n_samples * np.asarray(energy, dtype=float) - removed
+
+
+###############################################################################
+# Windowed, interpolated-peak estimation (sub-bin tones)
+###############################################################################
+def hann_window(n_samples):
+    """Periodic Hann window (the DFT-even form the bin interpolation assumes)."""
+    n = np.arange(n_samples, dtype=float)
+    return 0.5 - 0.5 * np.cos(2.0 * np.pi * n / max(n_samples, 1))
+
+
+def windowed_demodulate(block, freqs, chunk=DEMOD_CHUNK, workers=1):
+    """
+    demodulate() of a Hann-windowed block, scaled by N / sum(w) so a tone has
+    the same amplitude as in the rectangular FFT at an exact bin (A * N / 2),
+    whatever its frequency.
+    """
+    block = np.asarray(block, dtype=float)
+    w = hann_window(block.shape[1])
+    return demodulate(block * w, freqs, chunk, workers) * (block.shape[1] / w.sum())
+
+
+def interpolated_peaks(block):
+    """
+    Sub-bin frequency (cycles/sample) and complex amplitude of the dominant
+    non-DC tone of every row of a (n_channels x N) block.
+
+    The peak bin of the Hann-windowed spectrum is refined from the larger
+    neighbour with the Hann two-point interpolation (Grandke):
+        alpha = |X[k±1]| / |X[k]|,   delta = ±(2*alpha - 1) / (alpha + 1)
+    and the amplitude is then demodulated at exactly k + delta, so neither
+    the frequency nor the amplitude carries the scalloping loss of the nearest bin.
+    """
+    block = np.asarray(block, dtype=float)
+    n_ch, N = block.shape
+    if n_ch == 0 or N < 4:
+        return np.zeros(n_ch, dtype=float), np.zeros(n_ch, dtype=complex)
+    w = hann_window(N)
+    mag = np.abs(np.fft.rfft(block * w, axis=1))
+    last = mag.shape[1] - 1
+    k = np.argmax(mag[:, 1:], axis=1) + 1
+    rows = np.arange(n_ch)
+    left = mag[rows, np.maximum(k - 1, 0)]
+    right = np.where(k < last, mag[rows, np.minimum(k + 1, last)], 0.0)
+    peak = mag[rows, k]
+    use_right = right > left
+    alpha = np.zeros(n_ch, dtype=float)
+    np.divide(np.where(use_right, right, left), peak, out=alpha, where=peak > 0)
+    delta = (2.0 * alpha - 1.0) / (alpha + 1.0)
+    delta = np.clip(np.where(use_right, delta, -delta), -0.5, 0.5)
+    freqs = (k + delta) / N
+
+    # each row at its own frequency: one O(N) projection per channel
+    n = np.arange(N, dtype=float)
+    scale = N / w.sum()
+    weighted = block * w
+    values = np.array([
+        scale * (weighted[i] @ np.cos(2.0 * np.pi * f * n) - 1j * (weighted[i] @ np.sin(2.0 * np.pi * f * n)))
+        for i, f in enumerate(freqs)
+    ], dtype=complex)
+    return freqs, values
@@ -0,0 +1,381 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from instrumentation import recorded
+from spectrum_cache import SpectrumCache
+from stage_graph import StageGraph
+from orm_engine import (
+    nearest_bins, response_from_amplitudes, orm_error_matrix, residual_power,
+    tone_bin_masks, masked_residual_rms, map_blocks
+)
+
+# How BPM amplitudes at the corrector tones are obtained
+ORM_ENGINE_FFT = "fft"        # full N-point spectrum of every channel
+ORM_ENGINE_LOCKIN = "lockin"  # targeted DFT at the K corrector tones only
+ORM_ENGINE_INTERP = "interp"  # Hann window, corrector peaks interpolated between bins
+
+# Channels transformed per batch, so long spectra stages stay cancellable
+SPECTRA_BATCH = 64
+
+PLANES = ("H", "V")
+
+# Bins removed from a full spectrum before its RMS noise is taken
+# guard_bins: +-bins around each tone bin (leakage of off-bin tones)
+# harmonics:  tone multiples removed as well (1 = the fundamental only)
+NoiseMask = namedtuple("NoiseMask", ["guard_bins", "harmonics"])
+DEFAULT_NOISE_MASK = NoiseMask(0, 1)
+
+
+class AnalysisCancelled(Exception):
+    """Raised between stages when the caller asked the analysis to stop."""
+
+
+###############################################################################
+# Analysis Result
+###############################################################################
+class AnalysisResult:
+    """
+    Everything the numeric stages produce for one measurement and device set.
+    Built without touching any widget, so it can be computed off the GUI thread.
+    """
+    def __init__(self, correctors, bpm_h, bpm_v, engine_mode=ORM_ENGINE_FFT, noise_mask=DEFAULT_NOISE_MASK):
+        self.correctors = list(correctors)
+        self.bpm_h = list(bpm_h)
+        self.bpm_v = list(bpm_v)
+        self.engine_mode = engine_mode
+        self.noise_mask = noise_mask
+
+        # Corrector + BPM errors
+        self.corrector_errors = {}
+        self.bpm_errors = {}
+        # Rows follow self.correctors; columns are CORRECTOR_PARAM_COLUMNS
+        self.corrector_params = None
+
+        # Orbit response matrix, its error and the amplitudes behind it
+        self.R_measured_H = None
+        self.R_measured_V = None
+        self.ERR_measured_H = None
+        self.ERR_measured_V = None
+        self.bpm_amplitudes_H = None
+        self.bpm_amplitudes_V = None
+        self.corr_amplitudes_H = None
+        self.corr_amplitudes_V = None
+        # Stages computed for this result (None: all of them, e.g. a stored result)
+        self.recomputed = None
+
+
+CORRECTOR_PARAM_COLUMNS = ["Peak-to-Peak", "Dominant Freq Idx", "Dominant Freq (Hz)", "Max FFT Amp"]
+
+
+###############################################################################
+# Stages
+###############################################################################
+def corrector_tones(spectra, correctors, engine_mode=ORM_ENGINE_FFT):
+    """
+    Dominant frequency, FFT amplitude and bin of every corrector. In
+    interpolated-peak mode frequency and amplitude are the sub-bin estimates
+    and the bin is the nearest one.
+    """
+    freq_b = spectra.freq_axis()
+    if engine_mode == ORM_ENGINE_INTERP:
+        peaks = spectra.peaks(correctors)
+        freq_c_arr = np.array([p.freq for p in peaks], dtype=float)
+        amp_c_arr = np.abs(np.array([p.value for p in peaks], dtype=complex))
+        return freq_c_arr, amp_c_arr, nearest_bins(freq_b, freq_c_arr)
+    spec_c = spectra.spectra(correctors)
+    freq_c_arr = np.array([freq_b[s.dominant_bin] for s in spec_c], dtype=float)
+    amp_c_arr = np.array([s.magnitude[s.dominant_bin] for s in spec_c], dtype=float)
+    return freq_c_arr, amp_c_arr, nearest_bins(freq_b, freq_c_arr)
+
+
+def compute_spectra(spectra, names, is_cancelled=None, progress=None, workers=1):
+    """
+    Fill the spectrum cache batch by batch (cancellable between batches).
+    With workers > 1 the batches are transformed in parallel; a channel's
+    spectrum does not depend on the batch it is transformed in.
+    """
+    lock = threading.Lock()
+    done = [0]
+
+    def transform(start):
+        _check_cancelled(is_cancelled)
+        batch = names[start:start + SPECTRA_BATCH]
+        spectra.spectra(batch)
+        if progress is not None:
+            with lock:
+                done[0] += len(batch)
+                progress(done[0] / max(len(names), 1))
+
+    map_blocks(transform, range(0, len(names), SPECTRA_BATCH), workers)
+
+
+def compute_corrector_errors(spectra, correctors, engine_mode=ORM_ENGINE_FFT, noise_mask=DEFAULT_NOISE_MASK):
+    """
+    For each corrector: remove its dominant tone → RMS remainder => error.
+    From the full spectrum the tone bin (plus noise_mask guard bins and
+    harmonics) is masked out of all correctors at once.
+    """
+    N = spectra.n_samples()
+    if engine_mode == ORM_ENGINE_INTERP:
+        # Parseval, with the interpolated tone removed instead of the peak bin
+        peaks = spectra.peaks(correctors)
+        energy = np.array([p.energy for p in peaks], dtype=float)
+        tone_power = np.abs(np.array([p.value for p in peaks], dtype=complex))**2
+        remainder_power = np.maximum(N * energy - tone_power, 0.0)
+        return dict(zip(correctors, np.sqrt(remainder_power / N)))
+    dominant = [spec.dominant_bin for spec in spectra.spectra(correctors)]
+    # each corrector masks only its own tone
+    bins, masks = tone_bin_masks(len(spectra.freq_axis()), dominant, *noise_mask)
+    errors = masked_residual_rms(spectra.powers(correctors), spectra.magnitude_block(correctors, bins), masks, N)
+    return dict(zip(correctors, errors))
+
+
+def bpm_noise(spectra, bpms, tones, engine_mode=ORM_ENGINE_FFT, noise_mask=DEFAULT_NOISE_MASK):
+    """
+    RMS noise of each BPM once every corrector tone is removed, as an array.
+    tones is the (freqs, amplitudes, bins) of the correctors (corrector_tones()).
+    Each BPM only depends on its own samples, so any subset can be computed alone.
+    """
+    N = spectra.n_samples()
+    all_corr_freqs, _, corr_bins = tones
+
+    if engine_mode in (ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP):
+        # Parseval: remainder = total energy minus the demodulated tone power
+        found = spectra.tones(bpms, all_corr_freqs, windowed=engine_mode == ORM_ENGINE_INTERP)
+        values = np.array([t.values for t in found]).reshape(len(bpms), len(all_corr_freqs))
+        energy = np.array([t.energy for t in found])
+        remainder_power = np.maximum(residual_power(energy, values, N, all_corr_freqs), 0.0)
+        return np.sqrt(remainder_power / N)
+
+    # each masked bin is removed once, however many correctors share it
+    bins, _ = tone_bin_masks(len(spectra.freq_axis()), corr_bins, *noise_mask)
+    shared = np.ones(bins.size, dtype=bool)
+    return masked_residual_rms(spectra.powers(bpms), spectra.magnitude_block(bpms, bins), shared, N)
+
+
+def compute_bpm_errors(spectra, correctors, bpms, engine_mode=ORM_ENGINE_FFT, noise_mask=DEFAULT_NOISE_MASK):
+    """
+    For each BPM: remove every corrector tone → RMS remainder => error.
+    From full spectra one bin mask (all tones, plus noise_mask guard bins and
+    harmonics) is applied to all BPMs in a single reduction.
+    """
+    tones = corrector_tones(spectra, correctors, engine_mode)
+    return dict(zip(bpms, bpm_noise(spectra, bpms, tones, engine_mode, noise_mask)))
+
+
+def corrector_parameters(signals, spectra, correctors, engine_mode=ORM_ENGINE_FFT):
+    """
+    (nCorr x 4) array of peak-to-peak, dominant bin, dominant freq and max FFT amp.
+    In interpolated-peak mode freq and amp are the sub-bin estimates.
+    """
+    params = np.zeros((len(correctors), len(CORRECTOR_PARAM_COLUMNS)), dtype=float)
+    freq_arr = spectra.freq_axis()
+    if len(correctors):
+        block = signals.rows(correctors)
+        params[:, 0] = block.max(axis=1) - block.min(axis=1)
+    for i, spec in enumerate(spectra.spectra(correctors)):
+        idx_max = spec.dominant_bin
+        params[i, 1:] = (idx_max, freq_arr[idx_max], spec.magnitude[idx_max])
+    if engine_mode == ORM_ENGINE_INTERP and len(correctors):
+        freq_c_arr, amp_c_arr, _ = corrector_tones(spectra, correctors, engine_mode)
+        params[:, 2] = freq_c_arr
+        params[:, 3] = amp_c_arr
+    return params
+
+
+def compute_bpm_tones(spectra, bpm_names, tones, engine_mode=ORM_ENGINE_FFT, workers=1):
+    """
+    Demodulate the BPMs at the corrector tones once (lock-in and interpolated-peak
+    mode), so the noise and response stages of both planes read them from the
+    cache. workers > 1 builds the tone basis in parallel blocks of correctors.
+    """
+    if engine_mode in (ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP):
+        spectra.tones(bpm_names, tones[0], windowed=engine_mode == ORM_ENGINE_INTERP, workers=workers)
+    return spectra
+
+
+def plane_response(spectra, bpm_names, freq_c_arr, amp_c_arr, corr_bins, engine_mode=ORM_ENGINE_FFT):
+    """(R, bpm_amplitudes, corr_amplitudes) of one plane with the selected engine."""
+    if engine_mode in (ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP):
+        tones = spectra.tones(bpm_names, freq_c_arr, windowed=engine_mode == ORM_ENGINE_INTERP)
+        bpm_amp = np.abs(np.array([t.values for t in tones])).reshape(len(bpm_names), len(freq_c_arr))
+        return response_from_amplitudes(bpm_amp, amp_c_arr)
+    # only the corrector bins are gathered, so a cache need not hold whole spectra
+    return response_from_amplitudes(spectra.magnitude_block(bpm_names, corr_bins), amp_c_arr)
+
+
+def build_response_matrix(spectra, result, workers=1):
+    """
+    Compute orbit response matrices with BPM_amp / Corr_amp at corrector freq.
+    With workers > 1 the BPM tones are demodulated in parallel blocks of
+    correctors and the two planes are built concurrently.
+    """
+    # corrector bins are located once; every R_ij is then a single gather
+    tones = corrector_tones(spectra, result.correctors, result.engine_mode)
+    compute_bpm_tones(spectra, result.bpm_h + result.bpm_v, tones, result.engine_mode, workers)
+    planes = map_blocks(
+        lambda bpms: plane_response(spectra, bpms, *tones, result.engine_mode),
+        (result.bpm_h, result.bpm_v), workers, kind="stages"
+    )
+    result.R_measured_H, result.bpm_amplitudes_H, result.corr_amplitudes_H = planes[0]
+    result.R_measured_V, result.bpm_amplitudes_V, result.corr_amplitudes_V = planes[1]
+
+
+def build_orm_error_matrix(result, workers=1):
+    """Propagate errors for each R_ij = BPM_amp / Corr_amp (planes concurrently with workers > 1)."""
+    corr_err = [result.corrector_errors.get(cdev, 0) for cdev in result.correctors]
+    result.ERR_measured_H, result.ERR_measured_V = map_blocks(
+        lambda plane: orm_error_matrix(
+            getattr(result, "bpm_amplitudes_" + plane), getattr(result, "corr_amplitudes_" + plane),
+            [result.bpm_errors.get(b, 0) for b in getattr(result, "bpm_" + plane.lower())], corr_err
+        ),
+        PLANES, workers, kind="stages"
+    )
+
+
+###############################################################################
+# Incremental Pipeline
+###############################################################################
+def _check_cancelled(is_cancelled):
+    if is_cancelled is not None and is_cancelled():
+        raise AnalysisCancelled()
+
+
+# Progress (percent) at which each stage starts; Spectra reports 0..50 itself
+STAGE_PERCENT = {
+    "Spectra": 0, "Corrector parameters": 50, "Corrector tones": 55, "Corrector noise": 58,
+    "BPM tones": 60, "BPM noise H": 65, "BPM noise V": 70, "Response H": 75, "Response V": 82,
+    "Errors H": 90, "Errors V": 95,
+}
+
+
+class AnalysisGraph:
+    """
+    The numeric stages as a dependency graph (see StageGraph):
+
+        signals, lists, engine -> Spectra -> Corrector parameters
+                                          -> Corrector tones -> BPM tones -> BPM noise H/V --+
+                                          -> Corrector noise -------------------------------+-> Errors H/V
+                                                                BPM tones -> Response H/V --+
+
+    run() recomputes only what its changed inputs reach. The BPM stages are
+    computed per BPM row: including or excluding one BPM computes (and
+    transforms) just that BPM, while a new noise mask reruns the noise and
+    error stages but not the response matrices. Runs are serialized, so a
+    cancelled run finishes its current stage before the next one starts.
+
+    With workers > 1 independent stages (the corrector stages, the planes)
+    run concurrently, the spectra are transformed in parallel batches and the
+    BPMs demodulated in parallel blocks of correctors. The number of workers
+    is not an input: it never changes a result, bit for bit.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run = {}  # progress / is_cancelled / recorder / workers of the run in progress
+        g = self.graph = StageGraph()
+        for name in ("signals", "spectra", "correctors", "bpm_h", "bpm_v", "engine", "noise_mask"):
+            g.add_input(name)
+        g.add_stage("Spectra", ("spectra", "correctors", "bpm_h", "bpm_v", "engine"), self._spectra)
+        g.add_stage("Corrector parameters", ("signals", "Spectra", "correctors", "engine"), corrector_parameters)
+        g.add_stage("Corrector tones", ("Spectra", "correctors", "engine"), corrector_tones)
+        g.add_stage("Corrector noise", ("Spectra", "correctors", "engine", "noise_mask"), compute_corrector_errors)
+        g.add_stage("BPM tones", ("Spectra", "Corrector tones", "bpm_h", "bpm_v", "engine"), self._bpm_tones)
+        for plane in PLANES:
+            rows = "bpm_" + plane.lower()
+            g.add_row_stage(f"BPM noise {plane}", rows, ("BPM tones", "Corrector tones", "engine", "noise_mask"),
+                            lambda names, spectra, tones, engine, mask: (bpm_noise(spectra, names, tones, engine, mask),))
+            g.add_row_stage(f"Response {plane}", rows, ("BPM tones", "Corrector tones", "engine"),
+                            lambda names, spectra, tones, engine: plane_response(spectra, names, *tones, engine))
+            g.add_row_stage(f"Errors {plane}", rows, ("correctors", "Corrector noise"), _error_rows,
+                            aligned=(f"Response {plane}", f"BPM noise {plane}"))
+
+    def _spectra(self, spectra, correctors, bpm_h, bpm_v, engine_mode):
+        # In lock-in and interpolated-peak mode only the correctors need a full spectrum
+        names = correctors + spectra.needs_spectrum(bpm_h + bpm_v) if engine_mode == ORM_ENGINE_FFT else correctors
+        progress = self._run.get("progress")
+        compute_spectra(spectra, names, self._run.get("is_cancelled"),
+                        None if progress is None else lambda f: progress("Spectra", int(50 * f)),
+                        self._run.get("workers", 1))
+        if engine_mode == ORM_ENGINE_INTERP:
+            spectra.peaks(correctors)  # read by three concurrent corrector stages
+        return spectra
+
+    def _bpm_tones(self, spectra, tones, bpm_h, bpm_v, engine_mode):
+        # the same object comes back, so the BPM row stages keep their rows
+        return compute_bpm_tones(spectra, bpm_h + bpm_v, tones, engine_mode, self._run.get("workers", 1))
+
+    def _stage(self, name, **shapes):
+        _check_cancelled(self._run.get("is_cancelled"))
+        if self._run.get("progress") is not None:
+            self._run["progress"](name, STAGE_PERCENT.get(name, 0))
+        g = self.graph
+        return recorded(self._run.get("recorder"), name, samples=len(g.value("signals")),
+                        correctors=len(g.value("correctors")), **shapes)
+
+    def run(self, signals, correctors, bpm_h, bpm_v, engine_mode=ORM_ENGINE_FFT, spectra=None,
+            noise_mask=DEFAULT_NOISE_MASK, progress=None, is_cancelled=None, recorder=None, workers=1):
+        """Bring every stage up to date with these inputs and return an AnalysisResult."""
+        with self._lock:
+            g = self.graph
+            if spectra is None:
+                spectra = g.value("spectra")
+                if spectra is None or g.value("signals") is not signals:
+                    spectra = SpectrumCache(signals)
+            inputs = dict(signals=signals, spectra=spectra, correctors=list(correctors), bpm_h=list(bpm_h),
+                          bpm_v=list(bpm_v), engine=engine_mode, noise_mask=NoiseMask(*noise_mask))
+            for name, value in inputs.items():
+                g.set_input(name, value)
+            self._run = dict(progress=progress, is_cancelled=is_cancelled, recorder=recorder, workers=workers)
+            try:
+                ran = g.update(self._stage, workers)
+            finally:
+                self._run = {}
+            if progress is not None:
+                progress("Done", 100)
+            return self._result(inputs, ran)
+
+    def _result(self, inputs, ran):
+        g = self.graph
+        result = AnalysisResult(inputs["correctors"], inputs["bpm_h"], inputs["bpm_v"],
+                                inputs["engine"], inputs["noise_mask"])
+        result.recomputed = ran
+        result.corrector_errors = g.value("Corrector noise")
+        result.corrector_params = g.value("Corrector parameters")
+        result.bpm_errors = {}
+        for plane in PLANES:
+            bpms = getattr(result, "bpm_" + plane.lower())
+            result.bpm_errors.update(zip(bpms, g.rows(f"BPM noise {plane}")[0]))
+            R, bpm_amp, corr_amp = g.rows(f"Response {plane}")
+            setattr(result, "R_measured_" + plane, R)
+            setattr(result, "bpm_amplitudes_" + plane, bpm_amp)
+            setattr(result, "corr_amplitudes_" + plane, corr_amp)
+            setattr(result, "ERR_measured_" + plane, g.rows(f"Errors {plane}")[0])
+        return result
+
+
+def _error_rows(names, correctors, corrector_errors, response, noise):
+    _, bpm_amp, corr_amp = response
+    corr_err = [corrector_errors.get(cdev, 0) for cdev in correctors]
+    return (orm_error_matrix(bpm_amp, corr_amp, noise[0], corr_err),)
+
+
+def run_analysis(signals, correctors, bpm_h, bpm_v, engine_mode=ORM_ENGINE_FFT,
+                 spectra=None, progress=None, is_cancelled=None, recorder=None,
+                 noise_mask=DEFAULT_NOISE_MASK, graph=None, workers=1):
+    """
+    Run every numeric stage and return an AnalysisResult.
+
+    progress(stage_name, percent) is called as stages advance; is_cancelled()
+    is polled between stages and raises AnalysisCancelled when it returns True.
+    A RunRecorder, if given, receives the time, memory and shapes of each stage.
+    noise_mask sets the bins removed from full spectra before the noise RMS.
+    With an AnalysisGraph from an earlier run only the stages whose inputs
+    changed are recomputed. workers > 1 runs independent work on a thread
+    pool; the result is bit-identical to workers=1.
+    """
+    if graph is None:
+        graph = AnalysisGraph()
+    return graph.run(signals, correctors, bpm_h, bpm_v, engine_mode, spectra, noise_mask,
+                     progress, is_cancelled, recorder, workers)
@@ -1,40 +1,69 @@
+import os
+import time
+
 import numpy as np
-import pandas as pd
 
-from PyQt5.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPalette, QColor
 from PyQt5.QtWidgets import (
     QMainWindow, QFileDialog, QMessageBox,
     QGridLayout, QVBoxLayout, QHBoxLayout, QTabWidget, QSplitter,
-    QWidget, QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
-    QPushButton, QAction, QListWidget, QSpinBox, QListWidgetItem
+    QWidget, QLabel, QLineEdit, QTableWidget, QTableWidgetItem, QTableView,
+    QPushButton, QAction, QActionGroup, QListWidget, QSpinBox, QListWidgetItem, QProgressBar,
+    QInputDialog, QComboBox, QDoubleSpinBox, QMenu
 )
 
-from numpy.fft import fft
-from mpl_canvas import MplCanvas  # Relative import of our MplCanvas class
+# matplotlib (mpl_canvas) and pandas (measurement_io, measurement_cache,
+# matrix_export) are imported on first use, so the window shows without them
+from lazy_canvas import CanvasPane
+from decimation import DecimatedTimePlot
+from spectrum_cache import SpectrumCache
+from signal_store import SignalStore
+from orm_pipeline import (
+    ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP, CORRECTOR_PARAM_COLUMNS, DEFAULT_NOISE_MASK, NoiseMask,
+    AnalysisGraph
+)
+from analysis_worker import AnalysisWorker
+from orm_engine import default_workers
+from instrumentation import RunRecorder, profile_report
+from disk_cache import file_version
+from table_models import ArrayTableModel, CorrectorParamsModel
+from orbit_correction import OrbitCorrector
 
 ###############################################################################
 # Main Application
 ###############################################################################
 class ResponseAnalyzerApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
         self.setWindowTitle("ORM Application - Dark Theme")
         self.setGeometry(100, 100, 1300, 800)
 
         # Data & Analysis containers
-        self.df = None
+        # Samples of the analyzed channels (SignalStore), one block per device class
+        self.signals = None
+        # FFT of every analyzed channel, shared by all stages and replots
+        self.spectra = SpectrumCache()
+        # Stages of the pipeline; a run recomputes only what changed inputs reach
+        self.analysis_graph = AnalysisGraph()
         self.corrector_names_txt = []
         self.bpm_names_txt = []
         self.actual_correctors = []
         self.actual_bpm_h = []
         self.actual_bpm_v = []
         self.excluded_bpm = []
+        # BPMs with data before the user's exclusions, and the BPMs excluded by hand
+        self.measured_bpm_h = []
+        self.measured_bpm_v = []
+        self.user_excluded_bpm = []
 
         # Corrector + BPM errors
         self.corrector_errors = {}
         self.bpm_errors = {}
+        # Peak-to-peak, dominant bin/freq and max FFT amp per corrector
+        self.corrector_params = None
+        # Last complete AnalysisResult (all of the arrays below, with labels)
+        self.analysis_result = None
 
         # Orbit response matrix
         self.R_measured_H = None
@@ -47,12 +76,53 @@ class ResponseAnalyzerApp(QMainWindow):
         self.bpm_amplitudes_V = None
         self.corr_amplitudes_H = None
         self.corr_amplitudes_V = None
+        # Cached SVD solvers of the measured ORM, per plane, and the last corrected orbits
+        self.orbit_correctors = {"H": OrbitCorrector(), "V": OrbitCorrector()}
+        self._lastOrbits = None
+
+        # Analysis settings
+        self.orm_engine_mode = ORM_ENGINE_FFT
+        # Bins (guard band, harmonics) removed from full spectra before the noise RMS
+        self.noise_mask = DEFAULT_NOISE_MASK
+        # Threads the analysis may use (bit-identical results for any count)
+        self.analysis_workers = default_workers()
+        # Sample dtype used when parsing CSV columns
+        self.ingest_dtype = np.float64
+        # Sidecar cache of parsed CSVs, opened on first use (see _measurementCache)
+        self.measurement_cache = None
+        self.use_measurement_cache = True
+        # Archive of finished analyses (see _resultStore) and the file they are keyed by
+        self.result_store = None
+        self.use_result_store = True
+        self._dataFile = None
+        self._dataVersion = None
+        self._dataDigest = None
+        # Background analysis currently running (None when idle)
+        self._analysisWorker = None
+        # Summary of the last instrumented load/analysis, shown in the status row
+        self._runSummaries = {}
+        # Peak memory per stage in the run timings (tracemalloc slows the run down)
+        self.trace_memory = False
+        # Live acquisition reader (None when not streaming) and its device columns
+        self._liveReader = None
+        self._liveColumns = ([], [])
+        # Sliding DFT of the live BPM columns, and the stream samples it has seen
+        self._liveTracker = None
+        self._liveSeen = 0
 
         # Default plot font size
         self.plot_font_size = 12
 
-        # We'll store references to MplCanvas so we can easily re-apply font
-        self.all_canvases = []
+        # StartupProfiler timing figure creation (None unless --profile-startup)
+        self.profiler = profiler
+        # Every plot pane; each creates its MplCanvas the first time it is shown
+        self.canvas_panes = []
+        # Decimated time-domain plot currently shown on each time pane
+        self.time_plots = {}
+        # Panes whose data or style changed while hidden, and the deferred
+        # render for each; they are drawn when their tab becomes visible
+        self._staleCanvases = set()
+        self._pendingRender = {}
 
         self._initUI()
         self._setDarkTheme()
@@ -70,10 +140,84 @@ class ResponseAnalyzerApp(QMainWindow):
         openCSVAction.triggered.connect(self.openCSVFile)
         fileMenu.addAction(openCSVAction)
 
+        exportAllAction = QAction("Export All Results (NPZ)", self)
+        exportAllAction.triggered.connect(self.onExportAllResults)
+        fileMenu.addAction(exportAllAction)
+
+        fileMenu.addSeparator()
+        self.useCacheAction = QAction("Use Measurement Cache", self, checkable=True)
+        self.useCacheAction.setChecked(self.use_measurement_cache)
+        self.useCacheAction.toggled.connect(self.onUseMeasurementCacheToggled)
+        fileMenu.addAction(self.useCacheAction)
+
+        clearCacheAction = QAction("Clear Measurement Cache", self)
+        clearCacheAction.triggered.connect(self.onClearMeasurementCache)
+        fileMenu.addAction(clearCacheAction)
+
+        self.useResultStoreAction = QAction("Use Result Store", self, checkable=True)
+        self.useResultStoreAction.setChecked(self.use_result_store)
+        self.useResultStoreAction.toggled.connect(self.onUseResultStoreToggled)
+        fileMenu.addAction(self.useResultStoreAction)
+
+        clearResultsAction = QAction("Clear Result Store", self)
+        clearResultsAction.triggered.connect(self.onClearResultStore)
+        fileMenu.addAction(clearResultsAction)
+        fileMenu.addSeparator()
+
         exitAction = QAction("Exit", self)
         exitAction.triggered.connect(self.close)
         fileMenu.addAction(exitAction)
 
+        analysisMenu = menubar.addMenu("Analysis")
+        engineGroup = QActionGroup(self)
+        for mode, label in ((ORM_ENGINE_FFT, "ORM Engine: Full FFT"),
+                            (ORM_ENGINE_LOCKIN, "ORM Engine: Lock-in (Corrector Tones Only)"),
+                            (ORM_ENGINE_INTERP, "ORM Engine: Interpolated Peak (Hann, Sub-bin)")):
+            engineAction = QAction(label, self, checkable=True)
+            engineAction.setChecked(mode == self.orm_engine_mode)
+            engineAction.triggered.connect(lambda _checked, m=mode: self.onOrmEngineChanged(m))
+            engineGroup.addAction(engineAction)
+            analysisMenu.addAction(engineAction)
+
+        noiseMaskAction = QAction("Noise Floor Bin Mask...", self)
+        noiseMaskAction.triggered.connect(self.onNoiseMaskSettings)
+        analysisMenu.addAction(noiseMaskAction)
+
+        workersAction = QAction("Worker Threads...", self)
+        workersAction.triggered.connect(self.onWorkerThreadsSettings)
+        analysisMenu.addAction(workersAction)
+
+        analysisMenu.addSeparator()
+        compareAction = QAction("Compare Archived Runs...", self)
+        compareAction.triggered.connect(self.onCompareArchivedRuns)
+        analysisMenu.addAction(compareAction)
+
+        analysisMenu.addSeparator()
+        profileAction = QAction("Profile Analysis (cProfile)...", self)
+        profileAction.triggered.connect(self.onProfileAnalysis)
+        analysisMenu.addAction(profileAction)
+        traceMemoryAction = QAction("Trace Memory in Run Timings (Slower)", self, checkable=True)
+        traceMemoryAction.setChecked(self.trace_memory)
+        traceMemoryAction.toggled.connect(self.onTraceMemoryToggled)
+        analysisMenu.addAction(traceMemoryAction)
+
+        analysisMenu.addSeparator()
+        float32Action = QAction("Load Samples as float32 (Half Memory)", self, checkable=True)
+        float32Action.toggled.connect(self.onIngestFloat32Toggled)
+        analysisMenu.addAction(float32Action)
+
+        liveMenu = menubar.addMenu("Live")
+        liveTailAction = QAction("Tail Growing CSV...", self)
+        liveTailAction.triggered.connect(self.onLiveTailFile)
+        liveMenu.addAction(liveTailAction)
+        liveSocketAction = QAction("Listen on Local Socket...", self)
+        liveSocketAction.triggered.connect(self.onLiveListenSocket)
+        liveMenu.addAction(liveSocketAction)
+        self.liveStopAction = QAction("Stop Live Acquisition", self)
+        self.liveStopAction.setEnabled(False)
+        self.liveStopAction.triggered.connect(self.stopLive)
+        liveMenu.addAction(self.liveStopAction)
+
         helpMenu = menubar.addMenu("Help")
         docAction = QAction("Documentation", self)
         docAction.triggered.connect(self.openDocumentation)
@@ -93,6 +237,7 @@ class ResponseAnalyzerApp(QMainWindow):
         self._createBPMTab()
         self._createResponseMatrixTab()
         self._createErrorsTab()
+        self._createOrbitCorrectionTab()
         self._createExcludedBPMsTab()
 
         # Status panel at bottom
@@ -105,6 +250,21 @@ class ResponseAnalyzerApp(QMainWindow):
         statusLayout.addWidget(self.importedFileLabel)
         statusLayout.addWidget(self.importedFileEdit)
 
+        # Analysis progress + cancel
+        self.analysisStatusLabel = QLabel("")
+        statusLayout.addWidget(self.analysisStatusLabel)
+        self.analysisProgress = QProgressBar()
+        self.analysisProgress.setRange(0, 100)
+        self.analysisProgress.setMaximumWidth(160)
+        statusLayout.addWidget(self.analysisProgress)
+        self.btnCancelAnalysis = QPushButton("Cancel")
+        self.btnCancelAnalysis.setEnabled(False)
+        self.btnCancelAnalysis.clicked.connect(self.cancelAnalysis)
+        statusLayout.addWidget(self.btnCancelAnalysis)
+        # Timing summary of the last load/analysis (per-stage details in the tooltip)
+        self.runSummaryLabel = QLabel("")
+        statusLayout.addWidget(self.runSummaryLabel)
+
         # Spinbox for font size
         lblFont = QLabel("Plot Font Size:")
         statusLayout.addWidget(lblFont)
@@ -113,9 +273,25 @@ class ResponseAnalyzerApp(QMainWindow):
         self.spinFontSize.setValue(self.plot_font_size)
         self.spinFontSize.valueChanged.connect(self.onFontSizeChanged)
         statusLayout.addWidget(self.spinFontSize)
+        # Debounce: restyle once the spinbox settles, not on every tick
+        self._fontTimer = QTimer(self)
+        self._fontTimer.setSingleShot(True)
+        self._fontTimer.setInterval(150)
+        self._fontTimer.timeout.connect(self._applyFontToAllCanvases)
+        # Live mode: re-analyze the rolling window at a fixed rate
+        self._liveTimer = QTimer(self)
+        self._liveTimer.timeout.connect(self._onLiveTick)
+
+        # Draw stale canvases as soon as their (sub-)tab is shown
+        for tabs in (self.mainTabs, self.tabGroupCorr, self.tabGroupBPM,
+                     self.tabGroupResp, self.tabGroupErrors):
+            tabs.currentChanged.connect(self._onTabChanged)
 
         mainLayout.addWidget(self.statusPanel, 1, 0, 1, 1)
 
+        # Figures are built when first shown; that render applies the plot font
+        self._applyFontToAllCanvases()
+
     ###########################################################################
     # Dark Theme
     ###########################################################################
@@ -171,7 +347,7 @@ class ResponseAnalyzerApp(QMainWindow):
                 background-color: #2C2C2C;
                 color: #FFFFFF;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #3C3C3C;
                 color: #FFFFFF;
                 gridline-color: #AAAAAA;
@@ -189,46 +365,133 @@ class ResponseAnalyzerApp(QMainWindow):
     def onFontSizeChanged(self, val):
         """User changed the spinbox for font size."""
         self.plot_font_size = val
-        # Re-apply to each MplCanvas
-        for c in self.all_canvases:
-            self._applyPlotFont(c)
-            c.draw()
+        self._fontTimer.start()
+
+    def _applyFontToAllCanvases(self):
+        # Visible canvases redraw now, hidden ones when their tab is opened
+        for pane in self.canvas_panes:
+            self._markCanvasStale(pane)
+
+    ###########################################################################
+    # Lazy Rendering
+    ###########################################################################
+    def _markCanvasStale(self, pane, render=None):
+        """
+        Record that a pane needs redrawing, optionally with a render step
+        render(canvas) (latest wins). Visible panes are rendered right away.
+        """
+        if render is not None:
+            self._pendingRender[pane] = render
+        self._staleCanvases.add(pane)
+        if pane.isVisible():
+            self._renderCanvas(pane)
+
+    def _ensureRendered(self, pane):
+        """
+        Create the pane's canvas if needed and run its pending render, even if
+        hidden (e.g. before saving it). Returns the canvas.
+        """
+        canvas = pane.canvas()
+        render = self._pendingRender.pop(pane, None)
+        if render is not None:
+            render(canvas)
+        self._applyPlotFont(canvas)
+        return canvas
+
+    def _renderCanvas(self, pane):
+        canvas = self._ensureRendered(pane)
+        self._staleCanvases.discard(pane)
+        canvas.draw_idle()
+
+    def _onTabChanged(self, _index):
+        # let the stacked widget finish showing the page first
+        QTimer.singleShot(0, self._renderVisibleCanvases)
+
+    def _renderVisibleCanvases(self):
+        for pane in list(self._staleCanvases):
+            if pane.isVisible():
+                self._renderCanvas(pane)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self._renderVisibleCanvases)
+
+    def onOrmEngineChanged(self, mode):
+        """User picked a different ORM engine from the Analysis menu."""
+        if mode == self.orm_engine_mode:
+            return
+        self.orm_engine_mode = mode
+        self.performAnalysis()
+
+    def onNoiseMaskSettings(self):
+        """Ask for the guard band and harmonics removed before the noise RMS, then re-analyze."""
+        guard, ok = QInputDialog.getInt(
+            self, "Noise Floor Bin Mask", "Guard band around each corrector tone (+- bins):",
+            self.noise_mask.guard_bins, 0, 1000)
+        if not ok:
+            return
+        harmonics, ok = QInputDialog.getInt(
+            self, "Noise Floor Bin Mask", "Harmonics removed with each tone (1 = fundamental only):",
+            self.noise_mask.harmonics, 1, 50)
+        if not ok:
+            return
+        mask = NoiseMask(guard, harmonics)
+        if mask != self.noise_mask:
+            self.noise_mask = mask
+            self.performAnalysis()
+
+    def onWorkerThreadsSettings(self):
+        """Threads for the next analyses; the results are the same for any count, so nothing reruns."""
+        workers, ok = QInputDialog.getInt(
+            self, "Worker Threads", f"Threads for spectra, planes and corrector blocks (1 = serial, "
+            f"{os.cpu_count() or 1} cores):", self.analysis_workers, 1, 256)
+        if ok:
+            self.analysis_workers = workers
+
+    def onIngestFloat32Toggled(self, checked):
+        """Parse the next CSV as float32 (half the memory) or float64."""
+        self.ingest_dtype = np.float32 if checked else np.float64
 
     ###########################################################################
     # Helper Methods for Plotting
     ###########################################################################
-    def _clearPlot(self, canvas: MplCanvas):
-        """Clear the canvas axes and redraw."""
+    def _clearPlot(self, pane: CanvasPane):
+        """Clear the pane's axes and redraw."""
+        self.time_plots.pop(pane, None)
+        canvas = pane.canvas()
         canvas.axes.clear()
         canvas.draw()
 
-    def _plotTimeDomainData(self, canvas: MplCanvas, selectedItems, dataFrame, title):
-        """Plot time-domain signals on the given canvas."""
-        if dataFrame is None:
+    def _plotTimeDomainData(self, pane: CanvasPane, selectedItems, signals, title):
+        """Plot time-domain signals on the given pane (min/max decimated, zoom-aware)."""
+        if signals is None:
             return
+        canvas = pane.canvas()
+        plot = DecimatedTimePlot(canvas.axes, canvas.draw_idle)
+        # replaces the previous plot's decimator (its axes callbacks went with clear())
+        self.time_plots[pane] = plot
         for it in selectedItems:
             dev_name = it.text()
-            if dev_name in dataFrame.columns:
-                data = dataFrame[dev_name].values
-                x = np.arange(len(data))
-                canvas.axes.plot(x, data, label=dev_name)
+            if dev_name in signals:
+                plot.add_trace(signals.row(dev_name), label=dev_name)
+        if plot.n_points() > 1:
+            canvas.axes.set_xlim(0, plot.n_points() - 1)
         canvas.axes.set_title(title)
         canvas.axes.legend(loc="best")
         self._applyPlotFont(canvas)
         canvas.draw()
 
-    def _plotFrequencyDomainData(self, canvas: MplCanvas, selectedItems, dataFrame, title):
-        """Plot frequency-domain (FFT) signals on the given canvas."""
-        if dataFrame is None:
+    def _plotFrequencyDomainData(self, pane: CanvasPane, selectedItems, signals, title):
+        """Plot frequency-domain (FFT) signals on the given pane."""
+        if signals is None:
             return
+        canvas = pane.canvas()
+        N = len(signals)
+        freq = self.spectra.freq_axis(N)[1:N//2]
         for it in selectedItems:
             dev_name = it.text()
-            if dev_name in dataFrame.columns:
-                data = dataFrame[dev_name].values
-                N = len(data)
-                fft_vals = fft(data)
-                freq = np.fft.fftfreq(N, d=1.0)[1:N//2]
-                amp = np.abs(fft_vals)[1:N//2]
+            if dev_name in signals:
+                amp = self.spectra.spectrum(dev_name).magnitude[1:N//2]
                 amp_scaled = (2.0 / N) * amp
                 canvas.axes.plot(freq, amp_scaled, label=dev_name)
         canvas.axes.set_title(title)
@@ -244,17 +507,84 @@ class ResponseAnalyzerApp(QMainWindow):
         self.mainTabs.addTab(self.tabExcludedBPMs, "Excluded BPMs")
         vbox_excl = QVBoxLayout(self.tabExcludedBPMs)
         self.tableExcludedBPMs = QTableWidget()
-        self.tableExcludedBPMs.setColumnCount(1)
-        self.tableExcludedBPMs.setHorizontalHeaderLabels(["BPM Name"])
+        self.tableExcludedBPMs.setColumnCount(2)
+        self.tableExcludedBPMs.setHorizontalHeaderLabels(["BPM Name", "Reason"])
+        self._enableBPMContextMenu(self.tableExcludedBPMs)
         vbox_excl.addWidget(self.tableExcludedBPMs)
 
-        lbl_info = QLabel("BPMs that read 0 for all samples are excluded from the ORM.")
+        btnInclude = QPushButton("Include Selected in ORM")
+        btnInclude.clicked.connect(self.onIncludeSelectedBPMs)
+        vbox_excl.addWidget(btnInclude)
+
+        lbl_info = QLabel("BPMs that read 0 for all samples are excluded from the ORM. "
+                          "Right-click a BPM in the BPM lists or matrix tables to exclude it by hand.")
         vbox_excl.addWidget(lbl_info)
 
     def populateExcludedBPMsTable(self):
-        self.tableExcludedBPMs.setRowCount(len(self.excluded_bpm))
-        for i, bpm_name in enumerate(self.excluded_bpm):
+        rows = [(b, "reads 0 for all samples") for b in self.excluded_bpm]
+        rows += [(b, "excluded by user") for b in self.user_excluded_bpm]
+        self.tableExcludedBPMs.setRowCount(len(rows))
+        for i, (bpm_name, reason) in enumerate(rows):
             self.tableExcludedBPMs.setItem(i, 0, QTableWidgetItem(bpm_name))
+            self.tableExcludedBPMs.setItem(i, 1, QTableWidgetItem(reason))
+
+    def onIncludeSelectedBPMs(self):
+        rows = sorted({index.row() for index in self.tableExcludedBPMs.selectedIndexes()})
+        names = [self.tableExcludedBPMs.item(r, 0).text() for r in rows]
+        self.setBPMsExcluded([n for n in names if n in self.user_excluded_bpm], False)
+
+    def setBPMsExcluded(self, names, excluded):
+        """
+        Exclude BPMs from the ORM by hand, or include them again. The analysis
+        graph then computes (or drops) only their rows of the matrices, unless
+        the last result came from the result store (the graph holds no rows yet).
+        """
+        names = [n for n in names if excluded != (n in self.user_excluded_bpm)]
+        if not names:
+            return
+        if excluded:
+            self.user_excluded_bpm.extend(names)
+        else:
+            self.user_excluded_bpm = [b for b in self.user_excluded_bpm if b not in names]
+        self._applyBPMExclusions()
+        self.populateExcludedBPMsTable()
+        self._markExcludedBPMItems()
+        # the plane's BPM columns changed, so the last orbits no longer fit
+        self.modelKicks.setArray(None)
+        self._lastOrbits = None
+        self.performAnalysis()
+
+    def _applyBPMExclusions(self):
+        excluded = set(self.user_excluded_bpm)
+        self.actual_bpm_h = [b for b in self.measured_bpm_h if b not in excluded]
+        self.actual_bpm_v = [b for b in self.measured_bpm_v if b not in excluded]
+
+    def _enableBPMContextMenu(self, widget):
+        widget.setContextMenuPolicy(Qt.CustomContextMenu)
+        widget.customContextMenuRequested.connect(lambda pos, w=widget: self._onBPMContextMenu(w, pos))
+
+    def _bpmAt(self, widget, pos):
+        """Name of the BPM under pos in a BPM list, matrix table or the excluded table."""
+        if isinstance(widget, QListWidget):
+            item = widget.itemAt(pos)
+            return item.text() if item is not None else None
+        if isinstance(widget, QTableWidget):
+            item = widget.item(widget.rowAt(pos.y()), 0)
+            return item.text() if item is not None else None
+        index = widget.indexAt(pos)
+        labels = widget.model().rowLabels()
+        return labels[index.row()] if index.isValid() and index.row() < len(labels) else None
+
+    def _onBPMContextMenu(self, widget, pos):
+        name = self._bpmAt(widget, pos)
+        # BPMs that read all zeros have no samples to analyze
+        if name is None or name in self.excluded_bpm:
+            return
+        excluded = name in self.user_excluded_bpm
+        menu = QMenu(self)
+        action = menu.addAction(f"Include {name} in ORM" if excluded else f"Exclude {name} from ORM")
+        if menu.exec_(widget.viewport().mapToGlobal(pos)) is action:
+            self.setBPMsExcluded([name], not excluded)
 
     ###########################################################################
     # 1) Correctors Tab
@@ -271,7 +601,9 @@ class ResponseAnalyzerApp(QMainWindow):
         self.tabCorrParams = QWidget()
         self.tabGroupCorr.addTab(self.tabCorrParams, "Parameters")
         vbox_params = QVBoxLayout(self.tabCorrParams)
-        self.tableCorrParams = QTableWidget()
+        self.modelCorrParams = CorrectorParamsModel(parent=self)
+        self.tableCorrParams = QTableView()
+        self.tableCorrParams.setModel(self.modelCorrParams)
         vbox_params.addWidget(self.tableCorrParams)
         btnSaveCorrParamsTable = QPushButton("Save Corrector Parameters (CSV)")
         btnSaveCorrParamsTable.clicked.connect(self.onSaveCorrParamsTable)
@@ -296,12 +628,9 @@ class ResponseAnalyzerApp(QMainWindow):
         hbox_corr_time_btn.addWidget(btnPlotCorrTime)
         vbox_ctime.addLayout(hbox_corr_time_btn)
 
-        self.canvasCorrTime = MplCanvas(self, width=5, height=4)
-        self.toolbarCorrTime = None
-        self.toolbarCorrTime = NavigationToolbar2QT(self.canvasCorrTime, self)
-        vbox_ctime.addWidget(self.toolbarCorrTime)
-        vbox_ctime.addWidget(self.canvasCorrTime)
-        self.all_canvases.append(self.canvasCorrTime)
+        self.paneCorrTime = CanvasPane(self, "Correctors / Time Domain", width=5, height=4, profiler=self.profiler)
+        vbox_ctime.addWidget(self.paneCorrTime)
+        self.canvas_panes.append(self.paneCorrTime)
 
         # (C) Frequency Domain
         self.tabCorrFreq = QWidget()
@@ -322,37 +651,33 @@ class ResponseAnalyzerApp(QMainWindow):
         hbox_corr_freq_btn.addWidget(btnPlotCorrFreq)
         vbox_cfreq.addLayout(hbox_corr_freq_btn)
 
-        self.canvasCorrFreq = MplCanvas(self, width=5, height=4)
-        self.toolbarCorrFreq = NavigationToolbar2QT(self.canvasCorrFreq, self)
-        vbox_cfreq.addWidget(self.toolbarCorrFreq)
-        vbox_cfreq.addWidget(self.canvasCorrFreq)
-        self.all_canvases.append(self.canvasCorrFreq)
+        self.paneCorrFreq = CanvasPane(self, "Correctors / Frequency Domain", width=5, height=4, profiler=self.profiler)
+        vbox_cfreq.addWidget(self.paneCorrFreq)
+        self.canvas_panes.append(self.paneCorrFreq)
 
     def onClearCorrTimePlot(self):
-        self._clearPlot(self.canvasCorrTime)
+        self._clearPlot(self.paneCorrTime)
 
     def onPlotCorrTimeSelected(self):
         self.onClearCorrTimePlot()
         selectedItems = self.listCorrTime.selectedItems()
-        self._plotTimeDomainData(self.canvasCorrTime, selectedItems, self.df, "Selected Correctors - Time Domain")
+        self._plotTimeDomainData(self.paneCorrTime, selectedItems, self.signals, "Selected Correctors - Time Domain")
 
     def onClearCorrFreqPlot(self):
-        self._clearPlot(self.canvasCorrFreq)
+        self._clearPlot(self.paneCorrFreq)
 
     def onPlotCorrFreqSelected(self):
         self.onClearCorrFreqPlot()
         selectedItems = self.listCorrFreq.selectedItems()
-        self._plotFrequencyDomainData(self.canvasCorrFreq, selectedItems, self.df, "Selected Correctors - Frequency Domain")
+        self._plotFrequencyDomainData(self.paneCorrFreq, selectedItems, self.signals, "Selected Correctors - Frequency Domain")
 
     def onSaveCorrParamsTable(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Corrector Params Table", "", "CSV Files (*.csv)")
-        if not file_path:
-            return
-        try:
-            self._exportQTableWidgetToCSV(self.tableCorrParams, file_path)
+        file_path = self._exportArray(
+            "Save Corrector Params Table", self.corrector_params,
+            self.actual_correctors, CORRECTOR_PARAM_COLUMNS, index_name="Corrector"
+        )
+        if file_path:
             QMessageBox.information(self, "Export Successful", f"Table exported to {file_path}")
-        except Exception as ex:
-            QMessageBox.critical(self, "Export Error", str(ex))
 
     ###########################################################################
     # 2) BPMs Tab
@@ -375,6 +700,7 @@ class ResponseAnalyzerApp(QMainWindow):
         vbox_bpm_time.addWidget(labelH)
         self.listBPMTimeH = QListWidget()
         self.listBPMTimeH.setSelectionMode(QListWidget.MultiSelection)
+        self._enableBPMContextMenu(self.listBPMTimeH)
         vbox_bpm_time.addWidget(self.listBPMTimeH)
 
         hbox_bpm_time_h = QHBoxLayout()
@@ -386,17 +712,16 @@ class ResponseAnalyzerApp(QMainWindow):
         hbox_bpm_time_h.addWidget(btnPlotBPMTimeH)
         vbox_bpm_time.addLayout(hbox_bpm_time_h)
 
-        self.canvasBPMTimeH = MplCanvas(self, width=5, height=3)
-        self.toolbarBPMTimeH = NavigationToolbar2QT(self.canvasBPMTimeH, self)
-        vbox_bpm_time.addWidget(self.toolbarBPMTimeH)
-        vbox_bpm_time.addWidget(self.canvasBPMTimeH)
-        self.all_canvases.append(self.canvasBPMTimeH)
+        self.paneBPMTimeH = CanvasPane(self, "BPMs / Time (H)", width=5, height=3, profiler=self.profiler)
+        vbox_bpm_time.addWidget(self.paneBPMTimeH)
+        self.canvas_panes.append(self.paneBPMTimeH)
 
         # Vertical
         labelV = QLabel("Select Vertical BPM(s) for Time Plot:")
         vbox_bpm_time.addWidget(labelV)
         self.listBPMTimeV = QListWidget()
         self.listBPMTimeV.setSelectionMode(QListWidget.MultiSelection)
+        self._enableBPMContextMenu(self.listBPMTimeV)
         vbox_bpm_time.addWidget(self.listBPMTimeV)
 
         hbox_bpm_time_v = QHBoxLayout()
@@ -408,11 +733,9 @@ class ResponseAnalyzerApp(QMainWindow):
         hbox_bpm_time_v.addWidget(btnPlotBPMTimeV)
         vbox_bpm_time.addLayout(hbox_bpm_time_v)
 
-        self.canvasBPMTimeV = MplCanvas(self, width=5, height=3)
-        self.toolbarBPMTimeV = NavigationToolbar2QT(self.canvasBPMTimeV, self)
-        vbox_bpm_time.addWidget(self.toolbarBPMTimeV)
-        vbox_bpm_time.addWidget(self.canvasBPMTimeV)
-        self.all_canvases.append(self.canvasBPMTimeV)
+        self.paneBPMTimeV = CanvasPane(self, "BPMs / Time (V)", width=5, height=3, profiler=self.profiler)
+        vbox_bpm_time.addWidget(self.paneBPMTimeV)
+        self.canvas_panes.append(self.paneBPMTimeV)
 
         # Frequency Domain sub-tab
         self.tabBPMFreq = QWidget()
@@ -424,6 +747,7 @@ class ResponseAnalyzerApp(QMainWindow):
         vbox_bpm_freq.addWidget(labelHf)
         self.listBPMFreqH = QListWidget()
         self.listBPMFreqH.setSelectionMode(QListWidget.MultiSelection)
+        self._enableBPMContextMenu(self.listBPMFreqH)
         vbox_bpm_freq.addWidget(self.listBPMFreqH)
 
         hbox_bpm_freq_h = QHBoxLayout()
@@ -435,17 +759,16 @@ class ResponseAnalyzerApp(QMainWindow):
         hbox_bpm_freq_h.addWidget(btnPlotBPMFreqH)
         vbox_bpm_freq.addLayout(hbox_bpm_freq_h)
 
-        self.canvasBPMFreqH = MplCanvas(self, width=5, height=3)
-        self.toolbarBPMFreqH = NavigationToolbar2QT(self.canvasBPMFreqH, self)
-        vbox_bpm_freq.addWidget(self.toolbarBPMFreqH)
-        vbox_bpm_freq.addWidget(self.canvasBPMFreqH)
-        self.all_canvases.append(self.canvasBPMFreqH)
+        self.paneBPMFreqH = CanvasPane(self, "BPMs / Frequency (H)", width=5, height=3, profiler=self.profiler)
+        vbox_bpm_freq.addWidget(self.paneBPMFreqH)
+        self.canvas_panes.append(self.paneBPMFreqH)
 
         # Vertical freq
         labelVf = QLabel("Select Vertical BPM(s) for Freq Plot:")
         vbox_bpm_freq.addWidget(labelVf)
         self.listBPMFreqV = QListWidget()
         self.listBPMFreqV.setSelectionMode(QListWidget.MultiSelection)
+        self._enableBPMContextMenu(self.listBPMFreqV)
         vbox_bpm_freq.addWidget(self.listBPMFreqV)
 
         hbox_bpm_freq_v = QHBoxLayout()
@@ -457,44 +780,42 @@ class ResponseAnalyzerApp(QMainWindow):
         hbox_bpm_freq_v.addWidget(btnPlotBPMFreqV)
         vbox_bpm_freq.addLayout(hbox_bpm_freq_v)
 
-        self.canvasBPMFreqV = MplCanvas(self, width=5, height=3)
-        self.toolbarBPMFreqV = NavigationToolbar2QT(self.canvasBPMFreqV, self)
-        vbox_bpm_freq.addWidget(self.toolbarBPMFreqV)
-        vbox_bpm_freq.addWidget(self.canvasBPMFreqV)
-        self.all_canvases.append(self.canvasBPMFreqV)
+        self.paneBPMFreqV = CanvasPane(self, "BPMs / Frequency (V)", width=5, height=3, profiler=self.profiler)
+        vbox_bpm_freq.addWidget(self.paneBPMFreqV)
+        self.canvas_panes.append(self.paneBPMFreqV)
 
     # BPM time/freq methods
     def onClearBPMTimeH(self):
-        self._clearPlot(self.canvasBPMTimeH)
+        self._clearPlot(self.paneBPMTimeH)
 
     def onPlotBPMTimeHSelected(self):
         self.onClearBPMTimeH()
         items = self.listBPMTimeH.selectedItems()
-        self._plotTimeDomainData(self.canvasBPMTimeH, items, self.df, "Selected Horizontal BPM(s) - Time")
+        self._plotTimeDomainData(self.paneBPMTimeH, items, self.signals, "Selected Horizontal BPM(s) - Time")
 
     def onClearBPMTimeV(self):
-        self._clearPlot(self.canvasBPMTimeV)
+        self._clearPlot(self.paneBPMTimeV)
 
     def onPlotBPMTimeVSelected(self):
         self.onClearBPMTimeV()
         items = self.listBPMTimeV.selectedItems()
-        self._plotTimeDomainData(self.canvasBPMTimeV, items, self.df, "Selected Vertical BPM(s) - Time")
+        self._plotTimeDomainData(self.paneBPMTimeV, items, self.signals, "Selected Vertical BPM(s) - Time")
 
     def onClearBPMFreqH(self):
-        self._clearPlot(self.canvasBPMFreqH)
+        self._clearPlot(self.paneBPMFreqH)
 
     def onPlotBPMFreqHSelected(self):
         self.onClearBPMFreqH()
         items = self.listBPMFreqH.selectedItems()
-        self._plotFrequencyDomainData(self.canvasBPMFreqH, items, self.df, "Selected Horizontal BPM(s) - Freq")
+        self._plotFrequencyDomainData(self.paneBPMFreqH, items, self.signals, "Selected Horizontal BPM(s) - Freq")
 
     def onClearBPMFreqV(self):
-        self._clearPlot(self.canvasBPMFreqV)
+        self._clearPlot(self.paneBPMFreqV)
 
     def onPlotBPMFreqVSelected(self):
         self.onClearBPMFreqV()
         items = self.listBPMFreqV.selectedItems()
-        self._plotFrequencyDomainData(self.canvasBPMFreqV, items, self.df, "Selected Vertical BPM(s) - Freq")
+        self._plotFrequencyDomainData(self.paneBPMFreqV, items, self.signals, "Selected Vertical BPM(s) - Freq")
 
     ###########################################################################
     # 3) Response Matrix Tab
@@ -512,17 +833,18 @@ class ResponseAnalyzerApp(QMainWindow):
         self.tabGroupResp.addTab(self.tabRM_H, "Horizontal")
         splitter_h = QSplitter(Qt.Horizontal)
 
-        self.tableRM_H = QTableWidget()
+        self.modelRM_H = ArrayTableModel(".4f", self)
+        self.tableRM_H = QTableView()
+        self.tableRM_H.setModel(self.modelRM_H)
+        self._enableBPMContextMenu(self.tableRM_H)
         splitter_h.addWidget(self.tableRM_H)
 
         right_container_h = QWidget()
         rch_layout = QVBoxLayout(right_container_h)
-        self.canvasRM_H = MplCanvas(self, width=6, height=3)
-        self.toolbarRM_H = NavigationToolbar2QT(self.canvasRM_H, self)
-        rch_layout.addWidget(self.toolbarRM_H)
-        rch_layout.addWidget(self.canvasRM_H)
+        self.paneRM_H = CanvasPane(self, "Response Matrix (H)", width=6, height=3, heatmap=True, profiler=self.profiler)
+        rch_layout.addWidget(self.paneRM_H)
         splitter_h.addWidget(right_container_h)
-        self.all_canvases.append(self.canvasRM_H)
+        self.canvas_panes.append(self.paneRM_H)
 
         layout_tab_rmh = QVBoxLayout(self.tabRM_H)
         layout_tab_rmh.addWidget(splitter_h)
@@ -540,17 +862,18 @@ class ResponseAnalyzerApp(QMainWindow):
         self.tabGroupResp.addTab(self.tabRM_V, "Vertical")
         splitter_v = QSplitter(Qt.Horizontal)
 
-        self.tableRM_V = QTableWidget()
+        self.modelRM_V = ArrayTableModel(".4f", self)
+        self.tableRM_V = QTableView()
+        self.tableRM_V.setModel(self.modelRM_V)
+        self._enableBPMContextMenu(self.tableRM_V)
         splitter_v.addWidget(self.tableRM_V)
 
         right_container_v = QWidget()
         rcv_layout = QVBoxLayout(right_container_v)
-        self.canvasRM_V = MplCanvas(self, width=6, height=3)
-        self.toolbarRM_V = NavigationToolbar2QT(self.canvasRM_V, self)
-        rcv_layout.addWidget(self.toolbarRM_V)
-        rcv_layout.addWidget(self.canvasRM_V)
+        self.paneRM_V = CanvasPane(self, "Response Matrix (V)", width=6, height=3, heatmap=True, profiler=self.profiler)
+        rcv_layout.addWidget(self.paneRM_V)
         splitter_v.addWidget(right_container_v)
-        self.all_canvases.append(self.canvasRM_V)
+        self.canvas_panes.append(self.paneRM_V)
 
         layout_tab_rmv = QVBoxLayout(self.tabRM_V)
         layout_tab_rmv.addWidget(splitter_v)
@@ -564,40 +887,30 @@ class ResponseAnalyzerApp(QMainWindow):
         layout_tab_rmv.addLayout(hbox_btn_rmv)
 
     def onSaveResponseMatrixHTable(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Horizontal RM Table", "", "CSV Files (*.csv)")
-        if not file_path:
-            return
-        try:
-            self._exportQTableWidgetToCSV(self.tableRM_H, file_path)
-        except Exception as ex:
-            QMessageBox.critical(self, "Export Error", str(ex))
+        self._exportArray("Save Horizontal RM Table", self.R_measured_H, self.actual_bpm_h, self.actual_correctors)
 
     def onSaveResponseMatrixHPlot(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Horizontal RM Plot", "", "PNG Files (*.png);;JPG Files (*.jpg)")
         if not file_path:
             return
         try:
-            self.canvasRM_H.fig.tight_layout()
-            self.canvasRM_H.fig.savefig(file_path, dpi=150, bbox_inches='tight')
+            canvas = self._ensureRendered(self.paneRM_H)
+            canvas.fig.tight_layout()
+            canvas.fig.savefig(file_path, dpi=150, bbox_inches='tight')
         except Exception as ex:
             QMessageBox.critical(self, "Save Error", str(ex))
 
     def onSaveResponseMatrixVTable(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Vertical RM Table", "", "CSV Files (*.csv)")
-        if not file_path:
-            return
-        try:
-            self._exportQTableWidgetToCSV(self.tableRM_V, file_path)
-        except Exception as ex:
-            QMessageBox.critical(self, "Export Error", str(ex))
+        self._exportArray("Save Vertical RM Table", self.R_measured_V, self.actual_bpm_v, self.actual_correctors)
 
     def onSaveResponseMatrixVPlot(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Vertical RM Plot", "", "PNG Files (*.png);;JPG Files (*.jpg)")
         if not file_path:
             return
         try:
-            self.canvasRM_V.fig.tight_layout()
-            self.canvasRM_V.fig.savefig(file_path, dpi=150, bbox_inches='tight')
+            canvas = self._ensureRendered(self.paneRM_V)
+            canvas.fig.tight_layout()
+            canvas.fig.savefig(file_path, dpi=150, bbox_inches='tight')
         except Exception as ex:
             QMessageBox.critical(self, "Save Error", str(ex))
 
@@ -616,80 +929,251 @@ class ResponseAnalyzerApp(QMainWindow):
         self.tabErrH = QWidget()
         self.tabGroupErrors.addTab(self.tabErrH, "Horizontal")
         splitter_errh = QSplitter(Qt.Horizontal)
-        self.tableErrH = QTableWidget()
+        self.modelErrH = ArrayTableModel(".4e", self)
+        self.tableErrH = QTableView()
+        self.tableErrH.setModel(self.modelErrH)
+        self._enableBPMContextMenu(self.tableErrH)
         splitter_errh.addWidget(self.tableErrH)
 
         right_container_errh = QWidget()
         rceh_layout = QVBoxLayout(right_container_errh)
-        self.canvasErrH = MplCanvas(self, width=5, height=3)
-        self.toolbarErrH = NavigationToolbar2QT(self.canvasErrH, self)
-        rceh_layout.addWidget(self.toolbarErrH)
-        rceh_layout.addWidget(self.canvasErrH)
+        self.paneErrH = CanvasPane(self, "Errors (H)", width=5, height=3, heatmap=True, profiler=self.profiler)
+        rceh_layout.addWidget(self.paneErrH)
         splitter_errh.addWidget(right_container_errh)
-        self.all_canvases.append(self.canvasErrH)
+        self.canvas_panes.append(self.paneErrH)
 
         layout_tab_errh = QVBoxLayout(self.tabErrH)
         layout_tab_errh.addWidget(splitter_errh)
+        btnSaveErrH_Table = QPushButton("Save Table (H)")
+        btnSaveErrH_Table.clicked.connect(self.onSaveErrorHTable)
+        layout_tab_errh.addWidget(btnSaveErrH_Table)
 
         # Vertical
         self.tabErrV = QWidget()
         self.tabGroupErrors.addTab(self.tabErrV, "Vertical")
         splitter_errv = QSplitter(Qt.Horizontal)
-        self.tableErrV = QTableWidget()
+        self.modelErrV = ArrayTableModel(".4e", self)
+        self.tableErrV = QTableView()
+        self.tableErrV.setModel(self.modelErrV)
+        self._enableBPMContextMenu(self.tableErrV)
         splitter_errv.addWidget(self.tableErrV)
 
         right_container_errv = QWidget()
         rcev_layout = QVBoxLayout(right_container_errv)
-        self.canvasErrV = MplCanvas(self, width=5, height=3)
-        self.toolbarErrV = NavigationToolbar2QT(self.canvasErrV, self)
-        rcev_layout.addWidget(self.toolbarErrV)
-        rcev_layout.addWidget(self.canvasErrV)
+        self.paneErrV = CanvasPane(self, "Errors (V)", width=5, height=3, heatmap=True, profiler=self.profiler)
+        rcev_layout.addWidget(self.paneErrV)
         splitter_errv.addWidget(right_container_errv)
-        self.all_canvases.append(self.canvasErrV)
+        self.canvas_panes.append(self.paneErrV)
 
         layout_tab_errv = QVBoxLayout(self.tabErrV)
         layout_tab_errv.addWidget(splitter_errv)
+        btnSaveErrV_Table = QPushButton("Save Table (V)")
+        btnSaveErrV_Table.clicked.connect(self.onSaveErrorVTable)
+        layout_tab_errv.addWidget(btnSaveErrV_Table)
 
     ###########################################################################
-    # CSV Export
+    # Orbit Correction Tab
     ###########################################################################
-    def _exportQTableWidgetToCSV(self, tableWidget, csv_file_path):
-        import csv
-        row_count = tableWidget.rowCount()
-        col_count = tableWidget.columnCount()
-
-        col_headers = []
-        for c in range(col_count):
-            hdr_item = tableWidget.horizontalHeaderItem(c)
-            if hdr_item:
-                col_headers.append(hdr_item.text())
-            else:
-                col_headers.append(f"Column_{c}")
-
-        row_labels = []
-        for r in range(row_count):
-            vh_item = tableWidget.verticalHeaderItem(r)
-            if vh_item:
-                row_labels.append(vh_item.text())
-            else:
-                row_labels.append(f"Row_{r}")
-
-        top_row = [""] + col_headers
-        with open(csv_file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(top_row)
-            for r in range(row_count):
-                row_data = [row_labels[r]]
-                for c in range(col_count):
-                    item = tableWidget.item(r, c)
-                    cell_text = item.text() if item else ""
-                    row_data.append(cell_text)
-                writer.writerow(row_data)
+    def _createOrbitCorrectionTab(self):
+        self.tabOrbit = QWidget()
+        self.mainTabs.addTab(self.tabOrbit, "Orbit Correction")
+        vbox_orbit = QVBoxLayout(self.tabOrbit)
+
+        hbox_settings = QHBoxLayout()
+        hbox_settings.addWidget(QLabel("Plane:"))
+        self.comboOrbitPlane = QComboBox()
+        self.comboOrbitPlane.addItems(["Horizontal", "Vertical"])
+        self.comboOrbitPlane.currentIndexChanged.connect(self.onOrbitPlaneChanged)
+        hbox_settings.addWidget(self.comboOrbitPlane)
+        hbox_settings.addWidget(QLabel("Singular values kept (0 = all):"))
+        self.spinOrbitRank = QSpinBox()
+        self.spinOrbitRank.setRange(0, 100000)
+        self.spinOrbitRank.valueChanged.connect(self.onOrbitRegularizationChanged)
+        hbox_settings.addWidget(self.spinOrbitRank)
+        hbox_settings.addWidget(QLabel("Tikhonov alpha (0 = off):"))
+        self.spinOrbitTikhonov = QDoubleSpinBox()
+        self.spinOrbitTikhonov.setDecimals(6)
+        self.spinOrbitTikhonov.setRange(0.0, 1e9)
+        self.spinOrbitTikhonov.valueChanged.connect(self.onOrbitRegularizationChanged)
+        hbox_settings.addWidget(self.spinOrbitTikhonov)
+        hbox_settings.addStretch()
+        vbox_orbit.addLayout(hbox_settings)
+
+        splitter_orbit = QSplitter(Qt.Horizontal)
+        # one row of corrector kicks per corrected orbit
+        self.modelKicks = ArrayTableModel(".6g", self)
+        self.tableKicks = QTableView()
+        self.tableKicks.setModel(self.modelKicks)
+        splitter_orbit.addWidget(self.tableKicks)
+        self.paneSingularValues = CanvasPane(self, "Singular Values", width=5, height=3, profiler=self.profiler)
+        splitter_orbit.addWidget(self.paneSingularValues)
+        self.canvas_panes.append(self.paneSingularValues)
+        vbox_orbit.addWidget(splitter_orbit)
+
+        self.orbitStatusLabel = QLabel("Analyze a measurement, then correct an orbit history.")
+        vbox_orbit.addWidget(self.orbitStatusLabel)
+
+        hbox_btn_orbit = QHBoxLayout()
+        btnBPMHistory = QPushButton("Correct Loaded BPM History")
+        btnBPMHistory.clicked.connect(self.onCorrectLoadedHistory)
+        hbox_btn_orbit.addWidget(btnBPMHistory)
+        btnOrbitFile = QPushButton("Load Orbit File...")
+        btnOrbitFile.clicked.connect(self.onLoadOrbitFile)
+        hbox_btn_orbit.addWidget(btnOrbitFile)
+        btnSaveKicks = QPushButton("Save Kicks")
+        btnSaveKicks.clicked.connect(self.onSaveKicks)
+        hbox_btn_orbit.addWidget(btnSaveKicks)
+        vbox_orbit.addLayout(hbox_btn_orbit)
+
+    def _orbitPlane(self):
+        """('H' or 'V', measured R, BPM columns) of the plane selected in the tab."""
+        if self.comboOrbitPlane.currentIndex() == 0:
+            return "H", self.R_measured_H, self.actual_bpm_h
+        return "V", self.R_measured_V, self.actual_bpm_v
+
+    def _syncOrbitCorrector(self):
+        """Solver of the selected plane, synced with its current R and settings (None without R)."""
+        plane, R, _ = self._orbitPlane()
+        if R is None or R.size == 0:
+            return None
+        corrector = self.orbit_correctors[plane]
+        corrector.set_regularization(self.spinOrbitRank.value() or None, self.spinOrbitTikhonov.value())
+        corrector.set_matrix(R)  # refactorizes only if R changed
+        return corrector
+
+    def _orbitCorrector(self):
+        corrector = self._syncOrbitCorrector()
+        self._markCanvasStale(self.paneSingularValues, self._renderSingularValues)
+        return corrector
+
+    def _renderSingularValues(self, canvas):
+        plane = self._orbitPlane()[0]
+        corrector = self._syncOrbitCorrector()
+        canvas.axes.clear()
+        if corrector is not None:
+            s = corrector.singular_values()
+            kept = corrector.kept_rank()
+            index = np.arange(1, s.size + 1)
+            canvas.axes.semilogy(index, s, "o-", color="gray", label="dropped")
+            canvas.axes.semilogy(index[:kept], s[:kept], "o", label="kept")
+            canvas.axes.legend(loc="best")
+        canvas.axes.set_title(f"Singular Values of R ({plane})")
+        canvas.axes.set_xlabel("index")
+        canvas.draw_idle()
+
+    def _correctOrbits(self, orbits, source):
+        """Compute and show the kicks of an (n_orbits x n_bpm) history for the selected plane."""
+        corrector = self._orbitCorrector()
+        if corrector is None:
+            QMessageBox.warning(self, "Orbit Correction", "No response matrix for this plane yet.")
+            return
+        t0 = time.perf_counter()
+        kicks = corrector.kicks(orbits)
+        elapsed = time.perf_counter() - t0
+        after = corrector.corrected(orbits, kicks)
+        self._lastOrbits = (self.comboOrbitPlane.currentIndex(), orbits, source)
+        self.modelKicks.setArray(kicks, [str(i) for i in range(len(kicks))], self.actual_correctors)
+
+        plane, R, _ = self._orbitPlane()
+        n_values = min(R.shape)
+        alpha = self.spinOrbitTikhonov.value()
+        self.orbitStatusLabel.setText(
+            f"{plane}: {corrector.kept_rank()}/{n_values} singular values ({corrector.method()} SVD"
+            + (f", Tikhonov alpha {alpha:g}" if alpha > 0 else "") + f"); {source}: "
+            f"{len(orbits)} orbit(s) -> kicks in {elapsed * 1e6:.0f} us; "
+            f"RMS orbit {np.sqrt(np.mean(orbits**2)):.4g} -> {np.sqrt(np.mean(after**2)):.4g}"
+        )
+
+    def onCorrectLoadedHistory(self):
+        """Replay the loaded BPM readings of the plane as a recorded orbit history."""
+        if self.signals is None:
+            QMessageBox.warning(self, "Orbit Correction", "Load a CSV first.")
+            return
+        _, _, bpms = self._orbitPlane()
+        self._correctOrbits(self.signals.rows(bpms, dtype=float).T, "loaded BPM history")
+
+    def onLoadOrbitFile(self):
+        _, R, bpms = self._orbitPlane()
+        if R is None:
+            QMessageBox.warning(self, "Orbit Correction", "No response matrix for this plane yet.")
+            return
+        fname, _ = QFileDialog.getOpenFileName(self, "Open Orbit File", "", "Orbit Files (*.csv *.npy)")
+        if not fname:
+            return
+        from measurement_io import read_orbit_history
+        try:
+            orbits = read_orbit_history(fname, bpms)
+        except Exception as ex:
+            QMessageBox.critical(self, "File Error", f"Could not read orbits:\n{ex}")
+            return
+        self._correctOrbits(orbits, os.path.basename(fname))
+
+    def onOrbitRegularizationChanged(self):
+        """Rebuild the pseudo-inverse from the cached SVD and redo the last correction."""
+        if self._lastOrbits is not None and self._lastOrbits[0] == self.comboOrbitPlane.currentIndex():
+            self._correctOrbits(self._lastOrbits[1], self._lastOrbits[2])
+        else:
+            self._orbitCorrector()
+
+    def onOrbitPlaneChanged(self):
+        self.modelKicks.setArray(None)
+        self._lastOrbits = None
+        self.orbitStatusLabel.setText("")
+        self._orbitCorrector()
+
+    def onSaveKicks(self):
+        kicks = self.modelKicks.array()
+        self._exportArray("Save Corrector Kicks", kicks if kicks.size else None,
+                          self.modelKicks.rowLabels(), self.modelKicks.columnLabels(), "orbit")
+
+    def onSaveErrorHTable(self):
+        self._exportArray("Save Horizontal Error Table", self.ERR_measured_H, self.actual_bpm_h, self.actual_correctors)
+
+    def onSaveErrorVTable(self):
+        self._exportArray("Save Vertical Error Table", self.ERR_measured_V, self.actual_bpm_v, self.actual_correctors)
+
+    ###########################################################################
+    # Result Export
+    ###########################################################################
+    def _exportArray(self, title, values, row_labels, col_labels, index_name=""):
+        """Ask for a file and write a labelled result array at full precision."""
+        if values is None:
+            QMessageBox.warning(self, "Export Error", "Nothing to export yet - load and analyze a CSV first.")
+            return None
+        from matrix_export import export_filters, extension_for_filter, export_table
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, title, "", export_filters())
+        if not file_path:
+            return None
+        if not os.path.splitext(file_path)[1]:
+            file_path += extension_for_filter(selected_filter)
+        try:
+            export_table(file_path, values, row_labels, col_labels, index_name)
+        except Exception as ex:
+            QMessageBox.critical(self, "Export Error", str(ex))
+            return None
+        return file_path
+
+    def onExportAllResults(self):
+        """Write every matrix, noise vector and label of the last analysis to one .npz."""
+        if self.analysis_result is None:
+            QMessageBox.warning(self, "Export Error", "Nothing to export yet - load and analyze a CSV first.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export All Results", "", "NumPy Archive (*.npz)")
+        if not file_path:
+            return
+        if not file_path.lower().endswith(".npz"):
+            file_path += ".npz"
+        try:
+            from matrix_export import export_result_bundle
+            export_result_bundle(file_path, self.analysis_result)
+            QMessageBox.information(self, "Export Successful", f"Results exported to {file_path}")
+        except Exception as ex:
+            QMessageBox.critical(self, "Export Error", str(ex))
 
     ###########################################################################
     # Plot Font Helper
     ###########################################################################
-    def _applyPlotFont(self, canvas: MplCanvas):
+    def _applyPlotFont(self, canvas):
         """Adjust axis label/title/tick fonts to the chosen size."""
         fs = self.plot_font_size
         canvas.axes.set_xlabel(canvas.axes.get_xlabel(), fontsize=fs)
@@ -700,297 +1184,277 @@ class ResponseAnalyzerApp(QMainWindow):
     ###########################################################################
     # Analysis Pipeline
     ###########################################################################
-    def performAnalysis(self):
-        if self.df is None:
+    def performAnalysis(self, profile_path=None):
+        """
+        Start the numeric pipeline on a worker thread; a running analysis is cancelled.
+        A result archived for the same data, device lists and settings is shown
+        instead of recomputing it; that leaves the stage graph empty, so the next
+        change of inputs recomputes every stage once. Stage timings are recorded (except for live
+        refreshes); with profile_path the whole run is recomputed from scratch (not
+        from the cached stage graph) on one thread and captured with cProfile.
+        """
+        if self.signals is None:
             return
+        self.cancelAnalysis()
+
+        recorder = None
+        if self._liveReader is None:
+            recorder = RunRecorder(
+                "analysis", trace_memory=self.trace_memory, file=self.importedFileEdit.text(),
+                engine=self.orm_engine_mode,
+                workers=self.analysis_workers if profile_path is None else 1,
+                samples=len(self.signals), correctors=len(self.actual_correctors),
+                bpm_h=len(self.actual_bpm_h), bpm_v=len(self.actual_bpm_v),
+            ).start()
+        worker = AnalysisWorker(
+            self.signals, self.actual_correctors, self.actual_bpm_h, self.actual_bpm_v,
+            self.orm_engine_mode, self.spectra, parent=self,
+            recorder=recorder, profile_path=profile_path, noise_mask=self.noise_mask,
+            graph=self.analysis_graph, workers=self.analysis_workers,
+            lookup=self._resultLookup() if profile_path is None else None
+        )
+        worker.progress.connect(self._onAnalysisProgress)
+        worker.resultReady.connect(self._onAnalysisFinished)
+        worker.failed.connect(self._onAnalysisFailed)
+        worker.cancelled.connect(self._onAnalysisCancelled)
+        if recorder is not None:
+            # a cancelled run may still be inside a stage: stop tracing once it has ended
+            worker.finished.connect(recorder.finish)
+        worker.finished.connect(worker.deleteLater)
+        self._analysisWorker = worker
+
+        self.analysisProgress.setValue(0)
+        self.btnCancelAnalysis.setEnabled(True)
+        worker.start()
+
+    def cancelAnalysis(self):
+        """Stop a running analysis; its late signals are ignored."""
+        worker = self._analysisWorker
+        if worker is None:
+            return
+        self._analysisWorker = None
+        worker.cancel()
+        self.btnCancelAnalysis.setEnabled(False)
+        self.analysisStatusLabel.setText("Analysis cancelled")
 
-        # 1) compute corrector & BPM errors
-        self.computeCorrectorErrors()
-        self.computeBPMErrors()
-
-        # 2) fill corrector param table
-        self.fillCorrectorParameters()
-
-        # 3) user can selectively plot correctors & BPM
-
-        # 4) build response matrix
-        self.buildResponseMatrix()
+    def _clearAnalysisResults(self):
+        self.analysis_result = None
+        self.corrector_errors = {}
+        self.bpm_errors = {}
+        self.corrector_params = None
+        self.R_measured_H = self.R_measured_V = None
+        self.ERR_measured_H = self.ERR_measured_V = None
+        self.bpm_amplitudes_H = self.bpm_amplitudes_V = None
+        self.corr_amplitudes_H = self.corr_amplitudes_V = None
+        self.modelKicks.setArray(None)
+        self._lastOrbits = None
+
+    def closeEvent(self, event):
+        self.stopLive()
+        worker = self._analysisWorker
+        self.cancelAnalysis()
+        if worker is not None:
+            worker.wait()
+        super().closeEvent(event)
+
+    def isAnalysisRunning(self):
+        return self._analysisWorker is not None
+
+    def _isCurrentWorker(self):
+        return self.sender() is not None and self.sender() is self._analysisWorker
+
+    def _onAnalysisProgress(self, stage, percent):
+        if not self._isCurrentWorker():
+            return
+        self.analysisStatusLabel.setText(f"Analysis: {stage}")
+        self.analysisProgress.setValue(percent)
 
-        # 5) build error matrix
-        self.buildORMErrorMatrix()
+    def _onAnalysisFailed(self, message):
+        if not self._isCurrentWorker():
+            return
+        if self._analysisWorker.recorder is not None:
+            self._analysisWorker.recorder.finish()
+        self._analysisWorker = None
+        self.btnCancelAnalysis.setEnabled(False)
+        self.analysisStatusLabel.setText("Analysis failed")
+        QMessageBox.critical(self, "Analysis Error", message)
+
+    def _onAnalysisCancelled(self):
+        if self.sender() is self._analysisWorker:
+            self._analysisWorker = None
+            self.btnCancelAnalysis.setEnabled(False)
+            self.analysisStatusLabel.setText("Analysis cancelled")
+
+    def _onAnalysisFinished(self, result):
+        """Worker finished: take over its results and render them on the GUI thread."""
+        if not self._isCurrentWorker():
+            return
+        worker = self._analysisWorker
+        self._analysisWorker = None
+        self.btnCancelAnalysis.setEnabled(False)
+
+        self._applyAnalysisResult(result, worker.recorder)
+        self.analysisProgress.setValue(100)
+        if worker.dataDigest is not None:
+            self._dataDigest = worker.dataDigest  # hashed once per loaded file
+        if self._liveReader is not None:
+            self.analysisStatusLabel.setText(self._liveStatus())
+        elif worker.fromStore:
+            # the archive holds the matrices, not the spectra and tones the stages
+            # start from, so self.analysis_graph stays empty until the next full run
+            self.analysisStatusLabel.setText("Analysis loaded from result store")
+        else:
+            self.analysisStatusLabel.setText("Analysis done")
+            self._archiveResult(result, worker.storeKey, worker.dataDigest)
+        if worker.profile_path is not None:
+            self._showProfile(worker.profile_path)
+
+    def _applyAnalysisResult(self, result, recorder=None):
+        """
+        Take over an AnalysisResult and render its tables and visible plots.
+        Arrays the analysis graph did not recompute are the same objects as in
+        the previous result, and their tables and plots are left as they are.
+        """
+        previous = self.analysis_result
+        changed = {name for name in ("corrector_params", "R_measured_H", "R_measured_V",
+                                     "ERR_measured_H", "ERR_measured_V")
+                   if previous is None or getattr(previous, name) is not getattr(result, name)}
+        self.analysis_result = result
+        self.corrector_errors = result.corrector_errors
+        self.bpm_errors = result.bpm_errors
+        self.corrector_params = result.corrector_params
+        self.R_measured_H = result.R_measured_H
+        self.R_measured_V = result.R_measured_V
+        self.ERR_measured_H = result.ERR_measured_H
+        self.ERR_measured_V = result.ERR_measured_V
+        self.bpm_amplitudes_H = result.bpm_amplitudes_H
+        self.bpm_amplitudes_V = result.bpm_amplitudes_V
+        self.corr_amplitudes_H = result.corr_amplitudes_H
+        self.corr_amplitudes_V = result.corr_amplitudes_V
+
+        self.analysisStatusLabel.setText("Analysis: rendering")
+        if recorder is not None:
+            # hidden heatmaps are drawn when their tab is opened, so this is mostly tables
+            with recorder.stage("Render tables and visible plots", R_H=np.shape(self.R_measured_H),
+                                R_V=np.shape(self.R_measured_V), changed=len(changed)):
+                self._renderChanged(changed)
+            self._finishRun(recorder)
+        else:
+            self._renderChanged(changed)
+
+    def _renderChanged(self, changed):
+        if "corrector_params" in changed:
+            self.fillCorrectorParameters()
+        self.buildResponseMatrix([p for p in ("H", "V") if "R_measured_" + p in changed])
+        self.buildORMErrorMatrix([p for p in ("H", "V") if "ERR_measured_" + p in changed])
 
-    def computeCorrectorErrors(self):
-        """For each corrector: remove dominant freq → RMS remainder => error."""
-        self.corrector_errors.clear()
-        for cdev in self.actual_correctors:
-            data = self.df[cdev].values
-            fft_c = fft(data)
-            amp_c = np.abs(fft_c)
-            idx_max_c = np.argmax(amp_c[1:]) + 1
-            amp_c[idx_max_c] = 0
-            remainder = amp_c
-            rms_err = np.sqrt(np.mean(remainder**2))
-            self.corrector_errors[cdev] = rms_err
-
-    def computeBPMErrors(self):
-        """For each BPM: remove each corrector's freq → RMS remainder => error."""
-        self.bpm_errors.clear()
-
-        # gather correctors' freq
-        corr_freqs = {}
-        for cdev in self.actual_correctors:
-            data_c = self.df[cdev].values
-            fft_c = fft(data_c)
-            amp_c = np.abs(fft_c)
-            idx_max_c = np.argmax(amp_c[1:]) + 1
-            freq_c = np.fft.fftfreq(len(data_c), d=1.0)[idx_max_c]
-            corr_freqs[cdev] = freq_c
-        all_corr_freqs = list(corr_freqs.values())
-
-        for bdev in (self.actual_bpm_h + self.actual_bpm_v):
-            data_b = self.df[bdev].values
-            fft_b = fft(data_b)
-            amp_b = np.abs(fft_b)
-            N = len(data_b)
-            freq_b = np.fft.fftfreq(N, d=1.0)
-            for fc in all_corr_freqs:
-                idx_near = np.argmin(np.abs(freq_b - fc))
-                amp_b[idx_near] = 0
-            remainder = amp_b
-            rms_err = np.sqrt(np.mean(remainder**2))
-            self.bpm_errors[bdev] = rms_err
+    ###########################################################################
+    # Instrumentation
+    ###########################################################################
+    def _finishRun(self, recorder):
+        """Stop a run's recording, log it and show its summary in the status row."""
+        recorder.finish()
+        try:
+            recorder.append_to_log()
+        except OSError:
+            pass  # the summary is still shown
+        if recorder.kind == "load":
+            self._runSummaries = {}
+        self._runSummaries[recorder.kind] = recorder
+        runs = list(self._runSummaries.values())
+        self.runSummaryLabel.setText(" | ".join(r.summary() for r in runs))
+        self.runSummaryLabel.setToolTip("\n\n".join(r.details() for r in runs))
+
+    def onTraceMemoryToggled(self, checked):
+        """Record each stage's peak memory (tracemalloc) from the next load or analysis on."""
+        self.trace_memory = checked
+
+    def onProfileAnalysis(self):
+        """Re-run the analysis of the loaded file under cProfile and save the stats."""
+        if self.signals is None:
+            QMessageBox.warning(self, "Profile Analysis", "Load a CSV first.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save cProfile Stats", "analysis.prof",
+                                              "Profile Stats (*.prof)")
+        if path:
+            self.performAnalysis(profile_path=path)
+
+    def _showProfile(self, path):
+        box = QMessageBox(self)
+        box.setWindowTitle("Analysis Profile")
+        box.setText(f"cProfile stats saved to {path}\n(open with pstats or snakeviz).\n"
+                    "The profiled run used one thread: cProfile does not see worker threads.")
+        try:
+            box.setDetailedText(profile_report(path))
+        except (OSError, TypeError, ValueError) as ex:
+            box.setDetailedText(str(ex))
+        box.exec_()
 
     def fillCorrectorParameters(self):
         """Fill a table with corrector name, freq idx, etc."""
+        self.modelCorrParams.setParameters(
+            self.actual_correctors, self.corrector_params, CORRECTOR_PARAM_COLUMNS
+        )
+
+    def _showHeatmap(self, pane: CanvasPane, values, row_labels, col_labels, title):
+        """Update a heatmap in place; hidden heatmaps are only updated once shown."""
+        self._markCanvasStale(
+            pane, lambda canvas: canvas.set_matrix(values, row_labels, col_labels, title)
+        )
+
+    def buildResponseMatrix(self, planes=("H", "V")):
+        """Show the orbit response matrices (tables + heatmaps) of the given planes."""
+        if self.R_measured_H is None or self.R_measured_V is None or not planes:
+            return
         corr = self.actual_correctors
-        self.tableCorrParams.setRowCount(len(corr))
-        self.tableCorrParams.setColumnCount(5)
-        self.tableCorrParams.setHorizontalHeaderLabels([
-            "Corrector", "Peak-to-Peak", "Dominant Freq Idx", "Dominant Freq (Hz)", "Max FFT Amp"
-        ])
-
-        for i, cdev in enumerate(corr):
-            data = self.df[cdev].values
-            p2p = data.max() - data.min()
-            fft_data = fft(data)
-            fft_amp = np.abs(fft_data)
-            idx_max = np.argmax(fft_amp[1:]) + 1
-            max_val = fft_amp[idx_max]
-            freq_arr = np.fft.fftfreq(len(data), d=1.0)
-            dom_freq = freq_arr[idx_max]
-
-            self.tableCorrParams.setItem(i, 0, QTableWidgetItem(cdev))
-            self.tableCorrParams.setItem(i, 1, QTableWidgetItem(f"{p2p:.3f}"))
-            self.tableCorrParams.setItem(i, 2, QTableWidgetItem(str(idx_max)))
-            self.tableCorrParams.setItem(i, 3, QTableWidgetItem(f"{dom_freq:.3f}"))
-            self.tableCorrParams.setItem(i, 4, QTableWidgetItem(f"{max_val:.3f}"))
-
-    def buildResponseMatrix(self):
-        """Compute orbit response matrix with BPM_amp / Corr_amp at corrector freq."""
-        corr = self.actual_correctors
-        freq_c_list = []
-        amp_c_list = []
-        for cdev in corr:
-            data_c = self.df[cdev].values
-            fft_c = fft(data_c)
-            amp_c = np.abs(fft_c)
-            idx_max_c = np.argmax(amp_c[1:]) + 1
-            freq_c = np.fft.fftfreq(len(data_c), d=1.0)[idx_max_c]
-            freq_c_list.append(freq_c)
-            amp_c_list.append(amp_c[idx_max_c])
 
         # Horizontal
-        bpmh = self.actual_bpm_h
-        nBPM_H = len(bpmh)
-        nCorr = len(corr)
-        self.R_measured_H = np.zeros((nBPM_H, nCorr), dtype=float)
-        self.bpm_amplitudes_H = np.zeros((nBPM_H, nCorr), dtype=float)
-        self.corr_amplitudes_H = np.zeros((nBPM_H, nCorr), dtype=float)
-
-        self.tableRM_H.setRowCount(nBPM_H)
-        self.tableRM_H.setColumnCount(nCorr)
-        self.tableRM_H.setVerticalHeaderLabels(bpmh)
-        self.tableRM_H.setHorizontalHeaderLabels(corr)
-
-        for j, cdev in enumerate(corr):
-            freq_c = freq_c_list[j]
-            corr_amp = amp_c_list[j]
-            for i, bdev in enumerate(bpmh):
-                data_b = self.df[bdev].values
-                fft_b = fft(data_b)
-                amp_b = np.abs(fft_b)
-                N = len(data_b)
-                freq_b = np.fft.fftfreq(N, d=1.0)
-                idx_near = np.argmin(np.abs(freq_b - freq_c))
-                bpm_amp = amp_b[idx_near]
-                self.bpm_amplitudes_H[i, j] = bpm_amp
-                self.corr_amplitudes_H[i, j] = corr_amp
-                Rij = bpm_amp / corr_amp if corr_amp != 0 else 0.0
-                self.R_measured_H[i, j] = Rij
-                self.tableRM_H.setItem(i, j, QTableWidgetItem(f"{Rij:.4f}"))
-
-        # Plot heatmap
-        self.canvasRM_H.axes.clear()
-        if self.R_measured_H.size > 0:
-            im = self.canvasRM_H.axes.imshow(self.R_measured_H, aspect='auto', cmap='jet')
-            self.canvasRM_H.axes.set_title("Horizontal Orbit Response")
-            self._applyPlotFont(self.canvasRM_H)
-            self.canvasRM_H.axes.set_xticks(range(nCorr))
-            self.canvasRM_H.axes.set_yticks(range(nBPM_H))
-            self.canvasRM_H.axes.set_xticklabels(corr, rotation=90)
-            self.canvasRM_H.axes.set_yticklabels(bpmh)
-            self.canvasRM_H.fig.colorbar(im, ax=self.canvasRM_H.axes, orientation='vertical')
-        self.canvasRM_H.fig.tight_layout()
-        self.canvasRM_H.draw()
+        if "H" in planes:
+            bpmh = self.actual_bpm_h
+            self.modelRM_H.setArray(self.R_measured_H, bpmh, corr)
+            self._showHeatmap(self.paneRM_H, self.R_measured_H, bpmh, corr, "Horizontal Orbit Response")
 
         # Vertical
-        bpmv = self.actual_bpm_v
-        nBPM_V = len(bpmv)
-        self.R_measured_V = np.zeros((nBPM_V, nCorr), dtype=float)
-        self.bpm_amplitudes_V = np.zeros((nBPM_V, nCorr), dtype=float)
-        self.corr_amplitudes_V = np.zeros((nBPM_V, nCorr), dtype=float)
-
-        self.tableRM_V.setRowCount(nBPM_V)
-        self.tableRM_V.setColumnCount(nCorr)
-        self.tableRM_V.setVerticalHeaderLabels(bpmv)
-        self.tableRM_V.setHorizontalHeaderLabels(corr)
-
-        for j, cdev in enumerate(corr):
-            freq_c = freq_c_list[j]
-            corr_amp = amp_c_list[j]
-            for i, bdev in enumerate(bpmv):
-                data_b = self.df[bdev].values
-                fft_b = fft(data_b)
-                amp_b = np.abs(fft_b)
-                N = len(data_b)
-                freq_b = np.fft.fftfreq(N, d=1.0)
-                idx_near = np.argmin(np.abs(freq_b - freq_c))
-                bpm_amp = amp_b[idx_near]
-                self.bpm_amplitudes_V[i, j] = bpm_amp
-                self.corr_amplitudes_V[i, j] = corr_amp
-                Rij = bpm_amp / corr_amp if corr_amp != 0.0 else 0.0
-                self.R_measured_V[i, j] = Rij
-                self.tableRM_V.setItem(i, j, QTableWidgetItem(f"{Rij:.4f}"))
-
-        self.canvasRM_V.axes.clear()
-        if self.R_measured_V.size > 0:
-            im2 = self.canvasRM_V.axes.imshow(self.R_measured_V, aspect='auto', cmap='jet')
-            self.canvasRM_V.axes.set_title("Vertical Orbit Response")
-            self._applyPlotFont(self.canvasRM_V)
-            self.canvasRM_V.axes.set_xticks(range(nCorr))
-            self.canvasRM_V.axes.set_yticks(range(nBPM_V))
-            self.canvasRM_V.axes.set_xticklabels(corr, rotation=90)
-            self.canvasRM_V.axes.set_yticklabels(bpmv)
-            self.canvasRM_V.fig.colorbar(im2, ax=self.canvasRM_V.axes, orientation='vertical')
-        self.canvasRM_V.fig.tight_layout()
-        self.canvasRM_V.draw()
-
-    def buildORMErrorMatrix(self):
-        """Propagate errors for each R_ij = BPM_amp / Corr_amp."""
-        if self.R_measured_H is None or self.R_measured_V is None:
+        if "V" in planes:
+            bpmv = self.actual_bpm_v
+            self.modelRM_V.setArray(self.R_measured_V, bpmv, corr)
+            self._showHeatmap(self.paneRM_V, self.R_measured_V, bpmv, corr, "Vertical Orbit Response")
+
+        # the SVD of the new matrices is only computed once the orbit tab shows it
+        self._markCanvasStale(self.paneSingularValues, self._renderSingularValues)
+
+    def buildORMErrorMatrix(self, planes=("H", "V")):
+        """Show the propagated ORM errors (tables + heatmaps) of the given planes."""
+        if self.ERR_measured_H is None or self.ERR_measured_V is None:
             return
 
+        # Labels come from the device lists the matrices were built from
+        corr = self.actual_correctors
+
         # Horizontal
-        shape_h = self.R_measured_H.shape
-        self.ERR_measured_H = np.zeros(shape_h, dtype=float)
-
-        row_labels_h = [self.tableRM_H.verticalHeaderItem(r).text() for r in range(shape_h[0])]
-        col_labels_h = [self.tableRM_H.horizontalHeaderItem(c).text() for c in range(shape_h[1])]
-
-        for i, bpm_dev in enumerate(row_labels_h):
-            for j, cdev in enumerate(col_labels_h):
-                BPM_amp = self.bpm_amplitudes_H[i, j]
-                Corr_amp = self.corr_amplitudes_H[i, j]
-                eb = self.bpm_errors.get(bpm_dev, 0)
-                ec = self.corrector_errors.get(cdev, 0)
-
-                if Corr_amp == 0:
-                    self.ERR_measured_H[i, j] = 0.0
-                else:
-                    dR2 = (eb**2)/(Corr_amp**2) + ((BPM_amp**2)/(Corr_amp**4))*(ec**2)
-                    self.ERR_measured_H[i, j] = np.sqrt(dR2)
-
-        self.tableErrH.setRowCount(shape_h[0])
-        self.tableErrH.setColumnCount(shape_h[1])
-        self.tableErrH.setVerticalHeaderLabels(row_labels_h)
-        self.tableErrH.setHorizontalHeaderLabels(col_labels_h)
-
-        for r in range(shape_h[0]):
-            for c in range(shape_h[1]):
-                val = self.ERR_measured_H[r, c]
-                self.tableErrH.setItem(r, c, QTableWidgetItem(f"{val:.4e}"))
-
-        self.canvasErrH.axes.clear()
-        if self.ERR_measured_H.size > 0:
-            im_h = self.canvasErrH.axes.imshow(self.ERR_measured_H, aspect='auto', cmap='jet')
-            self.canvasErrH.axes.set_title("Horizontal ORM Error")
-            self._applyPlotFont(self.canvasErrH)
-            self.canvasErrH.axes.set_xticks(range(shape_h[1]))
-            self.canvasErrH.axes.set_yticks(range(shape_h[0]))
-            self.canvasErrH.axes.set_xticklabels(col_labels_h, rotation=90)
-            self.canvasErrH.axes.set_yticklabels(row_labels_h)
-            self.canvasErrH.fig.colorbar(im_h, ax=self.canvasErrH.axes, orientation='vertical')
-        self.canvasErrH.fig.tight_layout()
-        self.canvasErrH.draw()
+        if "H" in planes:
+            bpmh = self.actual_bpm_h
+            self.modelErrH.setArray(self.ERR_measured_H, bpmh, corr)
+            self._showHeatmap(self.paneErrH, self.ERR_measured_H, bpmh, corr, "Horizontal ORM Error")
 
         # Vertical
-        shape_v = self.R_measured_V.shape
-        self.ERR_measured_V = np.zeros(shape_v, dtype=float)
-
-        row_labels_v = [self.tableRM_V.verticalHeaderItem(r).text() for r in range(shape_v[0])]
-        col_labels_v = [self.tableRM_V.horizontalHeaderItem(c).text() for c in range(shape_v[1])]
-
-        for i, bpm_dev in enumerate(row_labels_v):
-            for j, cdev in enumerate(col_labels_v):
-                BPM_amp = self.bpm_amplitudes_V[i, j]
-                Corr_amp = self.corr_amplitudes_V[i, j]
-                eb = self.bpm_errors.get(bpm_dev, 0)
-                ec = self.corrector_errors.get(cdev, 0)
-
-                if Corr_amp == 0:
-                    self.ERR_measured_V[i, j] = 0.0
-                else:
-                    dR2 = (eb**2)/(Corr_amp**2) + ((BPM_amp**2)/(Corr_amp**4))*(ec**2)
-                    self.ERR_measured_V[i, j] = np.sqrt(dR2)
-
-        self.tableErrV.setRowCount(shape_v[0])
-        self.tableErrV.setColumnCount(shape_v[1])
-        self.tableErrV.setVerticalHeaderLabels(row_labels_v)
-        self.tableErrV.setHorizontalHeaderLabels(col_labels_v)
-
-        for r in range(shape_v[0]):
-            for c in range(shape_v[1]):
-                val = self.ERR_measured_V[r, c]
-                self.tableErrV.setItem(r, c, QTableWidgetItem(f"{val:.4e}"))
-
-        self.canvasErrV.axes.clear()
-        if self.ERR_measured_V.size > 0:
-            im_v = self.canvasErrV.axes.imshow(self.ERR_measured_V, aspect='auto', cmap='jet')
-            self.canvasErrV.axes.set_title("Vertical ORM Error")
-            self._applyPlotFont(self.canvasErrV)
-            self.canvasErrV.axes.set_xticks(range(shape_v[1]))
-            self.canvasErrV.axes.set_yticks(range(shape_v[0]))
-            self.canvasErrV.axes.set_xticklabels(col_labels_v, rotation=90)
-            self.canvasErrV.axes.set_yticklabels(row_labels_v)
-            self.canvasErrV.fig.colorbar(im_v, ax=self.canvasErrV.axes, orientation='vertical')
-        self.canvasErrV.fig.tight_layout()
-        self.canvasErrV.draw()
+        if "V" in planes:
+            bpmv = self.actual_bpm_v
+            self.modelErrV.setArray(self.ERR_measured_V, bpmv, corr)
+            self._showHeatmap(self.paneErrV, self.ERR_measured_V, bpmv, corr, "Vertical ORM Error")
 
     ###########################################################################
     # File / Menu Actions
     ###########################################################################
     def loadDeviceLists(self):
+        from measurement_io import read_device_list
         cfile, _ = QFileDialog.getOpenFileName(self, "Open Corrector Devices Text File", "", "Text Files (*.txt)")
         if cfile:
-            with open(cfile, 'r') as f:
-                lines = [ln.strip() for ln in f if ln.strip()]
-                self.corrector_names_txt = lines
+            self.corrector_names_txt = read_device_list(cfile)
 
         bfile, _ = QFileDialog.getOpenFileName(self, "Open BPM Devices Text File", "", "Text Files (*.txt)")
         if bfile:
-            with open(bfile, 'r') as f:
-                lines = [ln.strip() for ln in f if ln.strip()]
-                self.bpm_names_txt = lines
+            self.bpm_names_txt = read_device_list(bfile)
 
         QMessageBox.information(self, "Device Lists", "Device lists loaded successfully.")
 
@@ -998,69 +1462,329 @@ class ResponseAnalyzerApp(QMainWindow):
         fname, _ = QFileDialog.getOpenFileName(self, "Open CSV", "", "CSV Files (*.csv)")
         if not fname:
             return
+        # a new file supersedes whatever is still being analyzed (or streamed)
+        self.stopLive()
+        self.cancelAnalysis()
+        recorder = RunRecorder("load", trace_memory=self.trace_memory, file=fname,
+                               dtype=np.dtype(self.ingest_dtype).name).start()
         try:
-            df = pd.read_csv(fname)
+            from measurement_io import load_measurement
+            version = file_version(fname)  # before parsing: a later rewrite is not archived
+            cache = self._measurementCache() if self.use_measurement_cache else None
+            meas = load_measurement(
+                fname, self.corrector_names_txt, self.bpm_names_txt, self.ingest_dtype, cache=cache,
+                recorder=recorder
+            )
         except Exception as ex:
+            recorder.finish()
             QMessageBox.critical(self, "File Error", f"Could not read CSV:\n{ex}")
             return
 
-        if df.isnull().values.any():
+        if meas.has_nan:
             QMessageBox.warning(self, "Data Warning", "CSV contains missing data (NaN).")
 
-        self.df = df
+        self.signals = meas.signals
+        # the measurement cache hashed the file already; the result store reuses that
+        # hash if the file is still the version that was loaded
+        self._dataFile, self._dataVersion, self._dataDigest = fname, version, None
+        try:
+            if meas.digest is not None and file_version(fname) == version:
+                self._dataDigest = meas.digest
+        except OSError:
+            pass
+        # fresh cache and graph: a cancelled worker may still hold the previous ones
+        self.spectra = SpectrumCache(self.signals)
+        self.analysis_graph = AnalysisGraph()
+        self._clearAnalysisResults()
         self.importedFileEdit.setText(fname)
 
-        # Identify correctors
-        self.actual_correctors = []
-        for cdev in self.corrector_names_txt:
-            col_r = f"{cdev}(R)"
-            if col_r in df.columns:
-                self.actual_correctors.append(col_r)
+        # Correctors and BPM planes (all-zero BPMs excluded) as matched at load time
+        self.actual_correctors = meas.correctors
+        self.measured_bpm_h = meas.bpm_h
+        self.measured_bpm_v = meas.bpm_v
+        self._applyBPMExclusions()
+        self.excluded_bpm = meas.excluded_bpm
 
-        # Identify BPM columns, exclude all-zero
-        self.actual_bpm_h = []
-        self.actual_bpm_v = []
-        self.excluded_bpm = []
-        for bdev in self.bpm_names_txt:
-            col_r = f"{bdev}(R)"
-            if col_r in df.columns:
-                data_b = df[col_r].values
-                if np.all(data_b == 0):
-                    self.excluded_bpm.append(col_r)
-                    continue
-                if "BPH" in bdev.upper():
-                    self.actual_bpm_h.append(col_r)
-                elif "BPV" in bdev.upper():
-                    self.actual_bpm_v.append(col_r)
-                else:
-                    self.actual_bpm_h.append(col_r)
+        with recorder.stage("Populate lists", correctors=len(meas.correctors),
+                            bpms=len(meas.bpm_h) + len(meas.bpm_v)):
+            self.populateExcludedBPMsTable()
+            self.populateDeviceLists()
+        self._finishRun(recorder)
 
-        self.populateExcludedBPMsTable()
+        # Now run the full pipeline
+        self.performAnalysis()
 
-        # Fill the corrector + BPM lists for selective plotting
+    def populateDeviceLists(self):
+        """Fill the corrector + BPM lists for selective plotting."""
         self.listCorrTime.clear()
         self.listCorrFreq.clear()
         for cdev in self.actual_correctors:
             self.listCorrTime.addItem(cdev)
             self.listCorrFreq.addItem(cdev)
 
+        # BPMs excluded by hand stay listed (and plottable), greyed out
         self.listBPMTimeH.clear()
-        for bdev in self.actual_bpm_h:
+        for bdev in self.measured_bpm_h:
             self.listBPMTimeH.addItem(bdev)
 
         self.listBPMTimeV.clear()
-        for bdev in self.actual_bpm_v:
+        for bdev in self.measured_bpm_v:
             self.listBPMTimeV.addItem(bdev)
 
         self.listBPMFreqH.clear()
-        for bdev in self.actual_bpm_h:
+        for bdev in self.measured_bpm_h:
             self.listBPMFreqH.addItem(bdev)
 
         self.listBPMFreqV.clear()
-        for bdev in self.actual_bpm_v:
+        for bdev in self.measured_bpm_v:
             self.listBPMFreqV.addItem(bdev)
+        self._markExcludedBPMItems()
+
+    def _markExcludedBPMItems(self):
+        excluded = set(self.user_excluded_bpm)
+        for widget in (self.listBPMTimeH, self.listBPMTimeV, self.listBPMFreqH, self.listBPMFreqV):
+            for row in range(widget.count()):
+                item = widget.item(row)
+                item.setData(Qt.ForegroundRole, QColor("gray") if item.text() in excluded else None)
+
+    def _measurementCache(self):
+        """The MeasurementCache, opened on first use (None if its directory is unusable)."""
+        if self.measurement_cache is None:
+            from measurement_cache import MeasurementCache
+            try:
+                self.measurement_cache = MeasurementCache()
+            except OSError as ex:
+                self.useCacheAction.setChecked(False)
+                self.useCacheAction.setEnabled(False)
+                QMessageBox.warning(self, "Measurement Cache", f"Cache disabled:\n{ex}")
+        return self.measurement_cache
+
+    def onUseMeasurementCacheToggled(self, checked):
+        self.use_measurement_cache = checked
+
+    def onClearMeasurementCache(self):
+        if self._measurementCache() is None:
+            return
+        freed = self.measurement_cache.total_bytes()
+        self.measurement_cache.clear()
+        QMessageBox.information(self, "Measurement Cache", f"Cache cleared ({freed / 1024**2:.1f} MB freed).")
 
-        # Now run the full pipeline
+    ###########################################################################
+    # Result Store
+    ###########################################################################
+    def _resultStore(self):
+        """The ResultStore, opened on first use (None if disabled or its directory is unusable)."""
+        if self.result_store is None and self.use_result_store:
+            from result_store import ResultStore
+            try:
+                self.result_store = ResultStore()
+            except OSError as ex:
+                self.useResultStoreAction.setChecked(False)
+                self.useResultStoreAction.setEnabled(False)
+                QMessageBox.warning(self, "Result Store", f"Result store disabled:\n{ex}")
+        return self.result_store
+
+    def _resultLookup(self):
+        """
+        Callable for the analysis worker: (key, digest, archived result or None)
+        of the loaded file with the current lists and settings. The file is
+        hashed there, once per load. None when nothing can be archived.
+        """
+        if not self.use_result_store or self._dataFile is None or self._liveReader is not None:
+            return None
+        store = self._resultStore()
+        if store is None:
+            return None
+        path, version, digest = self._dataFile, self._dataVersion, self._dataDigest
+        names = (list(self.corrector_names_txt), list(self.bpm_names_txt))
+        settings = {"engine": self.orm_engine_mode, "noise_mask": list(self.noise_mask),
+                    "dtype": self.signals.dtype.name}
+        if self.user_excluded_bpm:
+            # only when set, so entries stored before exclusions existed keep their keys
+            settings["excluded_bpms"] = sorted(self.user_excluded_bpm)
+
+        def lookup():
+            try:
+                data_digest = digest or store.digest(path, version)
+            except OSError:
+                data_digest = None
+            if data_digest is None:
+                return None, None, None  # unreadable, or changed since it was loaded
+            key = store.key(data_digest, *names, settings)
+            return key, data_digest, store.lookup(key)
+        return lookup
+
+    def _archiveResult(self, result, key, digest):
+        if key is None or self.result_store is None:
+            return
+        try:
+            self.result_store.store(key, result, path=self._dataFile, digest=digest)
+        except OSError:
+            pass  # archiving is best effort; the result is already shown
+
+    def onUseResultStoreToggled(self, checked):
+        self.use_result_store = checked
+
+    def onClearResultStore(self):
+        if self._resultStore() is None:
+            return
+        freed = self.result_store.total_bytes()
+        self.result_store.clear()
+        QMessageBox.information(self, "Result Store", f"Result store cleared ({freed / 1024**2:.1f} MB freed).")
+
+    def onCompareArchivedRuns(self):
+        """Pick two runs (archived, or the current analysis) and show how their matrices differ."""
+        if self._resultStore() is None:
+            return
+        from result_store import compare_results, describe_entry, format_comparison
+        runs = {}
+        if self.analysis_result is not None:
+            runs["Current analysis"] = self.analysis_result
+        for key, meta in self.result_store.entries().items():
+            runs[f"{describe_entry(meta)} [{key[:8]}]"] = key
+        if len(runs) < 2:
+            QMessageBox.information(self, "Compare Runs", "At least two runs are needed to compare.")
+            return
+        labels = list(runs)
+        first, ok = QInputDialog.getItem(self, "Compare Runs", "Reference run:", labels, 0, False)
+        if not ok:
+            return
+        second, ok = QInputDialog.getItem(self, "Compare Runs", "Compared run:", labels,
+                                          1 if labels.index(first) == 0 else 0, False)
+        if not ok:
+            return
+        try:
+            a, b = (runs[x] if not isinstance(runs[x], str) else self.result_store.load(runs[x])
+                    for x in (first, second))
+        except (OSError, ValueError, KeyError) as ex:
+            QMessageBox.warning(self, "Compare Runs", f"Could not load the archived run:\n{ex}")
+            return
+        QMessageBox.information(self, "Compare Runs",
+                                f"{second}\nagainst\n{first}\n\n{format_comparison(compare_results(a, b))}")
+
+    ###########################################################################
+    # Live Acquisition
+    ###########################################################################
+    def onLiveTailFile(self):
+        fname, _ = QFileDialog.getOpenFileName(self, "Tail Growing CSV", "", "CSV Files (*.csv)")
+        if fname:
+            from live_stream import FileTailSource
+            self.startLive(FileTailSource(fname))
+
+    def onLiveListenSocket(self):
+        from live_stream import LIVE_DEFAULT_PORT, SocketSource
+        port, ok = QInputDialog.getInt(self, "Live Socket", "Listen on local TCP port:",
+                                       LIVE_DEFAULT_PORT, 1024, 65535)
+        if ok:
+            self.startLive(SocketSource(port))
+
+    def startLive(self, source, window=None):
+        """
+        Stream samples from a live source into per-device ring buffers and
+        re-analyze the rolling window every LIVE_REFRESH_MS.
+        """
+        from live_stream import LIVE_WINDOW, LiveReader
+        from measurement_io import match_columns
+        if window is None:
+            window, ok = QInputDialog.getInt(self, "Live Acquisition", "Rolling window (samples per device):",
+                                             LIVE_WINDOW, 64, 1 << 22)
+            if not ok:
+                return
+        self.stopLive()
+        self.cancelAnalysis()
+        # live windows are never archived (nor looked up) in the result store
+        self._dataFile, self._dataVersion, self._dataDigest = None, None, None
+
+        corrector_names, bpm_names = list(self.corrector_names_txt), list(self.bpm_names_txt)
+
+        def select(header):
+            corr_cols, bpm_cols = match_columns(header, corrector_names, bpm_names)
+            columns = list(dict.fromkeys(corr_cols + [col for _, col in bpm_cols]))
+            if not columns:
+                raise ValueError("None of the loaded corrector/BPM devices has an (R) column in this stream.")
+            return columns
+
+        reader = LiveReader(source, select, window, self.ingest_dtype, parent=self)
+        reader.connected.connect(self._onLiveConnected)
+        reader.failed.connect(self._onLiveFailed)
+        self._liveReader = reader
+        self.liveStopAction.setEnabled(True)
+        self.importedFileEdit.setText(f"[live] {source.description}")
+        self.analysisStatusLabel.setText("Live: waiting for data")
+        reader.start()
+
+    def stopLive(self):
+        reader = self._liveReader
+        if reader is None:
+            return
+        self._liveReader = None
+        self._liveTracker = None
+        self._liveTimer.stop()
+        reader.stop()
+        reader.wait()
+        self.liveStopAction.setEnabled(False)
+        self.analysisStatusLabel.setText("Live acquisition stopped")
+
+    def _onLiveConnected(self, columns):
+        if self.sender() is not self._liveReader:
+            return
+        from live_stream import LIVE_REFRESH_MS
+        from measurement_io import match_columns
+        from sliding_dft import SlidingDFT
+        self._liveColumns = match_columns(columns, self.corrector_names_txt, self.bpm_names_txt)
+        bpm_columns = list(dict.fromkeys(col for _, col in self._liveColumns[1]))
+        # the BPM tone amplitudes follow the stream instead of being recomputed per refresh
+        self._liveTracker = (SlidingDFT(len(bpm_columns), self._liveReader.buffer.capacity, []),
+                             bpm_columns, [columns.index(col) for col in bpm_columns])
+        self._liveSeen = 0
+        self._liveTimer.start(LIVE_REFRESH_MS)
+
+    def _onLiveFailed(self, message):
+        if self.sender() is not self._liveReader:
+            return
+        self.stopLive()
+        QMessageBox.critical(self, "Live Acquisition", message)
+
+    def _liveStatus(self):
+        reader = self._liveReader
+        return (f"Live: {reader.buffer.n_filled()}/{reader.buffer.capacity} samples, "
+                f"{reader.sampleRate():.0f} S/s")
+
+    def _onLiveTick(self):
+        """Analyze the current window unless the previous one is still being analyzed."""
+        from live_stream import LIVE_MIN_SAMPLES
+        from measurement_io import classify_channels
+        from sliding_dft import SlidingSpectra
+        reader = self._liveReader
+        if reader is None or self._analysisWorker is not None:
+            return
+        if reader.buffer.n_filled() < LIVE_MIN_SAMPLES:
+            self.analysisStatusLabel.setText(self._liveStatus())
+            return
+
+        block, n_total = reader.buffer.snapshot()
+        tracker, tracked, rows = self._liveTracker
+        new = min(n_total - self._liveSeen, block.shape[1])
+        with tracker.lock:
+            tracker.update(block[rows, block.shape[1] - new:])
+        self._liveSeen = n_total
+        corr_cols, bpm_cols = self._liveColumns
+        bpm_h, bpm_v, excluded, _has_nan = classify_channels(reader.columns, block, corr_cols, bpm_cols)
+        self.signals = SignalStore.from_rows(reader.columns, block, corr_cols, bpm_h, bpm_v, block.dtype)
+        if tracker.n_seen >= tracker.window_size:
+            self.spectra = SlidingSpectra(self.signals, tracker, tracked)
+        else:
+            # until the window is full the tracker also holds the zeros before the first sample
+            self.spectra = SpectrumCache(self.signals)
+        lists_changed = (corr_cols, bpm_h, bpm_v) != (self.actual_correctors, self.measured_bpm_h, self.measured_bpm_v)
+        self.actual_correctors = corr_cols
+        self.measured_bpm_h = bpm_h
+        self.measured_bpm_v = bpm_v
+        self._applyBPMExclusions()
+        if lists_changed or excluded != self.excluded_bpm:
+            self.excluded_bpm = excluded
+            self.populateExcludedBPMsTable()
+            self.populateDeviceLists()
         self.performAnalysis()
 
     def openDocumentation(self):
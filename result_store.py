@@ -0,0 +1,154 @@
+import os
+import time
+
+import numpy as np
+
+from disk_cache import CACHE_ROOT, DiskCache, file_digest, file_version, make_key
+from matrix_export import result_arrays
+from orm_pipeline import AnalysisResult, NoiseMask
+
+###############################################################################
+# Archive of analysis results keyed by input content and settings
+###############################################################################
+DEFAULT_SIZE_LIMIT = 256 * 1024**2  # bytes
+
+# Each entry is one '<key>.npz' with the arrays of matrix_export.result_arrays
+# plus the amplitudes behind R and the settings the result was computed with.
+RESULT_SUFFIX = ".npz"
+AMPLITUDE_ARRAYS = ("bpm_amplitudes_H", "bpm_amplitudes_V", "corr_amplitudes_H", "corr_amplitudes_V")
+
+
+def result_from_arrays(arrays):
+    """Rebuild an AnalysisResult from the arrays of a stored entry."""
+    correctors = [str(c) for c in arrays["correctors"]]
+    bpm_h = [str(b) for b in arrays["bpm_h"]]
+    bpm_v = [str(b) for b in arrays["bpm_v"]]
+    result = AnalysisResult(correctors, bpm_h, bpm_v, str(arrays["engine_mode"]),
+                            NoiseMask(*(int(v) for v in arrays["noise_mask"])))
+    result.corrector_errors = dict(zip(correctors, arrays["corrector_errors"]))
+    result.bpm_errors = dict(zip(bpm_h, arrays["bpm_errors_H"]))
+    result.bpm_errors.update(zip(bpm_v, arrays["bpm_errors_V"]))
+    result.corrector_params = arrays["corrector_params"]
+    for name in ("R_measured_H", "R_measured_V", "ERR_measured_H", "ERR_measured_V") + AMPLITUDE_ARRAYS:
+        setattr(result, name, arrays[name])
+    return result
+
+
+class ResultStore(DiskCache):
+    """
+    Finished analyses, keyed by the content hash of the data file, the
+    corrector and BPM lists and the analysis settings. Reopening a file
+    that was already analyzed with the same settings loads the result
+    instead of recomputing it; the entries also serve as an archive of runs.
+    """
+    def __init__(self, directory=None, size_limit=DEFAULT_SIZE_LIMIT):
+        super().__init__(directory or os.path.join(CACHE_ROOT, "results"), size_limit)
+
+    @staticmethod
+    def digest(path, version=None):
+        """
+        Content hash of a data file, or None if the file no longer matches
+        version (its file_version() when it was loaded).
+        """
+        digest = file_digest(path)
+        if version is not None and file_version(path) != tuple(version):
+            return None
+        return digest
+
+    @staticmethod
+    def key(digest, corrector_names, bpm_names, settings):
+        """Entry key; settings is a dict of everything else that changes the result."""
+        return make_key(digest, list(corrector_names), list(bpm_names), settings)
+
+    def lookup(self, key):
+        """The stored AnalysisResult, or None."""
+        if self.get(key) is None:
+            return None
+        try:
+            with np.load(self.path(key, RESULT_SUFFIX)) as arrays:
+                return result_from_arrays(arrays)
+        except (OSError, ValueError, KeyError):
+            self.remove(key)
+            return None
+
+    def store(self, key, result, path=None, digest=None, **meta):
+        """Archive a result under key; path/digest describe the data file it came from."""
+        arrays = result_arrays(result)
+        arrays.update({name: getattr(result, name) for name in AMPLITUDE_ARRAYS})
+        arrays.update(engine_mode=np.array(result.engine_mode), noise_mask=np.array(result.noise_mask))
+        tmp = self.path(key, ".tmp" + RESULT_SUFFIX)
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, self.path(key, RESULT_SUFFIX))
+        if path is not None:
+            st = os.stat(path)
+            meta.update(source=os.path.abspath(path), size=st.st_size, mtime_ns=st.st_mtime_ns, digest=digest)
+        meta.update(
+            created=time.time(), engine=result.engine_mode, noise_mask=list(result.noise_mask),
+            n_correctors=len(result.correctors), n_bpm_h=len(result.bpm_h), n_bpm_v=len(result.bpm_v),
+        )
+        self.add(key, [RESULT_SUFFIX], **meta)
+        return key
+
+    def load(self, key):
+        """Stored result without touching its last-access time (for comparisons)."""
+        with np.load(self.path(key, RESULT_SUFFIX)) as arrays:
+            return result_from_arrays(arrays)
+
+
+def describe_entry(meta):
+    """One line naming an archived run, e.g. 'run1.csv, fft, 8 corr, 2024-05-01 12:00'."""
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta.get("created", 0)))
+    name = os.path.basename(meta.get("source") or "?")
+    return (f"{name}, {meta.get('engine', '?')}, {meta.get('n_correctors', 0)} corr, "
+            f"{meta.get('n_bpm_h', 0)}+{meta.get('n_bpm_v', 0)} BPM, {when}")
+
+
+###############################################################################
+# Comparison of two results
+###############################################################################
+def _aligned(values_a, rows_a, cols_a, values_b, rows_b, cols_b):
+    """Both matrices restricted to the row and column labels they share."""
+    ia, ib = {r: i for i, r in enumerate(rows_a)}, {r: i for i, r in enumerate(rows_b)}
+    ja, jb = {c: j for j, c in enumerate(cols_a)}, {c: j for j, c in enumerate(cols_b)}
+    rows = [r for r in rows_a if r in ib]
+    cols = [c for c in cols_a if c in jb]
+    a = np.asarray(values_a)[np.ix_([ia[r] for r in rows], [ja[c] for c in cols])]
+    b = np.asarray(values_b)[np.ix_([ib[r] for r in rows], [jb[c] for c in cols])]
+    return a, b, rows, cols
+
+
+def compare_results(a, b):
+    """
+    Differences of b against a for the response and error matrices of both
+    planes, over the devices present in both: {matrix name: stats} with
+    shape, max_abs, rms and max_rel (relative to |a|, where a != 0), plus the
+    (row, column) of the largest change.
+    """
+    stats = {}
+    for name, rows in (("R_measured_H", "bpm_h"), ("R_measured_V", "bpm_v"),
+                       ("ERR_measured_H", "bpm_h"), ("ERR_measured_V", "bpm_v")):
+        va, vb, r, c = _aligned(getattr(a, name), getattr(a, rows), a.correctors,
+                                getattr(b, name), getattr(b, rows), b.correctors)
+        entry = {"shape": va.shape, "max_abs": 0.0, "rms": 0.0, "max_rel": 0.0, "worst": None}
+        if va.size:
+            diff = np.abs(vb - va)
+            rel = np.divide(diff, np.abs(va), out=np.zeros_like(diff), where=va != 0)
+            i, j = np.unravel_index(np.argmax(diff), diff.shape)
+            entry.update(max_abs=float(diff.max()), rms=float(np.sqrt(np.mean(diff**2))),
+                         max_rel=float(rel.max()), worst=(r[i], c[j]))
+        stats[name] = entry
+    return stats
+
+
+def format_comparison(stats):
+    """Multi-line text of compare_results() for a dialog."""
+    lines = []
+    for name, s in stats.items():
+        line = f"{name}: {s['shape'][0]}x{s['shape'][1]} shared"
+        if s["worst"] is not None and s["max_abs"] == 0.0:
+            line += ", identical"
+        elif s["worst"] is not None:
+            line += (f", max |diff| {s['max_abs']:.4g} at {s['worst'][0]} / {s['worst'][1]}, "
+                     f"rms {s['rms']:.4g}, max rel {s['max_rel']:.3g}")
+        lines.append(line)
+    return "\n".join(lines)
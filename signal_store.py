@@ -0,0 +1,81 @@
+import numpy as np
+
+###############################################################################
+# Contiguous per-class sample store
+###############################################################################
+DEVICE_CLASSES = ("correctors", "bpm_h", "bpm_v")
+
+
+class SignalStore:
+    """
+    Samples of the analyzed channels of one measurement: one C-contiguous
+    (n_channels x N) array per device class (correctors, H BPMs, V BPMs)
+    plus a name -> (class, row) index. Channels that are not analyzed
+    (e.g. all-zero BPMs) are not kept.
+
+    Rows of one class that are adjacent in the store are returned as views,
+    so batched transforms over a whole class copy nothing.
+    """
+    def __init__(self, names, blocks, n_samples):
+        self._names = {cls: list(names[cls]) for cls in DEVICE_CLASSES}
+        self._blocks = {cls: blocks[cls] for cls in DEVICE_CLASSES}
+        self.n_samples = int(n_samples)
+        self.dtype = np.result_type(*self._blocks.values())
+        self._index = {}
+        for cls in reversed(DEVICE_CLASSES):  # a name listed twice resolves to its first class
+            for row, name in enumerate(self._names[cls]):
+                self._index[name] = (cls, row)
+
+    @classmethod
+    def from_rows(cls, columns, block, correctors, bpm_h, bpm_v, dtype=np.float64):
+        """
+        Copy the listed channels out of a channel-major (n_columns x N) block
+        whose rows are named by `columns`, converting to dtype.
+        """
+        row_of = {col: i for i, col in enumerate(columns)}
+        names = dict(zip(DEVICE_CLASSES, (correctors, bpm_h, bpm_v)))
+        blocks = {}
+        for device_class, class_names in names.items():
+            rows = [row_of[n] for n in class_names]
+            blocks[device_class] = np.ascontiguousarray(block[rows], dtype=dtype)
+        return cls(names, blocks, block.shape[1])
+
+    def __len__(self):
+        return self.n_samples
+
+    def __contains__(self, name):
+        return name in self._index
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self._blocks.values())
+
+    def names(self, device_class):
+        return list(self._names[device_class])
+
+    def block(self, device_class):
+        """The (n_channels x N) array of a device class (not a copy)."""
+        return self._blocks[device_class]
+
+    def row(self, name):
+        """Samples of one channel as a view."""
+        device_class, row = self._index[name]
+        return self._blocks[device_class][row]
+
+    def rows(self, names, dtype=None):
+        """
+        (len(names) x N) block, one row per name. A run of consecutive rows of
+        one class is a view; otherwise the rows are gathered into a new
+        C-contiguous array. dtype converts (copying only if it differs).
+        """
+        names = list(names)
+        if not names:
+            return np.zeros((0, self.n_samples), dtype=dtype or self.dtype)
+        where = [self._index[n] for n in names]
+        device_class, first = where[0]
+        block = self._blocks[device_class]
+        if all(w == (device_class, first + k) for k, w in enumerate(where)):
+            out = block[first:first + len(names)]
+        else:
+            out = np.stack([self._blocks[c][r] for c, r in where])
+        return out if dtype is None else out.astype(dtype, copy=False)
@@ -0,0 +1,183 @@
+import threading
+
+import numpy as np
+
+from orm_engine import demodulate
+from spectrum_cache import ChannelTones, SpectrumCache
+
+###############################################################################
+# Recursive sliding DFT at a few tones, for many channels
+###############################################################################
+class SlidingDFT:
+    """
+    Complex DFT of the last `window` samples of n_channels signals, evaluated
+    only at K frequencies (cycles/sample, as in orm_engine.tone_basis):
+
+        X_k = sum_m w[m] * exp(-2j*pi*f_k*m),   m = 0..window-1, oldest sample first
+
+    For f_k = k / window this equals np.fft.rfft(w)[k]. New samples update X
+    recursively in O(K) per sample and channel instead of a new transform.
+    Rounding drift of the recursion is bounded by recomputing X from the held
+    window (re-anchoring) every `reanchor_every` samples, which costs
+    O(window * K) per channel and so stays O(K) per sample amortized.
+
+    Before `window` samples have arrived the missing ones count as zeros.
+    Callers that share a tracker between threads go through its `lock`.
+    """
+    def __init__(self, n_channels, window, freqs, reanchor_every=None):
+        self.n_channels = int(n_channels)
+        self.window_size = int(window)
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self.reanchor_every = int(reanchor_every or window)
+        N = self.window_size
+        self._samples = np.zeros((self.n_channels, N), dtype=float)
+        self._pos = 0                   # oldest sample / next write position
+        self._values = np.zeros((self.n_channels, self.freqs.size), dtype=complex)
+        self._since_anchor = 0
+        self.n_seen = 0
+        # exp(-2j*pi*f*N): 1 for whole bins, where the recursion needs no extra factor
+        self._wrap = np.exp(-2j * np.pi * self.freqs * N)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_bins(cls, n_channels, window, bins, reanchor_every=None):
+        """Track rfft bins (possibly fractional) of a `window`-sample transform."""
+        return cls(n_channels, window, np.asarray(bins, dtype=float) / window, reanchor_every)
+
+    def reset(self):
+        self._samples[:] = 0.0
+        self._values[:] = 0.0
+        self._pos = 0
+        self._since_anchor = 0
+        self.n_seen = 0
+
+    def window(self):
+        """The held samples, oldest first, (n_channels x window)."""
+        return np.roll(self._samples, -self._pos, axis=1)
+
+    def values(self):
+        """Current complex amplitudes, (n_channels x K)."""
+        return self._values.copy()
+
+    def magnitudes(self):
+        return np.abs(self._values)
+
+    def retune(self, freqs):
+        """Track other frequencies from now on; their amplitudes are computed from the held window."""
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self._wrap = np.exp(-2j * np.pi * self.freqs * self.window_size)
+        self.reanchor()
+
+    def reanchor(self):
+        """Recompute the amplitudes directly from the held window (drops accumulated drift)."""
+        self._values = demodulate(self.window(), self.freqs)
+        self._since_anchor = 0
+
+    def update(self, samples):
+        """
+        Push new samples, (n_channels x L) or (n_channels,) for one time step.
+        A block is applied in one step:
+            X <- z^L X + z^-N sum_j z^(L-j) in_j - sum_j z^(L-j) out_j,   z = exp(2j*pi*f)
+        which is two real matrix products over the block.
+        """
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+        L = samples.shape[1]
+        if L == 0:
+            return
+        N = self.window_size
+        self.n_seen += L
+        if L >= N:
+            self._samples[:] = samples[:, -N:]
+            self._pos = 0
+            self.reanchor()
+            return
+
+        idx = (self._pos + np.arange(L)) % N
+        outgoing = self._samples[:, idx]
+        self._samples[:, idx] = samples
+        self._pos = (self._pos + L) % N
+
+        phase = 2.0 * np.pi * np.outer(np.arange(L, 0, -1, dtype=float), self.freqs)
+        both = np.concatenate([samples, outgoing])
+        acc = both @ np.cos(phase) + 1j * (both @ np.sin(phase))
+        incoming_sum, outgoing_sum = acc[:self.n_channels], acc[self.n_channels:]
+        self._values *= np.exp(2j * np.pi * self.freqs * L)
+        self._values += incoming_sum * self._wrap - outgoing_sum
+
+        self._since_anchor += L
+        if self._since_anchor >= self.reanchor_every:
+            self.reanchor()
+
+
+###############################################################################
+# Spectrum cache of a live window fed by a sliding DFT
+###############################################################################
+class SlidingSpectra(SpectrumCache):
+    """
+    SpectrumCache of one live window whose tracked channels (the BPMs of the
+    stream) are never transformed by the analysis: their amplitudes at the
+    corrector tones (lock-in), and at the noise-mask bins (FFT engine), are
+    read from a SlidingDFT that follows the stream. Other channels (the
+    correctors) are transformed as usual.
+
+    tracker must hold exactly the samples of signals (the same last
+    window_size samples). When the analysis asks for frequencies it does not
+    track, it is retuned once to everything asked of this window so far.
+    """
+    def __init__(self, signals, tracker, names):
+        super().__init__(signals)
+        self._tracker = tracker
+        self._rows = {name: row for row, name in enumerate(names) if name in signals}
+        self._requested = set()
+
+    def needs_spectrum(self, names):
+        return [n for n in names if n not in self._rows]
+
+    def _tracked_values(self, names, freqs):
+        """Complex DFT of tracked channels at freqs (cycles/sample), (len(names) x len(freqs))."""
+        with self._tracker.lock:
+            self._requested.update(float(f) for f in freqs)
+            column = {f: k for k, f in enumerate(self._tracker.freqs)}
+            if any(float(f) not in column for f in freqs):
+                self._tracker.retune(sorted(self._requested))
+                column = {f: k for k, f in enumerate(self._tracker.freqs)}
+            values = self._tracker.values()
+        rows = [self._rows[n] for n in names]
+        return values[np.ix_(rows, [column[float(f)] for f in freqs])]
+
+    def tones(self, names, freqs, windowed=False, workers=1):
+        """
+        As SpectrumCache.tones; tracked channels come from the sliding DFT.
+        Windowed (interpolated-peak) tones are demodulated as usual: their
+        frequencies are estimated anew from every window, so a tracker
+        would have to be retuned on each refresh.
+        """
+        if windowed:
+            return super().tones(names, freqs, windowed, workers)
+        freqs = tuple(float(f) for f in freqs)
+
+        def tracked(signals, missing):
+            values = self._tracked_values(missing, freqs)
+            block = signals.rows(missing, dtype=float)
+            energy = np.einsum("ij,ij->i", block, block)
+            return [ChannelTones(freqs, values[k], float(energy[k])) for k in range(len(missing))]
+        mine = [n for n in names if n in self._rows]
+        others = [n for n in names if n not in self._rows]
+        found = dict(zip(mine, self._cached(self._tones, mine, tracked, lambda entry: entry.freqs == freqs)))
+        if others:
+            found.update(zip(others, super().tones(others, freqs, workers=workers)))
+        return [found[n] for n in names]
+
+    def magnitude_block(self, names, bins=None):
+        if bins is None or not names or any(n not in self._rows for n in names):
+            return super().magnitude_block(names, bins)
+        return np.abs(self._tracked_values(names, self.freq_axis()[np.asarray(bins, dtype=int)]))
+
+    def powers(self, names):
+        """Total two-sided power; N * sum(x^2) (Parseval) for tracked channels."""
+        if not names or any(n not in self._rows for n in names):
+            return super().powers(names)
+        block = self._signals.rows(names, dtype=float)
+        return self.n_samples() * np.einsum("ij,ij->i", block, block)
@@ -0,0 +1,167 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from orm_engine import (
+    batch_spectrum, demodulate, windowed_demodulate, interpolated_peaks
+)
+
+###############################################################################
+# Per-channel spectrum cache
+###############################################################################
+# fft:          one-sided (real) FFT of the channel
+# magnitude:    |fft|
+# dominant_bin: index of the largest non-DC bin
+# power:        sum of |X_k|^2 over the full two-sided N-point spectrum
+ChannelSpectrum = namedtuple("ChannelSpectrum", ["fft", "magnitude", "dominant_bin", "power"])
+
+# Targeted DFT of a channel at a fixed set of tones (lock-in mode)
+# freqs:  the tone frequencies the values were computed for
+# values: complex DFT value at each tone
+# energy: sum of x^2 over the record
+ChannelTones = namedtuple("ChannelTones", ["freqs", "values", "energy"])
+
+# Dominant tone refined between bins (interpolated-peak mode)
+# freq:   sub-bin frequency in cycles/sample
+# value:  complex amplitude at freq, in rectangular-FFT units (A * N / 2)
+# energy: sum of x^2 over the record
+ChannelPeak = namedtuple("ChannelPeak", ["freq", "value", "energy"])
+
+
+def two_sided_power(magnitude, n_samples):
+    """Total power of the N-point FFT, reconstructed from one-sided magnitudes."""
+    power = magnitude**2
+    total = 2.0 * power.sum(axis=-1) - power[..., 0]
+    if n_samples % 2 == 0:
+        total -= power[..., -1]
+    return total
+
+
+class SpectrumCache:
+    """
+    Real FFT, magnitude, dominant bin and frequency axis of every channel of a
+    SignalStore, computed once and shared by all analysis stages and replots.
+    Transforms run in float64 whatever the storage dtype.
+
+    The analysis worker and the GUI thread may use one cache at the same time:
+    lookups and inserts are locked, transforms run outside the lock (a channel
+    asked for by both is transformed twice, to the same values).
+    """
+    def __init__(self, signals=None):
+        self._lock = threading.Lock()
+        self._signals = None
+        self._spectra = {}
+        self._tones = {}
+        self._windowed_tones = {}
+        self._peaks = {}
+        self._freq_axes = {}
+        self.reset(signals)
+
+    def reset(self, signals):
+        """Drop every cached spectrum and bind to a new SignalStore."""
+        with self._lock:
+            self._signals = signals
+            self._spectra.clear()
+            self._tones.clear()
+            self._windowed_tones.clear()
+            self._peaks.clear()
+
+    def _cached(self, cache, names, compute, is_current=None):
+        """
+        Entries of names from cache. Missing ones (or those failing is_current)
+        are made by compute(signals, missing) -> list outside the lock, and kept
+        unless reset() bound another store in the meantime.
+        """
+        with self._lock:
+            signals = self._signals
+            found = {n: cache[n] for n in dict.fromkeys(names)
+                     if n in cache and (is_current is None or is_current(cache[n]))}
+        missing = [n for n in dict.fromkeys(names) if n not in found]
+        if missing:
+            made = dict(zip(missing, compute(signals, missing)))
+            with self._lock:
+                if self._signals is signals:
+                    cache.update(made)
+            found.update(made)
+        return [found[n] for n in names]
+
+    def needs_spectrum(self, names):
+        """Channels among names that have to be transformed for full spectra (all of them here)."""
+        return list(names)
+
+    def __contains__(self, name):
+        return name in self._spectra
+
+    def spectrum(self, name):
+        """Spectrum of a single channel (computed on first access)."""
+        return self.spectra([name])[0]
+
+    def spectra(self, names):
+        """Spectra of several channels; missing ones are transformed in one batch."""
+        def transform(signals, missing):
+            block = signals.rows(missing, dtype=float)
+            fft_block, mag_block, dominant = batch_spectrum(block)
+            power = two_sided_power(mag_block, block.shape[1])
+            return [ChannelSpectrum(fft_block[k], mag_block[k], int(dominant[k]), float(power[k]))
+                    for k in range(len(missing))]
+        return self._cached(self._spectra, names, transform)
+
+    def tones(self, names, freqs, windowed=False, workers=1):
+        """
+        Lock-in amplitudes of several channels at the given tones; channels not yet
+        demodulated at exactly these frequencies are processed in one batch.
+        windowed=True demodulates the Hann-windowed channels (see windowed_demodulate).
+        workers > 1 builds the tone basis on a thread pool (same values).
+        """
+        freqs = tuple(float(f) for f in freqs)
+
+        def demodulated(signals, missing):
+            block = signals.rows(missing, dtype=float)
+            if windowed:
+                values = windowed_demodulate(block, freqs, workers=workers)
+            else:
+                values = demodulate(block, freqs, workers=workers)
+            energy = np.einsum("ij,ij->i", block, block)
+            return [ChannelTones(freqs, values[k], float(energy[k])) for k in range(len(missing))]
+        cache = self._windowed_tones if windowed else self._tones
+        return self._cached(cache, names, demodulated, lambda entry: entry.freqs == freqs)
+
+    def peaks(self, names):
+        """Interpolated dominant tone (ChannelPeak) of several channels, batched."""
+        def refined(signals, missing):
+            block = signals.rows(missing, dtype=float)
+            freqs, values = interpolated_peaks(block)
+            energy = np.einsum("ij,ij->i", block, block)
+            return [ChannelPeak(float(freqs[k]), complex(values[k]), float(energy[k])) for k in range(len(missing))]
+        return self._cached(self._peaks, names, refined)
+
+    def magnitude_block(self, names, bins=None):
+        """
+        Stacked (n_channels x N//2+1) magnitudes, one row per name; with bins
+        only those columns are gathered, (n_channels x len(bins)).
+        """
+        n_cols = len(self.freq_axis()) if bins is None else len(bins)
+        if not names:
+            return np.zeros((0, n_cols), dtype=float)
+        if bins is None:
+            return np.stack([spec.magnitude for spec in self.spectra(names)])
+        bins = np.asarray(bins, dtype=int)
+        return np.stack([spec.magnitude[bins] for spec in self.spectra(names)])
+
+    def powers(self, names):
+        """Total two-sided spectral power of each channel."""
+        return np.array([spec.power for spec in self.spectra(names)], dtype=float)
+
+    def n_samples(self):
+        return 0 if self._signals is None else len(self._signals)
+
+    def freq_axis(self, n_samples=None):
+        """One-sided frequency axis (cycles/sample) for an N-point record."""
+        if n_samples is None:
+            n_samples = self.n_samples()
+        freq = self._freq_axes.get(n_samples)
+        if freq is None:
+            freq = np.fft.rfftfreq(n_samples, d=1.0)
+            self._freq_axes[n_samples] = freq
+        return freq
@@ -0,0 +1,170 @@
+from contextlib import nullcontext
+
+import numpy as np
+
+from orm_engine import map_blocks
+
+###############################################################################
+# Dependency graph of cached stages
+###############################################################################
+def _same(a, b):
+    """Inputs compare by value for plain data (names, settings), by identity otherwise."""
+    if a is b:
+        return True
+    if isinstance(a, (str, int, float, tuple, list)) and type(a) is type(b):
+        return a == b
+    return False
+
+
+class StageGraph:
+    """
+    Inputs and stages in dependency (insertion) order. Every node has a version
+    that changes when its value does; a stage is recomputed by update() only
+    when the versions of its inputs differ from those it was last computed
+    from. A stage that returns the very object it held before (e.g. a cache
+    it filled further) keeps its version, so nothing downstream reruns.
+
+    Row stages (add_row_stage) compute one row per name of a list input and
+    keep each row until one of their shared inputs changes. When only the
+    list changes, just the new names are computed and the output is
+    re-assembled in list order. `aligned` row stages over the same list pass
+    their rows for those names along; they invalidate a downstream row stage
+    only when their own row cache is dropped.
+
+    Stages at the same depth of the graph do not depend on each other; with
+    workers > 1 update() computes them concurrently on a thread pool.
+    """
+    def __init__(self):
+        self._order = []
+        self._nodes = {}
+        self._versions = {}
+        self._values = {}
+
+    def add_input(self, name, value=None):
+        self._add(name, {"kind": "input"})
+        self._values[name] = value
+        return self
+
+    def add_stage(self, name, inputs, compute):
+        """compute(*input values) -> value."""
+        self._add(name, {"kind": "stage", "inputs": tuple(inputs), "compute": compute, "seen": None})
+        return self
+
+    def add_row_stage(self, name, rows, inputs, compute, aligned=()):
+        """
+        compute(names, *input values, *aligned rows) -> tuple of arrays with
+        one entry per name along axis 0. `rows` is the list input naming the
+        rows; each aligned stage contributes its tuple of row arrays for names.
+        """
+        for upstream in aligned:
+            if self._nodes[upstream]["kind"] != "rows" or self._nodes[upstream]["rows"] != rows:
+                raise ValueError(f"{upstream} is not a row stage over {rows}")
+        self._add(name, {"kind": "rows", "rows": rows, "inputs": tuple(inputs), "aligned": tuple(aligned),
+                         "compute": compute, "seen": None, "epoch": 0, "cache": {}, "layout": None})
+        return self
+
+    def _add(self, name, node):
+        if name in self._nodes:
+            raise ValueError(f"Duplicate node {name}")
+        upstreams = node.get("inputs", ()) + node.get("aligned", ()) + (node.get("rows"),) * (node["kind"] == "rows")
+        for upstream in upstreams:
+            if upstream not in self._nodes:
+                raise ValueError(f"{name} depends on unknown node {upstream}")
+        node["depth"] = 1 + max((self._nodes[u]["depth"] for u in upstreams), default=-1)
+        self._order.append(name)
+        self._nodes[name] = node
+        self._versions[name] = 0
+
+    def set_input(self, name, value):
+        """Set an input; returns True if it changed (which makes its dependants stale)."""
+        if self._nodes[name]["kind"] != "input":
+            raise ValueError(f"{name} is not an input")
+        if _same(self._values[name], value):
+            return False
+        self._values[name] = value
+        self._versions[name] += 1
+        return True
+
+    def value(self, name):
+        return self._values.get(name)
+
+    def version(self, name):
+        """Changes whenever the node's value does."""
+        return self._versions[name]
+
+    def _key(self, node):
+        key = tuple(self._versions[n] for n in node["inputs"])
+        return key + tuple(self._nodes[n]["epoch"] for n in node.get("aligned", ()))
+
+    def update(self, stage_context=None, workers=1):
+        """
+        Recompute the stale stages in order. stage_context(name, **shapes), if
+        given, returns a context manager entered around each computation (for
+        progress, cancellation and timing); it may yield a dict that receives
+        the row count of row stages. Returns the names of the stages that ran.
+        """
+        def update_node(name):
+            node = self._nodes[name]
+            if node["kind"] == "stage" and node["seen"] != self._key(node):
+                with (stage_context or _no_context)(name):
+                    self._compute(name, node)
+                return True
+            if node["kind"] == "rows":
+                return self._update_rows(name, node, stage_context)
+            return False
+
+        ran = []
+        for depth in sorted({node["depth"] for node in self._nodes.values()}):
+            names = [n for n in self._order if self._nodes[n]["depth"] == depth and self._nodes[n]["kind"] != "input"]
+            for name, computed in zip(names, map_blocks(update_node, names, workers, kind="stages")):
+                if computed:
+                    ran.append(name)
+        return ran
+
+    def _compute(self, name, node):
+        value = node["compute"](*(self._values[n] for n in node["inputs"]))
+        if value is not self._values.get(name):
+            self._values[name] = value
+            self._versions[name] += 1
+        node["seen"] = self._key(node)
+
+    def _update_rows(self, name, node, stage_context):
+        key = self._key(node)
+        if node["seen"] != key:
+            node["cache"].clear()
+            node["epoch"] += 1
+            node["seen"] = key
+        names = list(self._values[node["rows"]])
+        missing = [n for n in dict.fromkeys(names) if n not in node["cache"]]
+        if missing or node["layout"] is None:
+            with (stage_context or _no_context)(name, rows=len(missing)):
+                # even with nothing missing, compute once for correctly shaped empty rows
+                parts = self._compute_rows(node, missing)
+                for k, row_name in enumerate(missing):
+                    node["cache"][row_name] = tuple(part[k] for part in parts)
+                node["layout"] = tuple((part.shape[1:], part.dtype) for part in parts)
+        layout = (tuple(names), node["epoch"])
+        if missing or self._values.get(name, (None,))[0] != layout:
+            self._values[name] = (layout, self._gather(node, names))
+            self._versions[name] += 1
+        return bool(missing)
+
+    def _compute_rows(self, node, names):
+        args = [self._values[n] for n in node["inputs"]]
+        for upstream in node["aligned"]:
+            args.append(self._gather(self._nodes[upstream], names))
+        return tuple(node["compute"](names, *args))
+
+    def _gather(self, node, names):
+        return tuple(
+            np.stack([node["cache"][n][i] for n in names]) if names else np.zeros((0,) + shape, dtype)
+            for i, (shape, dtype) in enumerate(node["layout"])
+        )
+
+    def rows(self, name):
+        """Output of a row stage: its tuple of arrays, one row per name of its list input."""
+        return self._values[name][1]
+
+
+def _no_context(_name, **shapes):
+    return nullcontext(shapes)
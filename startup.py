@@ -0,0 +1,86 @@
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+###############################################################################
+# Startup timing
+###############################################################################
+class StartupProfiler:
+    """
+    Wall-clock time of each named startup phase, measured from process start
+    (creation of the profiler). Safe to record from several threads.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.records = []           # (phase, seconds, finished at, thread name)
+
+    def record(self, name, seconds):
+        finished = time.perf_counter() - self._t0
+        with self._lock:
+            self.records.append((name, seconds, finished, threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t)
+
+    def mark(self, name):
+        """Record a point in time (zero-length phase)."""
+        self.record(name, 0.0)
+
+    def report(self, title="Startup profile"):
+        with self._lock:
+            records = list(self.records)
+        width = max([len(r[0]) for r in records] + [5])
+        lines = [f"{title}:", f"  {'phase':<{width}}  {'time ms':>9}  {'at ms':>9}  thread"]
+        for name, seconds, finished, thread in records:
+            lines.append(f"  {name:<{width}}  {seconds * 1e3:9.1f}  {finished * 1e3:9.1f}  {thread}")
+        print("\n".join(lines), file=self.stream, flush=True)
+
+
+def profiled(profiler, name):
+    """profiler.phase(name), or a no-op when profiling is off (profiler is None)."""
+    return profiler.phase(name) if profiler is not None else nullcontext()
+
+
+###############################################################################
+# Background preloading
+###############################################################################
+# Heavy modules the window does not need to appear: pandas (CSV ingestion and
+# export) and matplotlib's figure machinery (first plot tab).
+PRELOAD_MODULES = (
+    "pandas",
+    "measurement_io",
+    "measurement_cache",
+    "matrix_export",
+    "matplotlib.figure",
+    "matplotlib.backends.backend_agg",
+)
+
+
+def preload_modules(modules=PRELOAD_MODULES, profiler=None, on_done=None):
+    """
+    Import modules on a daemon thread so they are usually warm by the time the
+    user opens a file or a plot tab. The Qt backend itself is left to the GUI
+    thread. Returns the thread.
+    """
+    def run():
+        for name in modules:
+            with profiled(profiler, f"preload {name}"):
+                try:
+                    importlib.import_module(name)
+                except ImportError:
+                    pass  # reported again, properly, where the module is really used
+        if on_done is not None:
+            on_done()
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
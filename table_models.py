@@ -0,0 +1,99 @@
+import numpy as np
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+def _format_value(value, spec):
+    if spec == "d":
+        return str(int(value))
+    return format(value, spec)
+
+
+class ArrayTableModel(QAbstractTableModel):
+    """
+    Read-only table model over a 2-D numpy array.
+    Cells are formatted lazily in data(), so only the visible ones are ever touched,
+    and swapping in a new matrix is a single model reset (no per-cell objects).
+    """
+    def __init__(self, fmt=".4f", parent=None):
+        super().__init__(parent)
+        self._values = np.zeros((0, 0))
+        self._row_labels = []
+        self._col_labels = []
+        self._fmt = fmt
+
+    def setArray(self, values, row_labels=None, col_labels=None):
+        """Show a new matrix; the array is referenced, not copied."""
+        self.beginResetModel()
+        self._values = np.zeros((0, 0)) if values is None else np.asarray(values)
+        self._row_labels = list(row_labels) if row_labels is not None else []
+        self._col_labels = list(col_labels) if col_labels is not None else []
+        self.endResetModel()
+
+    def array(self):
+        return self._values
+
+    def rowLabels(self):
+        return list(self._row_labels)
+
+    def columnLabels(self):
+        return list(self._col_labels)
+
+    def columnFormat(self, column):
+        """Format spec of a column ('d' = integer)."""
+        if isinstance(self._fmt, str):
+            return self._fmt
+        return self._fmt[column]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._values.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._values.ndim < 2:
+            return 0
+        return self._values.shape[1]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._values[index.row(), index.column()]
+        if role == Qt.DisplayRole:
+            return _format_value(value, self.columnFormat(index.column()))
+        if role == Qt.ToolTipRole:
+            return repr(float(value))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        labels = self._col_labels if orientation == Qt.Horizontal else self._row_labels
+        if section < len(labels):
+            return labels[section]
+        return str(section + 1)
+
+
+class CorrectorParamsModel(ArrayTableModel):
+    """Corrector parameter table: a leading name column followed by the numeric columns."""
+    def __init__(self, fmt=(".3f", "d", ".3f", ".3f"), parent=None):
+        super().__init__(list(fmt), parent)
+        self._names = []
+
+    def setParameters(self, names, params, param_labels):
+        self._names = list(names)
+        self.setArray(params, None, ["Corrector"] + list(param_labels))
+
+    def names(self):
+        return list(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._values.ndim < 2 or not self._names:
+            return 0
+        return self._values.shape[1] + 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if index.column() == 0:
+            return self._names[index.row()] if role == Qt.DisplayRole else None
+        shifted = self.index(index.row(), index.column() - 1)
+        return super().data(shifted, role)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules live at the repository root (no package); make them importable
+# however pytest is started. The synthetic data generator lives with the benchmarks.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
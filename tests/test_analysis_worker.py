@@ -0,0 +1,41 @@
+import pstats
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from analysis_worker import AnalysisWorker
+from orm_pipeline import ORM_ENGINE_FFT, AnalysisGraph, run_analysis
+from spectrum_cache import SpectrumCache
+from test_orm_pipeline import assert_same_result, measurement
+
+
+def run_worker(signals, names, **kwargs):
+    """Run a worker synchronously on this thread; returns its result."""
+    results = []
+    worker = AnalysisWorker(signals, *names, ORM_ENGINE_FFT, kwargs.pop("spectra", None), **kwargs)
+    worker.resultReady.connect(results.append)
+    worker.failed.connect(pytest.fail)
+    worker.run()
+    return results[0]
+
+
+def profiled_functions(path):
+    return {func for _, _, func in pstats.Stats(str(path)).stats}
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_profiled_run_after_a_normal_run_records_every_stage(tmp_path, workers):
+    signals, names = measurement()
+    graph, spectra = AnalysisGraph(), SpectrumCache(signals)
+    first = run_analysis(signals, *names, ORM_ENGINE_FFT, spectra=spectra, graph=graph)
+    assert run_analysis(signals, *names, ORM_ENGINE_FFT, spectra=spectra, graph=graph).recomputed == []
+
+    path = tmp_path / "analysis.prof"
+    # stages on pool threads would be missing from the profile: profiled runs are serial
+    profiled = run_worker(signals, names, spectra=spectra, graph=graph, profile_path=str(path), workers=workers)
+    assert {"Spectra", "Response H", "Errors V"} <= set(profiled.recomputed)
+    assert {"batch_spectrum", "response_from_amplitudes", "orm_error_matrix"} <= profiled_functions(path)
+    assert_same_result(profiled, first)
+    # the shared graph and cache are left as they were
+    assert run_analysis(signals, *names, ORM_ENGINE_FFT, spectra=spectra, graph=graph).recomputed == []
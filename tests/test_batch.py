@@ -0,0 +1,38 @@
+import os
+
+from orm import BUNDLE_SUFFIX, bundle_paths, expand_inputs
+
+
+def test_bundles_next_to_each_csv(tmp_path):
+    a, b = str(tmp_path / "d1" / "run.csv"), str(tmp_path / "d2" / "run.csv")
+    assert bundle_paths([a, b]) == [str(tmp_path / "d1" / "run_orm.npz"), str(tmp_path / "d2" / "run_orm.npz")]
+
+
+def test_distinct_names_stay_flat_in_out_dir(tmp_path):
+    out = str(tmp_path / "out")
+    paths = bundle_paths([str(tmp_path / "d1" / "a.csv"), str(tmp_path / "d2" / "b.csv")], out)
+    assert paths == [os.path.join(out, "a_orm.npz"), os.path.join(out, "b_orm.npz")]
+
+
+def test_same_basename_mirrors_directories(tmp_path):
+    out = str(tmp_path / "out")
+    inputs = [str(tmp_path / "d1" / "run.csv"), str(tmp_path / "d2" / "run.csv"), str(tmp_path / "d1" / "x.csv")]
+    assert bundle_paths(inputs, out) == [
+        os.path.join(out, "d1", "run_orm.npz"), os.path.join(out, "d2", "run_orm.npz"),
+        os.path.join(out, "d1", "x_orm.npz"),
+    ]
+
+
+def test_same_stem_in_one_directory_gets_a_hash(tmp_path):
+    inputs = [str(tmp_path / "run.csv"), str(tmp_path / "run.txt")]
+    for out_dir in (None, str(tmp_path / "out")):
+        paths = bundle_paths(inputs, out_dir)
+        assert len(set(paths)) == 2
+        assert all(p.endswith(BUNDLE_SUFFIX) and os.path.basename(p).startswith("run_") for p in paths)
+
+
+def test_expand_inputs_drops_repeated_files(tmp_path, monkeypatch):
+    (tmp_path / "a.csv").write_text("x\n")
+    (tmp_path / "b.csv").write_text("x\n")
+    monkeypatch.chdir(tmp_path)
+    assert expand_inputs(["a.csv", "./a.csv", "*.csv"]) == ["a.csv", "b.csv"]
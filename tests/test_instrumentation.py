@@ -0,0 +1,54 @@
+import tracemalloc
+
+import numpy as np
+
+from instrumentation import RunRecorder
+
+
+def test_memory_is_not_traced_by_default():
+    recorder = RunRecorder("analysis").start()
+    with recorder.stage("Work"):
+        assert not tracemalloc.is_tracing()
+        np.ones(1 << 16)
+    recorder.finish()
+    assert recorder.stages[0]["peak_bytes"] is None
+    assert recorder.peak_bytes() == 0
+
+
+def test_traced_stage_peak():
+    recorder = RunRecorder("analysis", trace_memory=True).start()
+    with recorder.stage("Work"):
+        np.ones(1 << 20)
+    recorder.finish()
+    recorder.finish()
+    assert recorder.stages[0]["peak_bytes"] >= 8 << 20
+    assert not tracemalloc.is_tracing()
+
+
+def test_overlapping_runs_share_one_session():
+    # a cancelled run still inside a stage while the next run starts and ends
+    cancelled = RunRecorder("analysis", trace_memory=True).start()
+    with cancelled.stage("Still running"):
+        current = RunRecorder("analysis", trace_memory=True).start()
+        with current.stage("Work"):
+            np.ones(1 << 18)
+        current.finish()
+        assert tracemalloc.is_tracing()
+        np.ones(1 << 18)
+    cancelled.finish()
+    assert not tracemalloc.is_tracing()
+    assert cancelled.stages[0]["peak_bytes"] >= 2 << 20
+    assert current.stages[0]["peak_bytes"] >= 2 << 20
+
+
+def test_foreign_tracing_is_left_running():
+    tracemalloc.start()
+    try:
+        recorder = RunRecorder("load", trace_memory=True).start()
+        with recorder.stage("Parse"):
+            np.ones(1 << 16)
+        recorder.finish()
+        assert tracemalloc.is_tracing()
+        assert recorder.stages[0]["peak_bytes"] >= 0
+    finally:
+        tracemalloc.stop()
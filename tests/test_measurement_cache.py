@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from disk_cache import file_digest
+from measurement_cache import MeasurementCache
+from measurement_io import load_measurement
+from synthetic import make_measurement, write_measurement
+
+
+@pytest.fixture
+def data(tmp_path):
+    meas = make_measurement(n_corr=3, n_bpm=8, n_samples=256, zero_bpms=1)
+    return meas, write_measurement(meas, str(tmp_path / "data"))["csv"]
+
+
+def assert_same_measurement(a, b):
+    assert (a.correctors, a.bpm_h, a.bpm_v, a.excluded_bpm) == (b.correctors, b.bpm_h, b.bpm_v, b.excluded_bpm)
+    assert a.signals.dtype == b.signals.dtype
+    for name in a.correctors + a.bpm_h + a.bpm_v:
+        np.testing.assert_array_equal(a.signals.row(name), b.signals.row(name))
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_hit_matches_an_uncached_load(tmp_path, data, dtype):
+    meas, csv = data
+    cache = MeasurementCache(str(tmp_path / "cache"))
+    names = (meas.correctors, meas.bpm_h + meas.bpm_v)
+    plain = load_measurement(csv, *names, dtype)
+    first = load_measurement(csv, *names, dtype, cache=cache)
+    second = load_measurement(csv, *names, dtype, cache=cache)
+    assert_same_measurement(plain, first)
+    assert_same_measurement(plain, second)
+    assert plain.digest is None and first.digest == second.digest == file_digest(csv)
+
+    (meta,) = cache.entries().values()
+    # only the listed devices are cached, at the ingest dtype
+    assert meta["dtype"] == np.dtype(dtype).name
+    assert "Time" not in meta["columns"] and len(meta["columns"]) == 3 + 8 + 1
+    assert not any(name.endswith(".npy") and "columns" in name for name in os.listdir(cache.directory))
+
+
+def test_lookup_needs_the_columns_and_dtype(tmp_path, data):
+    meas, csv = data
+    cache = MeasurementCache(str(tmp_path / "cache"))
+    few = load_measurement(csv, meas.correctors, meas.bpm_h[:2], cache=cache)
+    assert cache.lookup(csv, ["HC000(R)", "BPH000(R)"]) is not None
+    assert cache.lookup(csv, ["HC000(R)", "BPV000(R)"]) is None
+    assert cache.lookup(csv, ["HC000(R)"], np.float32) is None
+
+    # a wider load replaces the entry it covers
+    load_measurement(csv, meas.correctors, meas.bpm_h + meas.bpm_v, cache=cache)
+    assert len(cache.entries()) == 1
+    again = load_measurement(csv, meas.correctors, meas.bpm_h[:2], cache=cache)
+    assert_same_measurement(few, again)
+
+
+def test_changed_file_misses(tmp_path, data):
+    meas, csv = data
+    cache = MeasurementCache(str(tmp_path / "cache"))
+    names = (meas.correctors, meas.bpm_h + meas.bpm_v)
+    load_measurement(csv, *names, cache=cache)
+    meas.df.iloc[:128].to_csv(csv, index=False, float_format="%.17g")
+    assert len(load_measurement(csv, *names, cache=cache).signals) == 128
+    assert len(cache.entries()) == 1
+
+
+def test_rewrite_keeping_size_and_mtime_misses(tmp_path, data):
+    meas, csv = data
+    cache = MeasurementCache(str(tmp_path / "cache"))
+    names = (meas.correctors, meas.bpm_h + meas.bpm_v)
+    first = load_measurement(csv, *names, cache=cache)
+    assert first.digest == file_digest(csv)
+
+    st = os.stat(csv)
+    text = open(csv, "rb").read()
+    k = text.index(b"\n", text.index(b"\n") + 1) - 1  # last digit of the first data row
+    other = text[:k] + (b"1" if text[k:k + 1] != b"1" else b"2") + text[k + 1:]
+    with open(csv, "wb") as f:
+        f.write(other)
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert os.stat(csv).st_size == st.st_size
+
+    again = load_measurement(csv, *names, cache=cache)
+    assert again.digest == file_digest(csv) != first.digest
+    plain = load_measurement(csv, *names)
+    assert_same_measurement(plain, again)
+    assert len(cache.entries()) == 1
+
+
+def test_hits_do_not_rewrite_the_index(tmp_path, data):
+    meas, csv = data
+    cache = MeasurementCache(str(tmp_path / "cache"))
+    names = (meas.correctors, meas.bpm_h + meas.bpm_v)
+    load_measurement(csv, *names, cache=cache)
+    index = os.path.join(cache.directory, cache.INDEX_NAME)
+    before = os.stat(index).st_mtime_ns
+    for _ in range(3):
+        load_measurement(csv, *names, cache=cache)
+    assert os.stat(index).st_mtime_ns == before
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+import orbit_correction
+from orbit_correction import OrbitCorrector, prefer_randomized, truncated_svd
+
+
+def decaying_matrix(m, n, decay, seed=0):
+    """(m x n) matrix with singular values decay**i and random singular vectors."""
+    rng = np.random.default_rng(seed)
+    U, _ = np.linalg.qr(rng.standard_normal((m, n)))
+    V, _ = np.linalg.qr(rng.standard_normal((n, n)))
+    return (U * decay**np.arange(n)) @ V.T
+
+
+def rank_cutoff(R, rank):
+    """rcond for np.linalg.pinv that keeps exactly the leading `rank` singular values."""
+    s = np.linalg.svd(R, compute_uv=False)
+    return 0.5 * (s[rank - 1] + s[rank]) / s[0]
+
+
+@pytest.fixture
+def orbits():
+    return np.random.default_rng(1).standard_normal((7, 120))
+
+
+def test_full_kicks_match_pinv(orbits):
+    R = decaying_matrix(120, 40, 0.9)
+    corrector = OrbitCorrector()
+    corrector.set_matrix(R)
+    np.testing.assert_allclose(corrector.kicks(orbits), -orbits @ np.linalg.pinv(R).T, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(corrector.kicks(orbits[0]), -np.linalg.pinv(R) @ orbits[0], rtol=1e-9, atol=1e-12)
+    assert corrector.method() == "full"
+
+
+def test_truncated_kicks_match_pinv(orbits):
+    R = decaying_matrix(120, 40, 0.9)
+    corrector = OrbitCorrector(rank=12)
+    corrector.set_matrix(R)
+    expected = -orbits @ np.linalg.pinv(R, rcond=rank_cutoff(R, 12)).T
+    np.testing.assert_allclose(corrector.kicks(orbits), expected, rtol=1e-9, atol=1e-12)
+    assert corrector.kept_rank() == 12
+
+
+def test_rank_change_reuses_exact_factors(orbits):
+    R = decaying_matrix(120, 40, 0.9)
+    corrector = OrbitCorrector(rank=5)
+    corrector.set_matrix(R)
+    corrector.kicks(orbits)
+    corrector.set_regularization(rank=20)
+    expected = -orbits @ np.linalg.pinv(R, rcond=rank_cutoff(R, 20)).T
+    np.testing.assert_allclose(corrector.kicks(orbits), expected, rtol=1e-9, atol=1e-12)
+    assert corrector.kept_rank() == 20
+
+
+def test_tikhonov_kicks_match_pinv_of_augmented_matrix(orbits):
+    R = decaying_matrix(120, 40, 0.9)
+    alpha = 0.05
+    corrector = OrbitCorrector(tikhonov=alpha)
+    corrector.set_matrix(R)
+    # min |x + R k|^2 + alpha^2 |k|^2 is the least-squares problem [R; alpha I] k = -[x; 0]
+    augmented = np.vstack([R, alpha * np.eye(R.shape[1])])
+    padded = np.hstack([orbits, np.zeros((len(orbits), R.shape[1]))])
+    np.testing.assert_allclose(corrector.kicks(orbits), -padded @ np.linalg.pinv(augmented).T,
+                               rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("decay", [0.99, 0.97, 0.9])
+def test_randomized_kicks_match_pinv(decay):
+    # slowly decaying spectra need more power iterations than the first attempt
+    R = decaying_matrix(600, 300, decay)
+    orbits = np.random.default_rng(2).standard_normal((5, 600))
+    corrector = OrbitCorrector(rank=50, randomized=True)
+    corrector.set_matrix(R)
+    expected = -orbits @ np.linalg.pinv(R, rcond=rank_cutoff(R, 50)).T
+    np.testing.assert_allclose(corrector.kicks(orbits), expected, rtol=1e-8, atol=1e-10)
+
+
+def test_randomized_falls_back_to_full_svd():
+    R = decaying_matrix(300, 100, 0.99)
+    U, s, Vt, method = truncated_svd(R, 10, randomized=True, tolerance=0.0)
+    assert method == "full"
+    np.testing.assert_allclose(s, np.linalg.svd(R, compute_uv=False)[:10])
+
+
+def test_randomized_is_picked_for_large_low_rank_problems(orbits):
+    assert not prefer_randomized((600, 300), None)
+    assert not prefer_randomized((150, 100), 5)     # small: the exact SVD is cheap
+    assert not prefer_randomized((600, 300), 150)   # high rank: no saving
+    assert prefer_randomized((1500, 600), 20)
+
+    R = decaying_matrix(1500, 600, 0.9)
+    orbits = np.random.default_rng(2).standard_normal((5, 1500))
+    corrector = OrbitCorrector(rank=20)
+    corrector.set_matrix(R)
+    assert corrector.method() == "randomized"
+    expected = -orbits @ np.linalg.pinv(R, rcond=rank_cutoff(R, 20)).T
+    np.testing.assert_allclose(corrector.kicks(orbits), expected, rtol=1e-8, atol=1e-10)
+
+    small = OrbitCorrector(rank=20)
+    small.set_matrix(decaying_matrix(120, 40, 0.9))
+    assert small.method() == "full"
+    forced = OrbitCorrector(rank=20, randomized=False)
+    forced.set_matrix(R)
+    assert forced.method() == "full"
+
+
+def test_randomized_attempts_stay_within_the_exact_svd_cost(monkeypatch):
+    calls = []
+    real = orbit_correction.randomized_svd
+    monkeypatch.setattr(orbit_correction, "randomized_svd", lambda A, rank, *a: calls.append(a) or real(A, rank, *a))
+    R = decaying_matrix(600, 300, 0.99)
+    *_, method = truncated_svd(R, 40, randomized=True, tolerance=0.0)
+    assert method == "full"
+    spent = sum(orbit_correction.randomized_cost(R.shape, 40, *a) for a in calls)
+    assert 0 < len(calls) < len(orbit_correction.RANDOMIZED_SCHEDULE) and spent <= 1.0
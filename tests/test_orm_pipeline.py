@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from orm_engine import COLUMN_BLOCK, map_blocks
+from orm_pipeline import (
+    ORM_ENGINE_FFT, ORM_ENGINE_INTERP, ORM_ENGINE_LOCKIN, SPECTRA_BATCH, AnalysisGraph, NoiseMask, run_analysis
+)
+from signal_store import SignalStore
+from spectrum_cache import SpectrumCache
+from synthetic import make_measurement
+
+ENGINES = [ORM_ENGINE_FFT, ORM_ENGINE_LOCKIN, ORM_ENGINE_INTERP]
+MATRICES = ("R_measured_H", "R_measured_V", "ERR_measured_H", "ERR_measured_V", "corrector_params",
+            "bpm_amplitudes_H", "bpm_amplitudes_V", "corr_amplitudes_H", "corr_amplitudes_V")
+# stages that fill the spectrum cache: they rerun on a new BPM list but only compute what is missing
+CACHE_STAGES = {"Spectra", "BPM tones"}
+
+
+def measurement(n_corr=5, n_bpm=24, n_samples=2048, seed=1):
+    meas = make_measurement(n_corr, n_bpm, n_samples, off_bin=True, seed=seed)
+    names = [c + "(R)" for c in meas.correctors], [b + "(R)" for b in meas.bpm_h], [b + "(R)" for b in meas.bpm_v]
+    columns = [c for c in meas.df.columns if c.endswith("(R)")]
+    signals = SignalStore.from_rows(columns, meas.df[columns].to_numpy().T, *names)
+    return signals, names
+
+
+def assert_same_result(a, b, exact=True):
+    assert (a.correctors, a.bpm_h, a.bpm_v) == (b.correctors, b.bpm_h, b.bpm_v)
+    for name in MATRICES:
+        if exact:
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+        else:
+            np.testing.assert_allclose(getattr(a, name), getattr(b, name), rtol=1e-12, atol=1e-15, err_msg=name)
+    assert a.corrector_errors == b.corrector_errors
+    if exact:
+        assert a.bpm_errors == b.bpm_errors
+    else:
+        np.testing.assert_allclose([a.bpm_errors[k] for k in b.bpm_errors], list(b.bpm_errors.values()),
+                                   rtol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_excluding_and_re_adding_bpms_matches_fresh_runs(engine):
+    signals, (corr, bpm_h, bpm_v) = measurement()
+    graph, spectra = AnalysisGraph(), SpectrumCache(signals)
+
+    def run(h, v, mask=NoiseMask(1, 2)):
+        incremental = run_analysis(signals, corr, h, v, engine, spectra=spectra, graph=graph, noise_mask=mask)
+        assert_same_result(incremental, run_analysis(signals, corr, h, v, engine, noise_mask=mask))
+        return incremental
+
+    run(bpm_h, bpm_v)
+    excluded = run(bpm_h[:3] + bpm_h[4:], bpm_v[1:])
+    # only rows dropped: the list-driven stages find everything cached, no row is computed
+    assert set(excluded.recomputed) <= CACHE_STAGES
+    assert excluded.R_measured_H.shape == (len(bpm_h) - 1, len(corr))
+
+    restored = run(bpm_h, bpm_v)
+    assert set(restored.recomputed) <= CACHE_STAGES  # the rows are still cached
+    # a new noise mask reruns the noise and errors, not the response matrices
+    masked = run(bpm_h, bpm_v, NoiseMask(2, 1))
+    assert not any(stage.startswith("Response") for stage in masked.recomputed)
+    # BPMs first seen now are computed on their own
+    run(bpm_h[:3] + bpm_h[4:], bpm_v)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_new_bpm_rows_match_a_fresh_run(engine):
+    signals, (corr, bpm_h, bpm_v) = measurement()
+    graph, spectra = AnalysisGraph(), SpectrumCache(signals)
+    run_analysis(signals, corr, bpm_h[2:], bpm_v, engine, spectra=spectra, graph=graph)
+    added = run_analysis(signals, corr, bpm_h, bpm_v, engine, spectra=spectra, graph=graph)
+    assert {"Response H", "BPM noise H", "Errors H"} <= set(added.recomputed)
+    assert not {"Response V", "BPM noise V", "Errors V", "Corrector noise"} & set(added.recomputed)
+    # lock-in and interpolated tones are matrix products over the BPMs demodulated
+    # together, so rows computed on their own may differ in the last bit
+    assert_same_result(added, run_analysis(signals, corr, bpm_h, bpm_v, engine),
+                       exact=engine == ORM_ENGINE_FFT)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_workers_are_bit_identical(engine):
+    # more BPMs than a spectra batch and more correctors than a tone block, so work is split
+    signals, (corr, bpm_h, bpm_v) = measurement(n_corr=2 * COLUMN_BLOCK + 3, n_bpm=2 * SPECTRA_BATCH + 10)
+    serial = run_analysis(signals, corr, bpm_h, bpm_v, engine, noise_mask=NoiseMask(1, 2))
+    threaded = run_analysis(signals, corr, bpm_h, bpm_v, engine, noise_mask=NoiseMask(1, 2), workers=8)
+    assert_same_result(serial, threaded)
+
+    # incremental runs too: the thread count is not a graph input
+    graph = AnalysisGraph()
+    run_analysis(signals, corr, bpm_h[5:], bpm_v, engine, graph=graph, workers=8)
+    added = run_analysis(signals, corr, bpm_h, bpm_v, engine, graph=graph, workers=1)
+    again = AnalysisGraph()
+    run_analysis(signals, corr, bpm_h[5:], bpm_v, engine, graph=again, workers=1)
+    assert_same_result(added, run_analysis(signals, corr, bpm_h, bpm_v, engine, graph=again, workers=8))
+
+
+def test_map_blocks_keeps_order_and_raises_the_first_error():
+    assert map_blocks(lambda k: k * k, range(50), workers=8) == [k * k for k in range(50)]
+    finished = []
+
+    def task(k):
+        if k in (3, 7):
+            raise ValueError(k)
+        finished.append(k)
+        return k
+
+    with pytest.raises(ValueError, match="3"):
+        map_blocks(task, range(10), workers=4)
+    assert sorted(finished) == [0, 1, 2, 4, 5, 6, 8, 9]  # every task ran before the error
@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+
+from disk_cache import file_version
+from measurement_io import load_measurement
+from orm_pipeline import run_analysis
+from result_store import ResultStore
+from synthetic import make_measurement, write_measurement
+
+
+def test_round_trip(tmp_path):
+    meas = make_measurement(n_corr=3, n_bpm=6, n_samples=256)
+    csv = write_measurement(meas, str(tmp_path / "data"))["csv"]
+    loaded = load_measurement(csv, meas.correctors, meas.bpm_h + meas.bpm_v)
+    result = run_analysis(loaded.signals, loaded.correctors, loaded.bpm_h, loaded.bpm_v, "fft")
+
+    store = ResultStore(str(tmp_path / "store"))
+    key = store.key(store.digest(csv), meas.correctors, meas.bpm_h + meas.bpm_v, {"engine": "fft"})
+    assert store.lookup(key) is None
+    store.store(key, result, path=csv, digest=store.digest(csv))
+    stored = store.lookup(key)
+    for name in ("R_measured_H", "R_measured_V", "ERR_measured_H", "ERR_measured_V", "corrector_params"):
+        np.testing.assert_array_equal(getattr(stored, name), getattr(result, name))
+    assert stored.bpm_errors == result.bpm_errors
+
+
+def test_digest_follows_content_not_stat(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    version = file_version(str(path))
+    before = ResultStore.digest(str(path), version)
+
+    # same size and mtime, other content
+    path.write_bytes(b"a,b\n1,3\n")
+    os.utime(path, ns=(version[2], version[2]))
+    assert file_version(str(path)) == version
+    assert ResultStore.digest(str(path), version) not in (None, before)
+
+
+def test_digest_of_a_file_changed_since_loading_is_none(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    version = file_version(str(path))
+    path.write_bytes(b"a,b\n1,2\n3,4\n")
+    assert ResultStore.digest(str(path), version) is None
+    assert ResultStore.digest(str(path)) is not None
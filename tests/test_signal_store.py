@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from signal_store import SignalStore
+
+
+def block(n_columns=7, n_samples=64, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"C{i}" for i in range(n_columns)], rng.standard_normal((n_columns, n_samples))
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_from_rows_copies_the_listed_channels(dtype):
+    columns, data = block()
+    store = SignalStore.from_rows(columns, data, ["C5"], ["C0", "C2"], ["C3", "C1"], dtype)
+    assert len(store) == 64 and store.dtype == dtype
+    assert "C4" not in store and "C6" not in store
+    for name, row in zip(columns, data):
+        if name in store:
+            np.testing.assert_array_equal(store.row(name), row.astype(dtype))
+            assert not np.shares_memory(store.row(name), data)
+    for device_class, names in (("correctors", ["C5"]), ("bpm_h", ["C0", "C2"]), ("bpm_v", ["C3", "C1"])):
+        assert store.names(device_class) == names
+        assert store.block(device_class).flags.c_contiguous
+    assert store.nbytes == 5 * 64 * np.dtype(dtype).itemsize
+
+
+def test_from_rows_of_a_view():
+    # classify/ingest hand over the transpose of a parsed frame
+    columns, data = block()
+    store = SignalStore.from_rows(columns, np.asfortranarray(data), ["C1"], ["C2", "C3"], [])
+    np.testing.assert_array_equal(store.block("bpm_h"), data[2:4])
+    assert store.block("bpm_h").flags.c_contiguous and store.names("bpm_v") == []
+
+
+def test_rows_of_consecutive_channels_are_views():
+    columns, data = block()
+    store = SignalStore.from_rows(columns, data, ["C0"], ["C1", "C2", "C3"], ["C4"])
+    run = store.rows(["C2", "C3"])
+    assert np.shares_memory(run, store.block("bpm_h"))
+    np.testing.assert_array_equal(run, data[2:4])
+    assert np.shares_memory(store.rows(["C2", "C3"], dtype=np.float64), store.block("bpm_h"))
+
+
+def test_rows_gathered_across_classes_and_orders():
+    columns, data = block()
+    store = SignalStore.from_rows(columns, data, ["C0"], ["C1", "C2", "C3"], ["C4"])
+    for names in (["C3", "C2"], ["C1", "C3"], ["C4", "C0", "C2"], ["C2", "C2"]):
+        out = store.rows(names)
+        assert out.flags.c_contiguous and not np.shares_memory(out, store.block("bpm_h"))
+        np.testing.assert_array_equal(out, data[[int(n[1:]) for n in names]])
+    assert store.rows(["C1", "C4"], dtype=np.float32).dtype == np.float32
+    assert store.rows([]).shape == (0, 64)
+    with pytest.raises(KeyError):
+        store.rows(["C6"])
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from orm_engine import demodulate
+from sliding_dft import SlidingDFT
+
+
+def stream(n_channels, n_samples, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples)
+    tones = np.sin(2 * np.pi * 0.0123 * t) + 0.5 * np.cos(2 * np.pi * 0.171 * t + 0.3)
+    return tones + rng.standard_normal((n_channels, n_samples))
+
+
+def feed(dft, samples, block_sizes):
+    """Push samples in blocks of the given sizes (cycled) and check against rfft after each."""
+    N = dft.window_size
+    start = 0
+    sizes = iter(np.resize(block_sizes, samples.shape[1]))
+    while start < samples.shape[1]:
+        stop = min(start + next(sizes), samples.shape[1])
+        dft.update(samples[:, start:stop] if stop - start > 1 else samples[:, start])
+        start = stop
+        held = samples[:, max(0, stop - N):stop]
+        window = np.concatenate([np.zeros((len(samples), N - held.shape[1])), held], axis=1)
+        yield window
+
+
+@pytest.mark.parametrize("window", [16, 63, 256, 1000])
+@pytest.mark.parametrize("reanchor_every", [None, 7, 10**9])
+def test_matches_rfft(window, reanchor_every):
+    bins = np.arange(window // 2 + 1)
+    dft = SlidingDFT.from_bins(3, window, bins, reanchor_every)
+    samples = stream(3, 3 * window + 11)
+    for expected_window in feed(dft, samples, [1, 5, 2, window // 3 + 1]):
+        np.testing.assert_allclose(dft.values(), np.fft.rfft(expected_window, axis=1),
+                                   rtol=1e-9, atol=1e-9 * window)
+    np.testing.assert_array_equal(dft.window(), samples[:, -window:])
+    assert dft.n_seen == samples.shape[1]
+
+
+@pytest.mark.parametrize("reanchor_every", [None, 10**9])
+def test_fractional_tones_match_demodulate(reanchor_every):
+    window = 200
+    freqs = [0.0123, 0.0531, 0.171]
+    dft = SlidingDFT(4, window, freqs, reanchor_every)
+    samples = stream(4, 5 * window, seed=1)
+    for expected_window in feed(dft, samples, [3, 17, 1]):
+        np.testing.assert_allclose(dft.values(), demodulate(expected_window, freqs),
+                                   rtol=1e-9, atol=1e-9 * window)
+
+
+def test_block_longer_than_window_reanchors():
+    dft = SlidingDFT.from_bins(2, 32, [1, 3, 5])
+    samples = stream(2, 100)
+    dft.update(samples)
+    np.testing.assert_allclose(dft.values(), np.fft.rfft(samples[:, -32:], axis=1)[:, [1, 3, 5]], atol=1e-10)
+
+
+def test_drift_is_bounded_by_reanchoring():
+    window = 64
+    samples = stream(1, 50 * window, seed=2)
+    drifting = SlidingDFT.from_bins(1, window, [4], reanchor_every=10**9)
+    anchored = SlidingDFT.from_bins(1, window, [4])
+    for k in range(samples.shape[1]):
+        drifting.update(samples[:, k])
+        anchored.update(samples[:, k])
+    exact = np.fft.rfft(samples[:, -window:], axis=1)[:, [4]]
+    assert np.abs(anchored.values() - exact).max() <= np.abs(drifting.values() - exact).max() + 1e-15
+    assert np.abs(anchored.values() - exact).max() < 1e-10
+
+
+def test_retune_uses_the_held_window():
+    dft = SlidingDFT.from_bins(2, 50, [2])
+    samples = stream(2, 130)
+    dft.update(samples[:, :90])
+    dft.retune(np.array([7, 11]) / 50)
+    dft.update(samples[:, 90:])
+    np.testing.assert_allclose(dft.values(), np.fft.rfft(samples[:, -50:], axis=1)[:, [7, 11]], atol=1e-10)
+
+
+def test_reset():
+    dft = SlidingDFT.from_bins(1, 8, [1])
+    dft.update(np.ones((1, 5)))
+    dft.reset()
+    assert dft.n_seen == 0
+    np.testing.assert_array_equal(dft.values(), 0)
+    np.testing.assert_array_equal(dft.window(), 0)
+
+
+###############################################################################
+# SlidingSpectra in the analysis pipeline
+###############################################################################
+def live_stream(n_samples, n_corr=4, n_bpm=6, seed=3):
+    """Corrector tones (off-bin) and BPM readings that respond to them, channel-major."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples)
+    freqs = 0.01 + 0.0173 * np.arange(n_corr) + 0.0021
+    correctors = np.sin(2 * np.pi * np.outer(freqs, t))
+    bpms = rng.standard_normal((n_bpm, n_corr)) @ correctors + 0.05 * rng.standard_normal((n_bpm, n_samples))
+    names = [f"C{i}(R)" for i in range(n_corr)] + [f"BPH{i}(R)" for i in range(n_bpm // 2)] \
+        + [f"BPV{i}(R)" for i in range(n_bpm - n_bpm // 2)]
+    return names, np.vstack([correctors, bpms])
+
+
+@pytest.mark.parametrize("engine", ["fft", "lockin", "interp"])
+def test_sliding_spectra_analysis_matches_full_transforms(engine):
+    from orm_pipeline import NoiseMask, run_analysis
+    from signal_store import SignalStore
+    from sliding_dft import SlidingSpectra
+
+    window = 512
+    names, samples = live_stream(3 * window + 100)
+    correctors, bpms = names[:4], names[4:]
+    bpm_h, bpm_v = bpms[:3], bpms[3:]
+    tracker = SlidingDFT(len(bpms), window, [])
+    rows = [names.index(b) for b in bpms]
+    for stop in range(97, samples.shape[1], 97):
+        tracker.update(samples[rows, stop - 97:stop])
+        if tracker.n_seen < window:
+            continue
+        block = samples[:, stop - window:stop]
+        signals = SignalStore.from_rows(names, block, correctors, bpm_h, bpm_v)
+        sliding = SlidingSpectra(signals, tracker, bpms)
+        mask = NoiseMask(1, 2)
+        live = run_analysis(signals, correctors, bpm_h, bpm_v, engine, spectra=sliding, noise_mask=mask)
+        full = run_analysis(signals, correctors, bpm_h, bpm_v, engine, noise_mask=mask)
+        for name in ("R_measured_H", "R_measured_V", "ERR_measured_H", "ERR_measured_V", "corrector_params"):
+            np.testing.assert_allclose(getattr(live, name), getattr(full, name), rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose([live.bpm_errors[b] for b in bpms], [full.bpm_errors[b] for b in bpms],
+                                   rtol=1e-9)
+        assert sliding.needs_spectrum(names) == correctors
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from signal_store import SignalStore
+from spectrum_cache import SpectrumCache
+
+
+def store(n_bpm=40, n_samples=512, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"B{i}" for i in range(n_bpm)]
+    return names, SignalStore.from_rows(names, rng.standard_normal((n_bpm, n_samples)), [], names, [])
+
+
+def test_shared_between_threads_matches_serial_use():
+    names, signals = store()
+    freqs = (0.01, 0.05, 0.2)
+    serial = SpectrumCache(signals)
+    expected = serial.spectra(names), serial.tones(names, freqs), serial.peaks(names)
+
+    shared = SpectrumCache(signals)
+
+    def use(k):
+        # overlapping, shuffled requests, as worker stages and GUI replots make them
+        order = list(np.random.default_rng(k).permutation(names)[:25])
+        return order, shared.spectra(order), shared.tones(order, freqs), shared.peaks(order)
+
+    with ThreadPoolExecutor(8) as pool:
+        for order, *got in pool.map(use, range(32)):
+            for kind, values, reference in zip(("spectra", "tones", "peaks"), got, expected):
+                ref = dict(zip(names, reference))
+                for name, value in zip(order, values):
+                    for a, b in zip(value, ref[name]):
+                        if kind == "spectra":
+                            np.testing.assert_array_equal(a, b)
+                        else:
+                            # a matrix product over the batch: rounding depends on its other rows
+                            np.testing.assert_allclose(a, b, rtol=1e-12)
+
+
+def test_reset_during_a_transform_keeps_no_stale_entries():
+    names, signals = store()
+    _, other = store(seed=1)
+    cache = SpectrumCache(signals)
+
+    class Resetting:
+        def __len__(self):
+            return len(signals)
+
+        def rows(self, *args, **kwargs):
+            cache.reset(other)  # a new file is loaded while the transform runs
+            return signals.rows(*args, **kwargs)
+
+    cache.reset(Resetting())
+    stale = cache.spectrum("B0")
+    assert "B0" not in cache
+    np.testing.assert_array_equal(stale.fft, np.fft.rfft(signals.row("B0")))
+    np.testing.assert_array_equal(cache.spectrum("B0").fft, np.fft.rfft(other.row("B0")))
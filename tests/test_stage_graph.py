@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from stage_graph import StageGraph
+
+
+class Counter:
+    """compute functions that record the names (or calls) they were asked for."""
+    def __init__(self):
+        self.calls = []
+
+    def stage(self, fn):
+        def compute(*args):
+            self.calls.append(fn.__name__)
+            return fn(*args)
+        compute.__name__ = fn.__name__
+        return compute
+
+    def rows(self, label, fn):
+        def compute(names, *args):
+            self.calls.append((label, tuple(names)))
+            return fn(names, *args)
+        return compute
+
+
+def graph(counter):
+    """scale -> Scaled; names -> Rows (per name, scaled) -> Sums (aligned on Rows)."""
+    def scaled(scale):
+        return scale * 2
+
+    g = StageGraph()
+    g.add_input("scale", 1).add_input("names", []).add_input("offset", 0)
+    g.add_stage("Scaled", ("scale",), counter.stage(scaled))
+    g.add_row_stage("Rows", "names", ("Scaled",), counter.rows(
+        "Rows", lambda names, s: (np.array([[s * int(n[1:]), s] for n in names], dtype=float).reshape(-1, 2),)))
+    g.add_row_stage("Sums", "names", ("offset",), counter.rows(
+        "Sums", lambda names, offset, rows: (rows[0].sum(axis=1) + offset,)), aligned=("Rows",))
+    return g
+
+
+def test_stages_rerun_only_on_changed_inputs():
+    counter = Counter()
+    g = graph(counter)
+    # with no rows yet, the row stages compute once for correctly shaped empty rows
+    assert g.update() == ["Scaled"]
+    assert g.update() == [] and counter.calls == ["scaled", ("Rows", ()), ("Sums", ())]
+    assert g.rows("Rows")[0].shape == (0, 2) and g.rows("Sums")[0].shape == (0,)
+
+    assert not g.set_input("names", [])  # lists compare by value
+    assert g.set_input("scale", 3)
+    g.update()
+    assert g.value("Scaled") == 6
+
+
+def test_stage_returning_its_previous_object_keeps_downstream():
+    cache = {"filled": 0}
+    g = StageGraph()
+    g.add_input("n", 1)
+    g.add_stage("Cache", ("n",), lambda n: cache.update(filled=n) or cache)
+    calls = []
+    g.add_stage("Reader", ("Cache",), lambda c: calls.append(c["filled"]))
+    g.update()
+    version = g.version("Cache")
+    g.set_input("n", 2)
+    assert g.update() == ["Cache"]
+    assert g.version("Cache") == version and calls == [1]
+
+
+def test_row_stage_computes_only_new_rows():
+    counter = Counter()
+    g = graph(counter)
+    g.set_input("names", ["b1", "b2", "b3"])
+    g.update()
+    counter.calls.clear()
+
+    # excluding a row re-assembles without computing
+    g.set_input("names", ["b1", "b3"])
+    assert g.update() == [] and counter.calls == []
+    np.testing.assert_array_equal(g.rows("Rows")[0], [[2, 2], [6, 2]])
+    np.testing.assert_array_equal(g.rows("Sums")[0], [4, 8])
+
+    # a new row is computed on its own, in every row stage, and placed in list order
+    g.set_input("names", ["b4", "b1", "b3"])
+    assert g.update() == ["Rows", "Sums"]
+    assert counter.calls == [("Rows", ("b4",)), ("Sums", ("b4",))]
+    np.testing.assert_array_equal(g.rows("Sums")[0], [10, 4, 8])
+
+    # re-including a row computed before is free
+    counter.calls.clear()
+    g.set_input("names", ["b1", "b2", "b3", "b4"])
+    assert g.update() == [] and counter.calls == []
+    np.testing.assert_array_equal(g.rows("Sums")[0], [4, 6, 8, 10])
+
+
+def test_shared_input_change_drops_the_row_caches():
+    counter = Counter()
+    g = graph(counter)
+    g.set_input("names", ["b1", "b2"])
+    g.update()
+    epoch = g._nodes["Rows"]["epoch"]
+    counter.calls.clear()
+
+    # upstream of Rows: both row caches go (Sums through the aligned epoch)
+    g.set_input("scale", 2)
+    assert g.update() == ["Scaled", "Rows", "Sums"]
+    assert counter.calls == ["scaled", ("Rows", ("b1", "b2")), ("Sums", ("b1", "b2"))]
+    assert g._nodes["Rows"]["epoch"] == epoch + 1
+    np.testing.assert_array_equal(g.rows("Sums")[0], [8, 12])
+
+    # a shared input of Sums only: Rows keeps its rows and its epoch
+    counter.calls.clear()
+    g.set_input("offset", 1)
+    assert g.update() == ["Sums"]
+    assert counter.calls == [("Sums", ("b1", "b2"))] and g._nodes["Rows"]["epoch"] == epoch + 1
+    np.testing.assert_array_equal(g.rows("Sums")[0], [9, 13])
+
+
+def test_row_output_version_tracks_layout():
+    g = graph(Counter())
+    g.set_input("names", ["b1", "b2"])
+    g.update()
+    version = g.version("Rows")
+    g.update()
+    assert g.version("Rows") == version
+    g.set_input("names", ["b2", "b1"])
+    g.update()
+    assert g.version("Rows") == version + 1
+    np.testing.assert_array_equal(g.rows("Rows")[0][:, 0], [4, 2])
+
+
+def test_aligned_must_share_the_row_list():
+    g = graph(Counter())
+    g.add_input("other", [])
+    with pytest.raises(ValueError):
+        g.add_row_stage("Bad", "other", (), lambda names, rows: (rows[0],), aligned=("Rows",))
+    with pytest.raises(ValueError):
+        g.add_row_stage("Bad", "names", (), lambda names, rows: (rows[0],), aligned=("Scaled",))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_workers_do_not_change_the_result(workers):
+    g = graph(Counter())
+    g.set_input("names", [f"b{i}" for i in range(20)])
+    assert g.update(workers=workers) == ["Scaled", "Rows", "Sums"]
+    np.testing.assert_array_equal(g.rows("Sums")[0], [2 * i + 2 for i in range(20)])